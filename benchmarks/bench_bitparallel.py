@@ -0,0 +1,58 @@
+"""
+Compares the bit-parallel engine with the Pike VM and with the generic
+(explorers) engine, on small expressions without capture groups.
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+"""
+
+from timeit import timeit
+
+from nsre import AnyNumber, RegExp, anything, seq
+from nsre.lib import ascii_alnums, hex_digits
+
+REPEAT = 20
+
+
+def run_engine(re: RegExp, data, engine):
+    return list(re._run(data, engine))
+
+
+def run_bits(re: RegExp, data):
+    # Times the bit-parallel engine itself, whatever other backend
+    # :py:meth:`RegExp.match` would pick for this pattern.
+    return re.bits.make_match(data) if re.bits.accepts(data) else None
+
+
+def main():
+    cases = [
+        ("hex_digits", hex_digits, "0123456789abcdefABCDEF" * 20),
+        ("seq", seq("hello world"), "hello world"),
+        ("alternation", AnyNumber(seq("ab") | seq("ac") | seq("b")), "abacb" * 40),
+        ("contains", anything() + seq("needle") + anything(), "hay" * 60 + "needle"),
+        ("ascii_alnums", ascii_alnums, "abc123" * 40),
+    ]
+
+    print(
+        f"{'pattern':>14} {'tokens':>7} {'explorers (µs)':>15} {'pike (µs)':>10}"
+        f" {'bits (µs)':>10} {'speedup':>8}"
+    )
+
+    for name, node, data in cases:
+        re = RegExp.from_ast(node)
+        assert re.bits is not None
+        assert re.bits.accepts(data)
+
+        explorers = timeit(lambda: run_engine(re, data, re.explorers), number=REPEAT)
+        pike = timeit(lambda: run_engine(re, data, re.pike), number=REPEAT)
+        bits = timeit(lambda: run_bits(re, data), number=REPEAT)
+
+        explorers, pike, bits = (x / REPEAT * 1e6 for x in (explorers, pike, bits))
+
+        print(
+            f"{name:>14} {len(data):>7} {explorers:>15.1f} {pike:>10.1f}"
+            f" {bits:>10.1f} {min(explorers, pike) / bits:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Measures the cost of a matching step depending on the number of live
+explorers. Each pattern is an alternation of k branches that all accept any
+token, so at each step there is k live explorers (and k * k candidates to
+de-duplicate).
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+"""
+
+from functools import reduce
+from operator import or_
+from timeit import timeit
+
+from nsre import AnyNumber, Anything, Final, RegExp
+
+STEPS = 200
+REPEAT = 5
+
+
+def make_re(k: int) -> RegExp:
+    return RegExp.from_ast(AnyNumber(reduce(or_, [Final(Anything())] * k)))
+
+
+def main():
+    print(
+        f"{'explorers':>10} {'candidates':>11} {'per step (µs)':>15}"
+        f" {'per candidate (µs)':>19}"
+    )
+
+    data = "x" * STEPS
+
+    for k in (1, 2, 4, 8, 16, 32, 64):
+        re = make_re(k)
+        assert re.match(data)
+
+        total = timeit(lambda: re.match(data), number=REPEAT) / REPEAT
+        per_step = total / STEPS * 1e6
+
+        print(f"{k:>10} {k * k:>11} {per_step:>15.1f} {per_step / (k * k):>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares a :py:class:`nsre.ast.Gazetteer` with the equivalent alternation of
+phrases, for the compilation and for :py:meth:`nsre.regexp.RegExp.finditer`.
+The alternation is only tried for the smaller dictionaries: it is too deep to
+be compiled past a few hundred phrases. The gazetteer goes up to a million
+phrases, whose trie is neither minimized nor indexed upfront.
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+"""
+
+from functools import reduce
+from operator import or_
+from random import Random
+from time import perf_counter
+
+from nsre import Final, Gazetteer, RegExp
+from nsre.matchers import Eq
+
+VOCABULARY = [f"w{i}" for i in range(20_000)]
+SIZES = [500, 1_000, 10_000, 100_000, 1_000_000]
+ALTERNATION_LIMIT = 1_000
+TEXT_SIZE = 20_000
+
+
+def phrases(rng: Random, count: int):
+    return [
+        tuple(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def alternation(items):
+    return reduce(
+        or_, [reduce(lambda a, b: a + b, [Final(Eq(w)) for w in p]) for p in items]
+    )
+
+
+def measure(node, text):
+    start = perf_counter()
+    re = RegExp.from_ast(node)
+    compiled = perf_counter()
+    found = sum(1 for _ in re.finditer(text))
+
+    return found, compiled - start, perf_counter() - compiled
+
+
+def main():
+    rng = Random(42)
+    text = [rng.choice(VOCABULARY) for _ in range(TEXT_SIZE)]
+
+    print(f"{'phrases':>8} {'kind':>12} {'compile (s)':>12} {'search (s)':>11}")
+
+    for size in SIZES:
+        items = phrases(rng, size)
+        cases = [("gazetteer", Gazetteer(items))]
+
+        if size <= ALTERNATION_LIMIT:
+            cases.append(("alternation", alternation(items)))
+
+        for name, node in cases:
+            try:
+                _, compiled, searched = measure(node, text)
+            except RecursionError:
+                print(f"{size:>8} {name:>12} {'too deep':>12}")
+            else:
+                print(f"{size:>8} {name:>12} {compiled:>12.2f} {searched:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
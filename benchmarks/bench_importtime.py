@@ -0,0 +1,86 @@
+"""
+Measures how long :code:`import nsre` takes, using :code:`python -X importtime`
+in fresh interpreters, and checks that networkx isn't imported along the way.
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+Pass :code:`--budget <ms>` to fail when the median time is over budget.
+"""
+
+import subprocess
+import sys
+from argparse import ArgumentParser
+from statistics import median
+from typing import Dict, List, Tuple
+
+RUNS = 15
+TOP = 10
+FORBIDDEN = ["networkx"]
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Imports the module in a fresh interpreter and returns, for each imported
+    module, its self and cumulative import times (in µs)
+    """
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+    times = {}
+
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        try:
+            own, cumulative, name = line[len("import time:") :].split("|")
+            times[name.strip()] = int(own), int(cumulative)
+        except ValueError:
+            continue
+
+    return times
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="nsre")
+    parser.add_argument("--budget", type=float, help="maximum median time (ms)")
+    args = parser.parse_args()
+
+    runs: List[Dict[str, Tuple[int, int]]] = [
+        import_times(args.module) for _ in range(RUNS)
+    ]
+    total = median(r[args.module][1] for r in runs) / 1000
+
+    print(f"import {args.module}: {total:.1f} ms (median of {RUNS} runs)")
+    print()
+    print(f"{'module':>30} {'self (ms)':>10} {'cumulative (ms)':>16}")
+
+    last = runs[-1]
+
+    for name, (own, cumulative) in sorted(
+        last.items(), key=lambda x: x[1][0], reverse=True
+    )[:TOP]:
+        print(f"{name:>30} {own / 1000:>10.1f} {cumulative / 1000:>16.1f}")
+
+    failed = False
+
+    for name in FORBIDDEN:
+        if name in last:
+            print(f"\nFAIL: {name} is imported by {args.module}")
+            failed = True
+
+    if args.budget is not None and total > args.budget:
+        print(f"\nFAIL: {total:.1f} ms is over the budget of {args.budget:.1f} ms")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compares matching with and without token interning, on inputs where a few
+distinct values keep coming back and the matchers are costly.
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+"""
+
+from random import Random
+from timeit import timeit
+
+from nsre import AnyNumber, Final, RegExp
+from nsre.matchers import Not
+from nsre.matchers import Test as Predicate
+
+REPEAT = 5
+
+
+def is_entity(token: str) -> bool:
+    # Stands for a costly test, like a lookup in a big gazetteer
+    return sum(ord(c) for c in token * 50) % 3 == 0
+
+
+def main():
+    rng = Random(42)
+    entity = Predicate(is_entity)
+    node = AnyNumber(Final(entity)["entity"] | Final(Not(entity)))
+
+    print(f"{'vocabulary':>10} {'tokens':>7} {'plain (ms)':>11} {'interned (ms)':>14}")
+
+    for vocabulary in [10, 100, 1000]:
+        words = [f"word{i}" for i in range(vocabulary)]
+        data = [rng.choice(words) for _ in range(5000)]
+
+        plain = RegExp.from_ast(node)
+        interned = RegExp.from_ast(node, intern=True)
+        assert plain.count_matches(data) == interned.count_matches(data)
+
+        t_plain = timeit(lambda: plain.count_matches(data), number=REPEAT)
+        t_interned = timeit(lambda: interned.count_matches(data), number=REPEAT)
+
+        print(
+            f"{vocabulary:>10} {len(data):>7} {t_plain / REPEAT * 1e3:>11.1f}"
+            f" {t_interned / REPEAT * 1e3:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
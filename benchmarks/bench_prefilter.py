@@ -0,0 +1,44 @@
+"""
+Compares :py:meth:`nsre.regexp.RegExp.finditer` with and without the literal
+prefilter, on a long text where matches are rare.
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+"""
+
+from timeit import timeit
+
+from nsre import RegExp
+from nsre.lib import email, url
+
+REPEAT = 3
+
+TEXT = (
+    "lorem ipsum dolor sit amet, consectetur adipiscing elit " * 500
+    + "write to remy@example.com or see https://example.com/about "
+) * 4
+
+
+def find_all(re: RegExp) -> int:
+    return sum(1 for _ in re.finditer(TEXT))
+
+
+def main():
+    print(f"{'pattern':>8} {'chars':>7} {'plain (ms)':>11} {'prefilter (ms)':>15}")
+
+    for name, node in [("email", email), ("url", url)]:
+        re = RegExp.from_ast(node)
+        assert re.literal is not None
+
+        with_literal = timeit(lambda: find_all(re), number=REPEAT)
+        literal, re.literal = re.literal, None
+        plain = timeit(lambda: find_all(re), number=REPEAT)
+        re.literal = literal
+
+        print(
+            f"{name:>8} {len(TEXT):>7} {plain / REPEAT * 1e3:>11.1f}"
+            f" {with_literal / REPEAT * 1e3:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares the vectorized engine with the token-by-token path, on NumPy arrays
+of categorical codes (like POS tag ids). Requires NumPy.
+
+Run it with :code:`make bench` or :code:`PYTHONPATH=src python benchmarks/...`.
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+from nsre import AnyNumber, Final, RegExp
+from nsre.matchers import Anything, Eq, In
+from nsre.matchers import Test as Predicate
+
+NOUN, VERB, DET, ADJ, ADV = range(5)
+
+SIZE = 10_000_000
+BASELINE_SIZE = 100_000
+
+
+def is_modifier(values):
+    return (values == ADJ) | (values == ADV)
+
+
+def throughput(re: RegExp, data) -> float:
+    start = perf_counter()
+    re.test(data)
+    return len(data) / (perf_counter() - start)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    data = rng.integers(0, 5, size=SIZE)
+    anything = AnyNumber(Final(Anything()))
+
+    cases = [
+        (
+            "det-adj-noun",
+            anything
+            + Final(Eq(DET))
+            + AnyNumber(Final(In({ADJ, ADV})))
+            + Final(Eq(NOUN))
+            + anything,
+        ),
+        (
+            "modifiers",
+            anything
+            + Final(Predicate(lambda t: t in (ADJ, ADV), vectorized=is_modifier))
+            + Final(Eq(VERB))
+            + Final(Eq(VERB))
+            + Final(Eq(VERB))
+            + anything,
+        ),
+        ("ends-with-verb", AnyNumber(Final(In(range(5)))) + Final(Eq(VERB))),
+    ]
+
+    print(f"{'pattern':>15} {'tokens/s (loop)':>16} {'tokens/s (vector)':>18}")
+
+    for name, node in cases:
+        re = RegExp.from_ast(node)
+        assert re.vector is not None
+
+        vector = throughput(re, data)
+
+        engine, re.vector = re.vector, None
+        loop = throughput(re, data[:BASELINE_SIZE])
+        re.vector = engine
+
+        print(f"{name:>15} {loop:>16,.0f} {vector:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
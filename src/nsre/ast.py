@@ -1,8 +1,27 @@
 from dataclasses import dataclass, field, replace
 from functools import reduce
-from typing import Generic, Text, Union
-
-from .matchers import Matcher, Out, Tok
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+    Union,
+)
+
+from .matchers import Eq, FunctionHasValue, Matcher, Out, Tok, _hashable
+
+# Repetitions generated by Node.__mul__ which would need more copies of the
+# node than this are represented by a Repeat node instead of being unrolled
+UNROLL_LIMIT = 8
 
 
 @dataclass(frozen=True)
@@ -61,29 +80,53 @@ class Node(Generic[Tok, Out]):
             if other < 1:
                 raise ValueError("Cannot repeat item a negative number of times")
 
-            return reduce(lambda a, b: a + b, [replace(self) for _ in range(0, other)])
+            start, stop = other, other
         elif isinstance(other, slice):
-            parts = []
-
             if isinstance(other.start, int) and other.start > 0:
-                parts.append(self * other.start)
+                start = other.start
             elif other.start is None or other.start == 0:
-                pass
+                start = 0
             else:
                 raise ValueError("Start of slice does not look valid")
 
-            if isinstance(other.stop, int):
-                for _ in range(other.start or 0, other.stop):
-                    parts.append(Maybe(replace(self)))
-            elif other.stop is None:
-                parts.append(AnyNumber(replace(self)))
+            if isinstance(other.stop, int) or other.stop is None:
+                stop = other.stop
             else:
                 raise ValueError("End of slice does not look valid")
-
-            return reduce(lambda a, b: a + b, parts)
         else:
             raise ValueError("Multiply either with an int or a slice")
 
+        copies = start if stop is None else stop
+
+        if copies > UNROLL_LIMIT and copies >= start and not nullable(self):
+            return Repeat(self, start, stop)
+
+        return self.unroll(start, stop)
+
+    def unroll(self, start: int, stop: Optional[int]) -> "Node":
+        """
+        Generates the repetition of this node between start and stop times
+        (included, :code:`None` meaning +inf) by concatenating copies of the
+        node.
+
+        Parameters
+        ----------
+        start
+            Minimum number of occurrences
+        stop
+            Maximum number of occurrences
+        """
+
+        parts = [replace(self) for _ in range(0, start)]
+
+        if isinstance(stop, int):
+            for _ in range(start, stop):
+                parts.append(Maybe(replace(self)))
+        else:
+            parts.append(AnyNumber(replace(self)))
+
+        return reduce(lambda a, b: a + b, parts)
+
     def copy(self):
         """
         Generates a copy of the node. This is done because of the way the graph
@@ -202,6 +245,444 @@ class Capture(DumbHash, Node):
         return id(self) < id(other)
 
 
+@dataclass(frozen=True, eq=False)
+class Repeat(DumbHash, Node):
+    """
+    Represents between min and max (included) occurrences of the statement,
+    max being :code:`None` for +inf. This is what :code:`node * slice(x, y)`
+    generates for large repetitions.
+
+    Notes
+    -----
+    Instead of copying the statement as many times as needed, the repetition
+    is compiled into a counted loop: the statement appears twice in the graph
+    whatever the bounds and the number of iterations is tracked at match time
+    by a counter (see :py:meth:`Repeat.expand`).
+    """
+
+    statement: Node
+    min: int
+    max: Optional[int]
+
+    def __post_init__(self):
+        if self.min < 0:
+            raise ValueError("Cannot repeat item a negative number of times")
+
+        if self.max is not None and self.max < max(self.min, 1):
+            raise ValueError("Maximum number of repetitions is too low")
+
+    def copy(self):
+        return Repeat(statement=self.statement.copy(), min=self.min, max=self.max)
+
+    def expand(self) -> Node:
+        """
+        Generates the equivalent node, made of the first occurrence of the
+        statement followed by a :code:`_Loop` for the other occurrences.
+
+        The first occurrence is kept out of the loop so that if the repetition
+        itself is repeated, going back to its beginning can't be confused with
+        the loop of the counter. If the statement can match an empty sequence,
+        the counter couldn't tell occurrences apart so the repetition is
+        unrolled instead.
+        """
+
+        if nullable(self.statement):
+            return self.statement.unroll(self.min, self.max).copy()
+
+        if self.min == 0:
+            return Maybe(Repeat(self.statement.copy(), 1, self.max))
+
+        head = self.statement.copy()
+
+        if self.max == 1:
+            return head
+
+        tail = _Loop(
+            statement=self.statement.copy(),
+            min=self.min - 1,
+            max=None if self.max is None else self.max - 1,
+        )
+
+        if tail.min == 0:
+            return head + Maybe(tail)
+
+        return head + tail
+
+
+@dataclass(frozen=True, eq=False)
+class _Loop(DumbHash, Node):
+    """
+    Special node for 1 to max occurrences of the statement, which can only be
+    left after min occurrences. Generated by :py:meth:`Repeat.expand`, don't
+    use it directly.
+
+    The node itself is the identity of the counter that tracks the number of
+    occurrences.
+    """
+
+    statement: Node
+    min: int
+    max: Optional[int]
+
+    def copy(self):
+        return _Loop(statement=self.statement.copy(), min=self.min, max=self.max)
+
+
+class Trie:
+    """
+    Prefix tree of phrases (sequences of hashable values), each phrase
+    having an ID. Nodes are numbered, the root being 0, and all the edges are
+    stored in a single dictionary so that the memory used only depends on
+    the number of nodes.
+
+    >>> trie = Trie.build(["new york", "new delhi", "paris"])
+    >>> assert trie.lookup("new delhi") == 1
+    >>> assert trie.lookup("new") is None
+    >>> assert len(trie) == 3
+    """
+
+    def __init__(self):
+        self.edges: Dict[Tuple[int, Hashable], int] = {}
+        self.ids: Dict[int, Any] = {}
+        self.size = 1
+        self.min_len: Optional[int] = None
+        self.max_len = 0
+
+    @classmethod
+    def build(
+        cls, phrases: Union[Mapping[Sequence, Any], Iterable[Sequence]]
+    ) -> "Trie":
+        """
+        Builds the trie of some phrases
+
+        Parameters
+        ----------
+        phrases
+            Either a mapping of phrases to their ID or an iterable of phrases,
+            in which case the ID of a phrase is its position (the first one if
+            it appears several times)
+        """
+
+        trie = cls()
+
+        if isinstance(phrases, Mapping):
+            items = phrases.items()
+        else:
+            items = ((phrase, i) for i, phrase in enumerate(phrases))
+
+        for phrase, pid in items:
+            trie.add(phrase, pid)
+
+        return trie
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return f"Trie({len(self)} phrases, {self.size} nodes)"
+
+    def add(self, phrase: Sequence, pid: Any) -> None:
+        """
+        Adds a phrase, unless it's already there
+
+        Parameters
+        ----------
+        phrase
+            Values of the phrase
+        pid
+            ID of the phrase
+        """
+
+        node = 0
+        length = 0
+
+        for value in phrase:
+            node = self.edges.setdefault((node, value), self.size)
+            length += 1
+
+            if node == self.size:
+                self.size += 1
+
+        if node not in self.ids:
+            self.ids[node] = pid
+            self.min_len = length if self.min_len is None else min(length, self.min_len)
+            self.max_len = max(length, self.max_len)
+
+    def lookup(self, phrase: Iterable) -> Any:
+        """
+        Returns the ID of a phrase, None if it is not in the trie
+
+        Parameters
+        ----------
+        phrase
+            Values of the phrase
+        """
+
+        node = 0
+
+        for value in phrase:
+            node = self.edges.get((node, value))
+
+            if node is None:
+                return None
+
+        return self.ids.get(node)
+
+    def walk(self) -> Iterator[Tuple[int, Hashable, int]]:
+        """
+        Generates all the edges as :code:`(parent, value, child)`, parents
+        always coming before their children
+        """
+
+        for (parent, value), child in self.edges.items():
+            yield parent, value, child
+
+
+@dataclass(frozen=True, eq=False)
+class Gazetteer(DumbHash, Node):
+    """
+    Matches any phrase (sequence of tokens) from a dictionary, which can be
+    very large (like a list of a million place names). This is the same as
+    an alternation of the phrases but the phrases are stored in a
+    :py:class:`Trie` which is turned into a sub-automaton with one state per
+    node of the trie: common prefixes are shared and each token costs a
+    single dictionary lookup, whatever the number of phrases.
+
+    >>> from nsre import *
+    >>> cities = Gazetteer([("new", "york"), ("paris",)], key=str.lower)
+    >>> re = RegExp.from_ast(cities["city"] + Final(Eq("!")))
+    >>> m = re.match(["New", "York", "!"])
+    >>> assert m["city"].trail == ("New", "York")
+    >>> assert cities.lookup(m["city"].trail) == 0
+
+    Notes
+    -----
+    To know which phrase matched, capture the gazetteer and give the trail of
+    the capture to :py:meth:`Gazetteer.lookup`, which returns the ID of the
+    phrase.
+
+    Parameters
+    ----------
+    phrases
+        Phrases to match, either as a mapping of phrases to their ID or as an
+        iterable of phrases (see :py:meth:`Trie.build`). Each phrase is a
+        sequence of values that are compared to the keys of the tokens.
+    key
+        Function which gives the value to compare for each token (the token
+        itself if None). Unlike the tokens, the phrases are not given to it.
+    """
+
+    phrases: Union[Trie, Mapping[Sequence, Any], Iterable[Sequence]] = field(repr=False)
+    key: Optional[Callable[[Tok], Hashable]] = None
+
+    def __post_init__(self):
+        if not isinstance(self.phrases, Trie):
+            object.__setattr__(self, "phrases", Trie.build(self.phrases))
+
+    def lookup(self, tokens: Iterable[Tok]) -> Any:
+        """
+        Returns the ID of the phrase made of those tokens (typically the
+        trail of a capture of the gazetteer), None if it's not a phrase
+
+        Parameters
+        ----------
+        tokens
+            Tokens of the phrase
+        """
+
+        if self.key is not None:
+            tokens = (self.key(t) for t in tokens)
+
+        return self.phrases.lookup(tokens)
+
+    def expand(self) -> Tuple[List[Optional[Matcher]], Dict[int, List[int]], List[int]]:
+        """
+        Describes the states that the trie turns into, one for each node of the
+        trie except the root (see :py:meth:`nsre.automaton.Automaton.expand`).
+        Returns the matcher leading to each node (None for the root), the
+        children of each node that has some and the nodes which end a
+        phrase (the root, which stands for the empty phrase, excluded).
+
+        Nodes matching the same value share their matcher.
+        """
+
+        trie: Trie = self.phrases
+        shared: Dict[Tuple[type, Hashable], Matcher] = {}
+        matchers: List[Optional[Matcher]] = [None] * trie.size
+        children: Dict[int, List[int]] = {}
+
+        for parent, value, child in trie.walk():
+            matcher = shared.get((type(value), value))
+
+            if matcher is None:
+                if self.key is None:
+                    matcher = Eq(value)
+                else:
+                    matcher = FunctionHasValue(self.key, value)
+
+                shared[(type(value), value)] = matcher
+
+            matchers[child] = matcher
+            children.setdefault(parent, []).append(child)
+
+        return matchers, children, [n for n in trie.ids if n]
+
+
+class _Phrases(Matcher):
+    """
+    Stands for all the phrases of a gazetteer in the graph and in the
+    automaton, until :py:meth:`nsre.automaton.Automaton.expand` replaces its
+    state by the states of the trie. This way, the trie doesn't go through
+    the graph nor through the minimization. It doesn't match anything by
+    itself.
+    """
+
+    def __init__(self, gazetteer: Gazetteer):
+        self.gazetteer = gazetteer
+
+    def match(self, token: Tok) -> Iterator[Out]:
+        raise TypeError("Phrases must be expanded before matching")
+
+    def __repr__(self):
+        return f"_Phrases({self.gazetteer.phrases!r})"
+
+
+def nullable(node: Node) -> bool:
+    """
+    Indicates if the node can match an empty sequence
+
+    Parameters
+    ----------
+    node
+        Node to inspect
+    """
+
+    if isinstance(node, (Maybe, AnyNumber)):
+        return True
+    elif isinstance(node, Concatenation):
+        return nullable(node.left) and nullable(node.right)
+    elif isinstance(node, Alternation):
+        return nullable(node.left) or nullable(node.right)
+    elif isinstance(node, Repeat):
+        return node.min == 0 or nullable(node.statement)
+    elif isinstance(node, (Capture, _Loop)):
+        return nullable(node.statement)
+    elif isinstance(node, Gazetteer):
+        return 0 in node.phrases.ids
+
+    return False
+
+
+def _flatten(node: Node, kind: type) -> List[Node]:
+    """
+    Operands of a chain of binary nodes of the same kind (like the branches
+    of nested alternations), in order. This doesn't recurse so chains built
+    with :py:func:`functools.reduce` can be as long as needed.
+    """
+
+    parts = []
+    stack = [node]
+
+    while stack:
+        current = stack.pop()
+
+        if isinstance(current, kind):
+            stack.append(current.right)
+            stack.append(current.left)
+        else:
+            parts.append(current)
+
+    return parts
+
+
+def _literal_chain(node: Node) -> Optional[Tuple[Hashable, ...]]:
+    """
+    If the node is a concatenation of :py:class:`nsre.matchers.Eq` (like the
+    ones generated by :py:func:`nsre.shortcuts.seq`), returns their values.
+    Returns None otherwise.
+    """
+
+    values = []
+
+    for part in _flatten(node, Concatenation):
+        if not isinstance(part, Final):
+            return None
+
+        matcher = part.statement
+
+        if type(matcher) is not Eq or not _hashable(matcher.ref):
+            return None
+
+        values.append(matcher.ref)
+
+    return tuple(values)
+
+
+def factor_literals(node: Node) -> Node:
+    """
+    Rewrites the alternations of literal sequences into a
+    :py:class:`Gazetteer`, so that the common prefixes are shared. The other
+    branches of the alternation are kept as they are, and so are the
+    sub-trees which have nothing to factor (the same nodes are returned).
+
+    >>> from nsre import *
+    >>> node = factor_literals(seq("foo") | seq("foobar") | seq("fizz"))
+    >>> assert isinstance(node, Gazetteer)
+    >>> assert node.phrases.size == 10
+
+    Notes
+    -----
+    Only the branches made of :py:class:`nsre.matchers.Eq` alone are
+    factored: a branch with a capture group inside is left untouched, so
+    captures keep their boundaries. Common suffixes are merged later on, by
+    the minimization of the automaton (see :py:mod:`nsre.minimize`), as
+    long as the trie is small enough to be expanded before it (see
+    :py:data:`nsre.regexp.MINIMIZE_TRIE_LIMIT`).
+
+    Parameters
+    ----------
+    node
+        Root of the AST to rewrite
+    """
+
+    if isinstance(node, (Alternation, Concatenation)):
+        kind = type(node)
+        parts = _flatten(node, kind)
+        factored = [factor_literals(p) for p in parts]
+
+        if kind is Alternation:
+            chains = [_literal_chain(p) for p in factored]
+            phrases = [c for c in chains if c is not None]
+
+            if len(phrases) > 1:
+                first = next(i for i, c in enumerate(chains) if c is not None)
+                factored = [
+                    Gazetteer(phrases) if i == first else p
+                    for i, (p, c) in enumerate(zip(factored, chains))
+                    if c is None or i == first
+                ]
+
+        if len(factored) == len(parts) and all(a is b for a, b in zip(factored, parts)):
+            return node
+
+        return reduce(kind, factored)
+    elif isinstance(node, (Maybe, AnyNumber)):
+        inner = factor_literals(node.statement)
+        return node if inner is node.statement else node.__class__(inner)
+    elif isinstance(node, Capture):
+        inner = factor_literals(node.statement)
+        return node if inner is node.statement else Capture(node.name, inner)
+    elif isinstance(node, Repeat):
+        inner = factor_literals(node.statement)
+
+        if inner is node.statement:
+            return node
+
+        return Repeat(inner, node.min, node.max)
+
+    return node
+
+
 @dataclass(frozen=True)
 class _Initial(Node):
     """
@@ -224,4 +705,8 @@ __all__ = [
     "Maybe",
     "AnyNumber",
     "Capture",
+    "Repeat",
+    "Gazetteer",
+    "nullable",
+    "factor_literals",
 ]
@@ -0,0 +1,717 @@
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+)
+
+# noinspection PyProtectedMember
+from .ast import Capture, Final, _Initial, _Loop, _Phrases, _Terminal
+from .graph import Graph
+from .matchers import Matcher, Out, Selector, Tok
+
+
+@dataclass(frozen=True)
+class EdgeData:
+    """
+    Metadata carried by an edge of the automaton. It's the frozen counterpart
+    of the edge data found in the graph generated by
+    :py:func:`nsre.regexp.ast_to_graph`, which allows to intern it.
+    """
+
+    start_captures: Tuple[Capture, ...] = tuple()
+    stop_captures: Tuple[Capture, ...] = tuple()
+    counters: Tuple[Tuple[Text, _Loop], ...] = tuple()
+
+    def __bool__(self):
+        return bool(self.start_captures or self.stop_captures or self.counters)
+
+
+# Index of the initial state in all automatons
+INITIAL = 0
+
+# Value of the terminal table for states that are not allowed to terminate
+NO_TERMINAL = -1
+
+
+@dataclass(frozen=True)
+class Automaton(Generic[Tok, Out]):
+    """
+    Compact and flat representation of the graph, which is what the matching
+    engine actually navigates in.
+
+    Notes
+    -----
+    States are numbered with integers. The state 0 is the initial state while
+    all the other states are the :py:class:`nsre.ast.Final` nodes of the
+    graph, followed by the nodes of the tries of the gazetteers (see
+    :py:meth:`Automaton.expand`). The terminal node is not a state: instead,
+    the :code:`terminal` table indicates for each state the data of the edge
+    leading to the terminal node (or :py:data:`NO_TERMINAL` if there is no
+    such edge).
+
+    All edge data are interned into the :code:`data` table and edges only
+    reference them by index. The index 0 is always the empty data.
+
+    Attributes
+    ----------
+    matchers
+        For each state, the matcher that must accept a token in order to enter
+        this state (:code:`None` for the initial state)
+    successors
+        For each state, the list of states that can be reached from it
+    edges
+        For each state, the data index of each edge listed in
+        :code:`successors` (in the same order)
+    terminal
+        For each state, the data index of the edge to the terminal node
+    data
+        Interned edge data
+    """
+
+    matchers: Tuple[Optional[Matcher[Tok, Out]], ...]
+    successors: Tuple[Tuple[int, ...], ...]
+    edges: Tuple[Tuple[int, ...], ...]
+    terminal: Tuple[int, ...]
+    data: Tuple[EdgeData, ...]
+
+    @classmethod
+    def from_graph(cls, g: Graph, expand: bool = True) -> "Automaton[Tok, Out]":
+        """
+        Lowers the graph generated by :py:func:`nsre.regexp.ast_to_graph` into
+        an automaton. States are numbered in breadth-first order starting from
+        the initial node, so the numbering is deterministic for a given graph.
+
+        Parameters
+        ----------
+        g
+            Graph to lower
+        expand
+            Expands the gazetteers into their tries (see
+            :py:meth:`Automaton.expand`). Otherwise, each gazetteer is a
+            single state that must be expanded before matching.
+        """
+
+        terminal_node = _Terminal()
+        index: Dict[Final, int] = {_Initial(): INITIAL}
+        order = [_Initial()]
+        data_index: Dict[EdgeData, int] = {EdgeData(): 0}
+
+        def intern(raw) -> int:
+            d = EdgeData(
+                start_captures=tuple(raw.get("start_captures", [])),
+                stop_captures=tuple(raw.get("stop_captures", [])),
+                counters=tuple(raw.get("counters", [])),
+            )
+            return data_index.setdefault(d, len(data_index))
+
+        successors: List[Tuple[int, ...]] = []
+        edges: List[Tuple[int, ...]] = []
+        terminal: List[int] = []
+
+        i = 0
+
+        while i < len(order):
+            node = order[i]
+            succ = []
+            edge = []
+            term = NO_TERMINAL
+
+            for s in g.successors(node):
+                raw = g.get_edge_data(node, s, default={})
+
+                if s == terminal_node:
+                    term = intern(raw)
+                elif isinstance(s, Final):
+                    if s not in index:
+                        index[s] = len(order)
+                        order.append(s)
+
+                    succ.append(index[s])
+                    edge.append(intern(raw))
+
+            successors.append(tuple(succ))
+            edges.append(tuple(edge))
+            terminal.append(term)
+            i += 1
+
+        automaton = cls(
+            matchers=(None, *(n.statement for n in order[1:])),
+            successors=tuple(successors),
+            edges=tuple(edges),
+            terminal=tuple(terminal),
+            data=tuple(sorted(data_index, key=data_index.get)),
+        )
+
+        return automaton.expand() if expand else automaton
+
+    def expand(self) -> "Automaton[Tok, Out]":
+        """
+        Replaces the state of each gazetteer (see
+        :py:func:`nsre.regexp.ast_to_graph`) by the states of its trie, which
+        are built straight from the trie (see
+        :py:meth:`nsre.ast.Gazetteer.expand`) and put after all the other
+        states. Edges entering the gazetteer lead to the first token of each
+        phrase while the nodes which end a phrase get the outgoing edges and
+        the terminal edge of the gazetteer.
+
+        The trie is already minimal, up to the sharing of common suffixes, so
+        for big gazetteers this is done after the minimization (see
+        :py:func:`nsre.minimize.minimize`), which then doesn't have to go
+        through the (possibly millions of) states of the trie.
+        """
+
+        blocks = [s for s, m in enumerate(self.matchers) if isinstance(m, _Phrases)]
+
+        if not blocks:
+            return self
+
+        renumber = [-1] * len(self)
+        offset = 0
+
+        for state in range(len(self)):
+            if not isinstance(self.matchers[state], _Phrases):
+                renumber[state] = offset
+                offset += 1
+
+        tries = {}
+        firsts: Dict[int, List[int]] = {}
+
+        for state in blocks:
+            expansion = self.matchers[state].gazetteer.expand()
+            tries[state] = offset - 1, expansion
+            firsts[state] = [offset - 1 + c for c in expansion[1].get(0, [])]
+            offset += len(expansion[0]) - 1
+
+        def follow(state: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+            succ = []
+            edge = []
+
+            for s, d in zip(self.successors[state], self.edges[state]):
+                targets = firsts.get(s)
+
+                if targets is None:
+                    succ.append(renumber[s])
+                    edge.append(d)
+                else:
+                    succ.extend(targets)
+                    edge.extend([d] * len(targets))
+
+            return tuple(succ), tuple(edge)
+
+        matchers: List[Optional[Matcher[Tok, Out]]] = []
+        successors: List[Tuple[int, ...]] = []
+        edges: List[Tuple[int, ...]] = []
+        terminal: List[int] = []
+
+        for state in range(len(self)):
+            if renumber[state] >= 0:
+                succ, edge = follow(state)
+                matchers.append(self.matchers[state])
+                successors.append(succ)
+                edges.append(edge)
+                terminal.append(self.terminal[state])
+
+        for state in blocks:
+            base, (nodes, children, ends) = tries[state]
+            out_succ, out_edge = follow(state)
+            node_succ: List[Tuple[int, ...]] = [tuple()] * len(nodes)
+            node_edge: List[Tuple[int, ...]] = [tuple()] * len(nodes)
+            node_term = [NO_TERMINAL] * len(nodes)
+
+            for node, kids in children.items():
+                node_succ[node] = tuple([base + c for c in kids])
+                node_edge[node] = (0,) * len(kids)
+
+            for node in ends:
+                node_succ[node] += out_succ
+                node_edge[node] += out_edge
+                node_term[node] = self.terminal[state]
+
+            matchers.extend(nodes[1:])
+            successors.extend(node_succ[1:])
+            edges.extend(node_edge[1:])
+            terminal.extend(node_term[1:])
+
+        return type(self)(
+            matchers=tuple(matchers),
+            successors=tuple(successors),
+            edges=tuple(edges),
+            terminal=tuple(terminal),
+            data=self.data,
+        )
+
+    @classmethod
+    def union(
+        cls, parts: Sequence["Automaton[Tok, Out]"]
+    ) -> Tuple["Automaton[Tok, Out]", Tuple[int, ...]]:
+        """
+        Merges several automatons into a single one which runs all of them in
+        parallel. The initial state of the union leads to the successors of
+        the initial states of all the parts, and the other states are simply
+        put one after the other.
+
+        Returns the union along with the "owner" table, which indicates for
+        each state the index of the part it comes from (the initial state
+        being owned by no one, it gets -1).
+
+        Parameters
+        ----------
+        parts
+            Automatons to merge
+        """
+
+        data_index: Dict[EdgeData, int] = {EdgeData(): 0}
+        matchers = [None]
+        successors: List[Tuple[int, ...]] = [tuple()]
+        edges: List[Tuple[int, ...]] = [tuple()]
+        terminal = [NO_TERMINAL]
+        owners = [-1]
+
+        for i, part in enumerate(parts):
+            offset = len(matchers) - 1
+            remap = [data_index.setdefault(d, len(data_index)) for d in part.data]
+
+            def shift(state):
+                return state + offset if state != INITIAL else INITIAL
+
+            successors[INITIAL] += tuple(shift(s) for s in part.successors[INITIAL])
+            edges[INITIAL] += tuple(remap[d] for d in part.edges[INITIAL])
+
+            if part.terminal[INITIAL] != NO_TERMINAL:
+                terminal[INITIAL] = 0
+
+            for state in range(1, len(part)):
+                matchers.append(part.matchers[state])
+                successors.append(tuple(shift(s) for s in part.successors[state]))
+                edges.append(tuple(remap[d] for d in part.edges[state]))
+                terminal.append(
+                    remap[part.terminal[state]]
+                    if part.terminal[state] != NO_TERMINAL
+                    else NO_TERMINAL
+                )
+                owners.append(i)
+
+        union = cls(
+            matchers=tuple(matchers),
+            successors=tuple(successors),
+            edges=tuple(edges),
+            terminal=tuple(terminal),
+            data=tuple(sorted(data_index, key=data_index.get)),
+        )
+
+        return union, tuple(owners)
+
+    def __len__(self):
+        """
+        Number of states
+        """
+
+        return len(self.matchers)
+
+
+# Compiled counter operation: kind, index of the counter, minimum and maximum
+_CounterOp = Tuple[Text, int, int, Optional[int]]
+
+
+class Counters:
+    """
+    Compiled version of the loop counters found in the edge data of an
+    automaton (see :py:class:`nsre.ast.Repeat`).
+
+    Notes
+    -----
+    The values of the counters are a tuple with one integer per loop, 0
+    meaning that the loop is not running. Each engine carries those values
+    along with its threads, and before crossing an edge it applies the
+    counter operations of this edge with :py:meth:`Counters.apply`. As the
+    values are part of the thread, they are part of what tells threads apart
+    when de-duplicating them.
+
+    When the loop has no maximum, its counter never goes beyond the minimum
+    since the exact number of occurrences doesn't matter anymore, which
+    keeps the number of distinct threads bounded.
+    """
+
+    def __init__(self, automaton: Automaton):
+        loops: Dict[_Loop, int] = {}
+
+        for data in automaton.data:
+            for _, loop in data.counters:
+                loops.setdefault(loop, len(loops))
+
+        self.loops: Tuple[_Loop, ...] = tuple(loops)
+        self.empty: Tuple[int, ...] = (0,) * len(loops)
+        self.ops: Tuple[Optional[Tuple[_CounterOp, ...]], ...] = tuple(
+            tuple((kind, loops[l], l.min, l.max) for kind, l in data.counters) or None
+            for data in automaton.data
+        )
+
+    def __bool__(self):
+        return bool(self.loops)
+
+    def apply(self, values: Tuple[int, ...], data: int) -> Optional[Tuple[int, ...]]:
+        """
+        Applies the counter operations of an edge. Returns the new values of
+        the counters, or :code:`None` if the edge can't be crossed.
+
+        Parameters
+        ----------
+        values
+            Current values of the counters
+        data
+            Data index of the edge
+        """
+
+        ops = self.ops[data]
+
+        if ops is None:
+            return values
+
+        out = [*values]
+
+        for kind, i, low, high in ops:
+            if kind == "enter":
+                out[i] = 1
+            elif kind == "loop":
+                if high is None:
+                    out[i] = min(out[i] + 1, max(low, 1))
+                elif out[i] < high:
+                    out[i] += 1
+                else:
+                    return None
+            elif out[i] >= low:
+                out[i] = 0
+            else:
+                return None
+
+        return tuple(out)
+
+
+# An edge going out of a state: its rank amongst the edges of the state, the
+# successor and the data index
+_Edge = Tuple[int, int, int]
+
+# An index built for one selector: the selector, the edges reachable for each
+# selected value, and all the edges of the index (to fall back on when the
+# selected value is not hashable).
+_Table = Tuple[Selector, Dict[Hashable, Tuple[_Edge, ...]], Tuple[_Edge, ...]]
+
+# Index of a state: its tables and the edges that must be scanned
+_Index = Tuple[Tuple[_Table, ...], Tuple[_Edge, ...]]
+
+# Marks values which are not in the cache yet
+_UNSET = object()
+
+# Key of the targets of each state in the caches of a TokenTable
+_TARGETS = object()
+
+
+class Dispatch(Generic[Tok, Out]):
+    """
+    Per-state dispatch index of an automaton.
+
+    Notes
+    -----
+    For each state, the outgoing edges whose matchers can be indexed (see
+    :py:meth:`nsre.matchers.Matcher.index_keys`) are grouped by selector into
+    dictionaries that map a selected value to the reachable successors. All
+    other edges are scanned linearly, as usual.
+
+    This means that a state with 500 outgoing :py:class:`nsre.matchers.Eq`
+    (like a large vocabulary alternation) costs a single dictionary lookup
+    per token instead of 500 matcher calls.
+
+    Targets are always emitted in the order of the edges of the automaton, so
+    the results are exactly the same as with a linear scan.
+
+    During a step, the selected values and the outputs of the matchers are
+    cached, so each of them is computed at most once per token whatever the
+    number of threads. The :code:`evaluations` attribute counts the matchers
+    and selectors that were actually called while :code:`saved` counts the
+    calls that were avoided thanks to this cache (see
+    :py:meth:`Dispatch.reset_stats`).
+
+    The caches given by a :py:class:`TokenTable` last for the whole input
+    instead of a single step, and they also remember the targets of each
+    state: a state that was already left with the same token value costs a
+    single lookup.
+
+    The index of a state is only built the first time the state is left (see
+    :py:meth:`Dispatch.index`), so that compiling a large automaton (like a
+    gazetteer of a million phrases) doesn't pay for the states that the
+    inputs never reach.
+    """
+
+    def __init__(self, automaton: Automaton[Tok, Out]):
+        self.matchers = automaton.matchers
+        self.evaluations = 0
+        self.saved = 0
+        self.automaton = automaton
+        self.states: List[Optional[_Index]] = [None] * len(automaton)
+        self._keys: Dict[int, Optional[Tuple[Selector, Iterable[Hashable]]]] = {}
+
+    def index(self, state: int) -> _Index:
+        """
+        Index of a state: the tables of its indexed edges and the edges to
+        scan. It's built on the first call.
+
+        Parameters
+        ----------
+        state
+            State whose index is wanted
+        """
+
+        index = self.states[state]
+
+        if index is None:
+            index = self.states[state] = self._build(self.automaton, state, self._keys)
+
+        return index
+
+    @staticmethod
+    def _build(
+        automaton: Automaton[Tok, Out],
+        state: int,
+        keys: Dict[int, Optional[Tuple[Selector, Iterable[Hashable]]]],
+    ) -> Tuple[Tuple[_Table, ...], Tuple[_Edge, ...]]:
+        """
+        Builds the index of a single state
+
+        Parameters
+        ----------
+        automaton
+            Automaton to index
+        state
+            State whose outgoing edges are indexed
+        keys
+            Index keys of the matchers already seen, by ID of matcher (the
+            states of a gazetteer share their matchers)
+        """
+
+        tables: Dict[Selector, Dict[Hashable, List[_Edge]]] = {}
+        entries: Dict[Selector, List[_Edge]] = {}
+        scan: List[_Edge] = []
+
+        for rank, (s, d) in enumerate(
+            zip(automaton.successors[state], automaton.edges[state])
+        ):
+            matcher = automaton.matchers[s]
+
+            if id(matcher) not in keys:
+                keys[id(matcher)] = matcher.index_keys()
+
+            if keys[id(matcher)] is None:
+                scan.append((rank, s, d))
+                continue
+
+            selector, values = keys[id(matcher)]
+            table = tables.setdefault(selector, {})
+            entries.setdefault(selector, []).append((rank, s, d))
+
+            for value in values:
+                table.setdefault(value, []).append((rank, s, d))
+
+        return (
+            tuple(
+                (
+                    selector,
+                    {k: tuple(v) for k, v in table.items()},
+                    tuple(entries[selector]),
+                )
+                for selector, table in tables.items()
+            ),
+            tuple(scan),
+        )
+
+    def reset_stats(self) -> None:
+        """
+        Resets the :code:`evaluations` and :code:`saved` counters
+        """
+
+        self.evaluations = 0
+        self.saved = 0
+
+    def _outputs(
+        self, state: int, token: Tok, cache: Dict[Any, Any]
+    ) -> Tuple[Out, ...]:
+        """
+        Outputs of the matcher of a state for this token, computed only once
+        per matcher and per token.
+
+        Parameters
+        ----------
+        state
+            State whose matcher must be evaluated
+        token
+            Consumed token
+        cache
+            Cache of the current step
+        """
+
+        matcher = self.matchers[state]
+        outputs = cache.get(id(matcher))
+
+        if outputs is None:
+            outputs = cache[id(matcher)] = tuple(matcher.match(token))
+            self.evaluations += 1
+        else:
+            self.saved += 1
+
+        return outputs
+
+    def targets(
+        self, state: int, token: Tok, cache: Dict[Any, Any]
+    ) -> List[Tuple[int, int, Tuple[Out, ...]]]:
+        """
+        Lists the (successor, edge data, outputs) of all the edges going out
+        of a state whose matcher accepts the token.
+
+        Parameters
+        ----------
+        state
+            State to leave
+        token
+            Consumed token
+        cache
+            Cache for the duration of the current token, shared between all
+            calls of the step. It holds the selected values (indexed by
+            selector) and the outputs of matchers (indexed by their ID), so
+            that each is computed only once per token.
+        """
+
+        memo = cache.get(_TARGETS)
+
+        if memo is not None:
+            known = memo.get(state)
+
+            if known is not None:
+                self.saved += 1
+                return known
+
+        tables, scan = self.states[state] or self.index(state)
+        found: List[Tuple[int, int, int, Tuple[Out, ...]]] = []
+
+        for selector, table, entries in tables:
+            value = cache.get(selector, _UNSET)
+
+            if value is _UNSET:
+                value = cache[selector] = selector.select(token)
+                self.evaluations += 1
+            else:
+                self.saved += 1
+
+            try:
+                hits = table.get(value, ())
+            except TypeError:
+                hits = [
+                    (rank, s, d)
+                    for rank, s, d in entries
+                    if self._outputs(s, token, cache)
+                ]
+
+            found.extend((rank, s, d, (token,)) for rank, s, d in hits)
+
+        for rank, s, d in scan:
+            outputs = self._outputs(s, token, cache)
+
+            if outputs:
+                found.append((rank, s, d, outputs))
+
+        if len(tables) + bool(scan) > 1:
+            found.sort(key=lambda x: x[0])
+
+        out = [(s, d, outputs) for _, s, d, outputs in found]
+
+        if memo is not None:
+            memo[state] = out
+
+        return out
+
+
+class TokenTable(Generic[Tok]):
+    """
+    Interns the tokens of an input: each distinct token value gets an ID and
+    a dispatch cache (see :py:meth:`Dispatch.targets`) which is shared by all
+    the positions where this value appears. This way, each matcher is
+    evaluated at most once per distinct value of the input instead of once
+    per position, and once the targets of a state are known for a value, the
+    engine only has to look them up.
+
+    >>> table = TokenTable()
+    >>> assert table.cache("a") is table.cache("a")
+    >>> assert table.cache("a") is not table.cache("b")
+    >>> assert len(table) == 2
+
+    Notes
+    -----
+    This is only correct if matchers always give the same answer for the
+    same token. Values are told apart by type as well (so that :code:`1` and
+    :code:`True` don't share their outputs). Tokens which aren't hashable
+    can't be interned and get a fresh cache each time.
+    """
+
+    def __init__(self):
+        self.ids: Dict[Tuple[type, Hashable], int] = {}
+        self.caches: List[Dict[Any, Any]] = []
+
+    def __len__(self):
+        return len(self.caches)
+
+    def intern(self, token: Tok) -> Optional[int]:
+        """
+        Returns the ID of the token's value, or None if it can't be interned
+
+        Parameters
+        ----------
+        token
+            Token to intern
+        """
+
+        key = (type(token), token)
+
+        try:
+            found = self.ids.get(key)
+        except TypeError:
+            return None
+
+        if found is None:
+            found = self.ids[key] = len(self.caches)
+            self.caches.append({_TARGETS: {}})
+
+        return found
+
+    def cache(self, token: Tok) -> Dict[Any, Any]:
+        """
+        Dispatch cache to use for this token
+
+        Parameters
+        ----------
+        token
+            Consumed token
+        """
+
+        found = self.intern(token)
+
+        if found is None:
+            return {}
+
+        return self.caches[found]
+
+
+__all__ = [
+    "Automaton",
+    "Counters",
+    "Dispatch",
+    "EdgeData",
+    "INITIAL",
+    "NO_TERMINAL",
+    "TokenTable",
+]
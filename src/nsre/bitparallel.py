@@ -0,0 +1,211 @@
+from typing import Dict, Generic, Hashable, List, Sequence, Tuple
+
+from .automaton import INITIAL, NO_TERMINAL, Automaton
+from .match import _Match
+from .matchers import Matcher, Out, Selector, Tok
+
+# Largest automaton (in number of states) handled by the bit-parallel engine
+MAX_STATES = 64
+
+# Number of bits of the state set handled by each follow table
+CHUNK = 8
+CHUNK_MASK = (1 << CHUNK) - 1
+
+
+class BitParallel(Generic[Tok, Out]):
+    """
+    Bit-parallel engine for small expressions, in the style of Shift-And.
+    The automaton is a Glushkov automaton (each state is entered by one
+    matcher), so the set of active states can be stored as the bits of an
+    integer and a whole step boils down to a few bitwise operations:
+
+    - The states that can be reached from the active states are looked up in
+      pre-computed "follow" tables, one per chunk of 8 states
+    - Only the states whose matcher accepts the token are kept
+
+    Notes
+    -----
+    This engine only tells if the sequence matches, it doesn't know anything
+    about capture groups. It's used by :py:meth:`nsre.regexp.RegExp.match`
+    when the expression has no capture group, in which case the only possible
+    match is the whole sequence anyway. Since it doesn't create any thread
+    object, it's a lot faster than the other engines.
+
+    Like for the other engines, the matchers which can be indexed (see
+    :py:meth:`nsre.matchers.Matcher.index_keys`) are looked up in a
+    dictionary, and each matcher is called at most once per token.
+    """
+
+    def __init__(self, automaton: Automaton[Tok, Out]):
+        self.automaton = automaton
+
+        follow = [
+            sum(1 << s for s in set(successors)) for successors in automaton.successors
+        ]
+        self.follow: Tuple[Tuple[int, ...], ...] = tuple(
+            self._chunk_table(follow[i : i + CHUNK])
+            for i in range(0, len(follow), CHUNK)
+        )
+
+        self.terminal = sum(
+            1 << s for s, t in enumerate(automaton.terminal) if t != NO_TERMINAL
+        )
+
+        tables: Dict[Selector, Dict[Hashable, int]] = {}
+        entries: Dict[Selector, Dict[int, Tuple[Matcher, int]]] = {}
+        scan: Dict[int, Tuple[Matcher, int]] = {}
+
+        for state, matcher in enumerate(automaton.matchers):
+            if matcher is None:
+                continue
+
+            keys = matcher.index_keys()
+
+            if keys is None:
+                group = scan
+            else:
+                selector, values = keys
+                table = tables.setdefault(selector, {})
+                group = entries.setdefault(selector, {})
+
+                for value in values:
+                    table[value] = table.get(value, 0) | (1 << state)
+
+            m, bits = group.get(id(matcher), (matcher, 0))
+            group[id(matcher)] = (m, bits | (1 << state))
+
+        self.tables: Tuple[
+            Tuple[Selector, Dict[Hashable, int], Tuple[Tuple[Matcher, int], ...]], ...
+        ] = tuple(
+            (selector, table, tuple(entries[selector].values()))
+            for selector, table in tables.items()
+        )
+        self.scan: Tuple[Tuple[Matcher, int], ...] = tuple(scan.values())
+
+    @staticmethod
+    def _chunk_table(follow: List[int]) -> Tuple[int, ...]:
+        """
+        For a chunk of states, computes the union of the follow sets of each
+        possible combination of active states.
+
+        Parameters
+        ----------
+        follow
+            Follow set of each state of the chunk
+        """
+
+        table = [0] * (1 << len(follow))
+
+        for v in range(1, len(table)):
+            low = v & -v
+            table[v] = table[v ^ low] | follow[low.bit_length() - 1]
+
+        return tuple(table)
+
+    @staticmethod
+    def supports(automaton: Automaton) -> bool:
+        """
+        Indicates if the engine can fully handle this automaton: it must be
+        small enough, all matchers must be transparent and there must not be
+        any capture group nor loop counter.
+
+        Parameters
+        ----------
+        automaton
+            Automaton to check
+        """
+
+        return (
+            len(automaton) <= MAX_STATES
+            and all(m.transparent for m in automaton.matchers[1:])
+            and not any(automaton.data)
+        )
+
+    def _mask(self, token: Tok, reachable: int) -> int:
+        """
+        Computes the set of states whose matcher accepts the token, amongst
+        the reachable ones.
+
+        Parameters
+        ----------
+        token
+            Consumed token
+        reachable
+            States that can be reached (matchers of other states aren't
+            called)
+        """
+
+        mask = 0
+
+        for selector, table, entries in self.tables:
+            value = selector.select(token)
+
+            try:
+                mask |= table.get(value, 0)
+            except TypeError:
+                for matcher, bits in entries:
+                    if bits & reachable:
+                        for _ in matcher.match(token):
+                            mask |= bits
+                            break
+
+        for matcher, bits in self.scan:
+            if bits & reachable:
+                for _ in matcher.match(token):
+                    mask |= bits
+                    break
+
+        return mask & reachable
+
+    def accepts(self, seq: Sequence[Tok]) -> bool:
+        """
+        Indicates if the sequence matches the expression
+
+        Parameters
+        ----------
+        seq
+            Sequence to test
+        """
+
+        follow = self.follow
+        active = 1 << INITIAL
+
+        for token in seq:
+            reachable = 0
+            rest = active
+
+            for table in follow:
+                if not rest:
+                    break
+
+                reachable |= table[rest & CHUNK_MASK]
+                rest >>= CHUNK
+
+            active = self._mask(token, reachable) if reachable else 0
+
+            if not active:
+                return False
+
+        return bool(active & self.terminal)
+
+    @staticmethod
+    def make_match(seq: Sequence[Tok]) -> _Match[Out]:
+        """
+        Creates the match of the whole sequence (which is the only possible
+        match when there is no capture group)
+
+        Parameters
+        ----------
+        seq
+            Sequence that matched
+        """
+
+        match = _Match(0)
+
+        for token in seq:
+            match.append(token)
+
+        return match
+
+
+__all__ = ["BitParallel", "MAX_STATES"]
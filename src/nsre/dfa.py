@@ -0,0 +1,201 @@
+from typing import Dict, FrozenSet, Generic, Iterable, List, Optional, Tuple
+
+from .automaton import INITIAL, NO_TERMINAL, Automaton, Counters, Dispatch
+from .matchers import Out, Tok
+
+# Default maximum number of transitions kept in the cache of a LazyDFA
+DEFAULT_BUDGET = 10_000
+
+
+class LazyDFA(Generic[Tok, Out]):
+    """
+    Deterministic automaton built on the fly, in the style of
+    `RE2 <https://swtch.com/~rsc/regexp/regexp3.html>`_. It can only tell if
+    a sequence matches or not, so it's used as a filter before running a
+    real engine which will extract the captures.
+
+    Notes
+    -----
+    Each set of active states of the automaton gets an ID (a "DFA state").
+    Since matchers are expected to always give the same answer for the same
+    token, the DFA state after a token only depends on the previous DFA state
+    and on the token. The result of each transition is cached, which means
+    that once the cache is warm, each token costs a single dictionary lookup
+    instead of calling all the matchers of all the active states.
+
+    The cache is bounded: when it holds more than :code:`budget` transitions,
+    it's flushed entirely (along with the DFA states) and re-built as the
+    matching goes on. Tokens which aren't hashable can't be cached, so their
+    transitions are computed every time. The DFA states that they create
+    still count: the cache is also flushed when there are more of them than
+    :code:`budget`. Transitions are cached by type and
+    value of the token, so that :code:`1`, :code:`1.0` and :code:`True`,
+    which are equal, still get their own entries.
+
+    Loop counters (see :py:class:`nsre.ast.Repeat`) can't be represented in a
+    set of states, so automatons using them are not supported.
+    """
+
+    def __init__(
+        self,
+        automaton: Automaton[Tok, Out],
+        dispatch: Optional[Dispatch] = None,
+        budget: int = DEFAULT_BUDGET,
+    ):
+        self.automaton = automaton
+        self.dispatch = dispatch or Dispatch(automaton)
+        self.budget = budget
+
+        self.sets: List[FrozenSet[int]] = []
+        self.ids: Dict[FrozenSet[int], int] = {}
+        self.accepting: List[bool] = []
+        self.transitions: Dict[Tuple[int, type, Tok], int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+        self.dead = self._intern(frozenset())
+        self.initial = self._intern(frozenset([INITIAL]))
+
+    @staticmethod
+    def supports(automaton: Automaton) -> bool:
+        """
+        Indicates if the DFA can run this automaton (aka if there is no loop
+        counter).
+
+        Parameters
+        ----------
+        automaton
+            Automaton to check
+        """
+
+        return not Counters(automaton)
+
+    def _intern(self, states: FrozenSet[int]) -> int:
+        """
+        Returns the ID of the DFA state corresponding to this set of states,
+        creating it if needed.
+
+        Parameters
+        ----------
+        states
+            States of the automaton
+        """
+
+        found = self.ids.get(states)
+
+        if found is None:
+            found = self.ids[states] = len(self.sets)
+            self.sets.append(states)
+            self.accepting.append(
+                any(self.automaton.terminal[s] != NO_TERMINAL for s in states)
+            )
+
+        return found
+
+    def _flush(self, keep: FrozenSet[int]) -> int:
+        """
+        Empties the cache. Returns the new ID of the set of states that the
+        caller is currently in.
+
+        Parameters
+        ----------
+        keep
+            Set of states that is currently being used
+        """
+
+        self.sets = []
+        self.ids = {}
+        self.accepting = []
+        self.transitions = {}
+        self.flushes += 1
+
+        self.dead = self._intern(frozenset())
+        self.initial = self._intern(frozenset([INITIAL]))
+
+        return self._intern(keep)
+
+    def _compute(self, current: int, token: Tok) -> FrozenSet[int]:
+        """
+        Computes the states reached from a DFA state with a given token
+
+        Parameters
+        ----------
+        current
+            DFA state to leave
+        token
+            Consumed token
+        """
+
+        targets = self.dispatch.targets
+        cache = {}
+
+        return frozenset(
+            s
+            for state in self.sets[current]
+            for s, _, _ in targets(state, token, cache)
+        )
+
+    def next(self, current: int, token: Tok) -> int:
+        """
+        Returns the DFA state reached from the current one with this token
+
+        Parameters
+        ----------
+        current
+            Current DFA state
+        token
+            Consumed token
+        """
+
+        key = (current, type(token), token)
+
+        try:
+            found = self.transitions.get(key)
+        except TypeError:
+            states = self._compute(current, token)
+
+            if len(self.sets) >= self.budget:
+                return self._flush(states)
+
+            return self._intern(states)
+
+        if found is not None:
+            self.hits += 1
+            return found
+
+        self.misses += 1
+        states = self._compute(current, token)
+
+        if len(self.transitions) >= self.budget:
+            current = self._flush(self.sets[current])
+            key = (current, type(token), token)
+
+        found = self.transitions[key] = self._intern(states)
+
+        return found
+
+    def accepts(self, seq: Iterable[Tok]) -> bool:
+        """
+        Indicates if the sequence matches the expression. The iteration stops
+        as soon as there is no hope of matching anymore.
+
+        Parameters
+        ----------
+        seq
+            Sequence to test
+        """
+
+        current = self.initial
+
+        for token in seq:
+            current = self.next(current, token)
+
+            if current == self.dead:
+                return False
+
+        return self.accepting[current]
+
+
+__all__ = ["LazyDFA", "DEFAULT_BUDGET"]
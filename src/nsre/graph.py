@@ -0,0 +1,195 @@
+from typing import Any, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+# Data attached to an edge
+EdgeAttrs = Dict[str, Any]
+
+
+class EdgeView:
+    """
+    Read-only view on the edges of a :py:class:`Graph`. Iterating it yields
+    :code:`(u, v)` pairs while :code:`view[u, v]` gives the data of an edge.
+    """
+
+    def __init__(self, graph: "Graph"):
+        self._succ = graph._succ
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Hashable]]:
+        for u, successors in self._succ.items():
+            for v in successors:
+                yield u, v
+
+    def __len__(self):
+        return sum(len(s) for s in self._succ.values())
+
+    def __contains__(self, edge: Tuple[Hashable, Hashable]) -> bool:
+        u, v = edge
+        return u in self._succ and v in self._succ[u]
+
+    def __getitem__(self, edge: Tuple[Hashable, Hashable]) -> EdgeAttrs:
+        u, v = edge
+        return self._succ[u][v]
+
+
+class Graph:
+    """
+    Minimal directed graph used to build the expressions (see
+    :py:func:`nsre.regexp.ast_to_graph`). It implements the subset of the
+    :code:`networkx.DiGraph` API that the compilation needs, with the same
+    semantics (nodes and edges are kept in insertion order, adding an
+    existing edge updates its data), so that :code:`networkx` doesn't have to
+    be imported just to compile an expression.
+
+    Use :py:meth:`Graph.to_networkx` to get a real :code:`networkx.DiGraph`
+    for visualization or analysis (this requires :code:`networkx` to be
+    installed).
+    """
+
+    def __init__(self):
+        self._succ: Dict[Hashable, Dict[Hashable, EdgeAttrs]] = {}
+        self._pred: Dict[Hashable, Dict[Hashable, EdgeAttrs]] = {}
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self._succ
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._succ)
+
+    def __len__(self):
+        return len(self._succ)
+
+    @property
+    def nodes(self) -> Iterable[Hashable]:
+        """
+        All the nodes, in insertion order
+        """
+
+        return self._succ.keys()
+
+    @property
+    def edges(self) -> EdgeView:
+        """
+        All the edges (see :py:class:`EdgeView`)
+        """
+
+        return EdgeView(self)
+
+    def add_node(self, node: Hashable) -> None:
+        """
+        Adds a node if it's not already there
+
+        Parameters
+        ----------
+        node
+            Node to add
+        """
+
+        if node not in self._succ:
+            self._succ[node] = {}
+            self._pred[node] = {}
+
+    def add_nodes_from(self, nodes: Iterable[Hashable]) -> None:
+        """
+        Adds several nodes
+
+        Parameters
+        ----------
+        nodes
+            Nodes to add
+        """
+
+        for node in nodes:
+            self.add_node(node)
+
+    def add_edge(self, u: Hashable, v: Hashable, **attrs: Any) -> None:
+        """
+        Adds an edge, and its nodes if needed. If the edge already exists, its
+        data is updated with the new attributes.
+
+        Parameters
+        ----------
+        u
+            Source node
+        v
+            Destination node
+        attrs
+            Data of the edge
+        """
+
+        self.add_node(u)
+        self.add_node(v)
+
+        data = self._succ[u].get(v)
+
+        if data is None:
+            data = self._succ[u][v] = self._pred[v][u] = {}
+
+        data.update(attrs)
+
+    def remove_node(self, node: Hashable) -> None:
+        """
+        Removes a node and all the edges connected to it
+
+        Parameters
+        ----------
+        node
+            Node to remove
+        """
+
+        for s in self._succ.pop(node):
+            if s != node:
+                del self._pred[s][node]
+
+        for p in self._pred.pop(node):
+            if p != node:
+                del self._succ[p][node]
+
+    def has_edge(self, u: Hashable, v: Hashable) -> bool:
+        """
+        Indicates if there is an edge from u to v
+        """
+
+        return (u, v) in self.edges
+
+    def successors(self, node: Hashable) -> Iterator[Hashable]:
+        """
+        Nodes reachable from this node, in insertion order
+        """
+
+        return iter(self._succ[node])
+
+    def predecessors(self, node: Hashable) -> Iterator[Hashable]:
+        """
+        Nodes from which this node can be reached, in insertion order
+        """
+
+        return iter(self._pred[node])
+
+    def get_edge_data(
+        self, u: Hashable, v: Hashable, default: Optional[EdgeAttrs] = None
+    ) -> Optional[EdgeAttrs]:
+        """
+        Data of the edge from u to v, or the default if there is no such edge
+        """
+
+        try:
+            return self._succ[u][v]
+        except KeyError:
+            return default
+
+    def to_networkx(self):
+        """
+        Converts the graph into a :code:`networkx.DiGraph`
+        """
+
+        import networkx as nx
+
+        g = nx.DiGraph()
+        g.add_nodes_from(self._succ)
+
+        for u, v in self.edges:
+            g.add_edge(u, v, **self._succ[u][v])
+
+        return g
+
+
+__all__ = ["Graph", "EdgeView"]
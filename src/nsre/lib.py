@@ -1,5 +1,8 @@
+from typing import Any, List
+
 from .ast import *
 from .matchers import *
+from .regexp import RegExp
 from .shortcuts import *
 
 __all__ = [
@@ -54,81 +57,55 @@ __all__ = [
     "url",
     "email",
     "html_tag",
+    "compiled",
 ]
 
 
-if hasattr(str, "isascii"):
-
-    def _isascii(s: str) -> bool:
-        """
-        Use regular isascii test in Python 3.7+
-        """
-
-        return s.isascii()
-
-
-else:
-
-    def _isascii(s: str) -> bool:
-        """
-        Support for isascii test in Python 3.6
-        """
-
-        if not s:
-            return False
-
-        for c in s:
-            if ord(c) > ord("\u007f"):
-                return False
-
-        return True
-
-
 # Basic Python string tests
-alnum = Final(Test(lambda t: t.isalnum()))
+alnum = Final(StrTest("isalnum"))
 alnums = alnum * slice(1, None)
-alpha = Final(Test(lambda t: t.isalpha()))
+alpha = Final(StrTest("isalpha"))
 alphas = alpha * slice(1, None)
-ascii_alnum = Final(Test(lambda t: t.isalnum() and _isascii(t)))
+ascii_alnum = Final(StrTest("isalnum", ascii=True))
 ascii_alnums = ascii_alnum * slice(1, None)
-ascii_alpha = Final(Test(lambda t: t.isalpha() and _isascii(t)))
+ascii_alpha = Final(StrTest("isalpha", ascii=True))
 ascii_alphas = ascii_alpha * slice(1, None)
-ascii_decimal = Final(Test(lambda t: t.isdecimal() and _isascii(t)))
+ascii_decimal = Final(StrTest("isdecimal", ascii=True))
 ascii_decimals = ascii_decimal * slice(1, None)
-ascii_digit = Final(Test(lambda t: t.isdigit() and _isascii(t)))
+ascii_digit = Final(StrTest("isdigit", ascii=True))
 ascii_digits = ascii_digit * slice(1, None)
-ascii_lower_alnum = Final(Test(lambda t: t.isalnum() and t.islower() and _isascii(t)))
+ascii_lower_alnum = Final(StrTest("isalnum", "islower", ascii=True))
 ascii_lower_alnums = ascii_lower_alnum * slice(1, None)
-ascii_lower_alpha = Final(Test(lambda t: t.isalpha() and t.islower() and _isascii(t)))
+ascii_lower_alpha = Final(StrTest("isalpha", "islower", ascii=True))
 ascii_lower_alphas = ascii_lower_alpha * slice(1, None)
-ascii_numeric = Final(Test(lambda t: t.isnumeric() and _isascii(t)))
+ascii_numeric = Final(StrTest("isnumeric", ascii=True))
 ascii_numerics = ascii_numeric * slice(1, None)
-ascii_printable = Final(Test(lambda t: t.isprintable() and _isascii(t)))
+ascii_printable = Final(StrTest("isprintable", ascii=True))
 ascii_printables = ascii_printable * slice(1, None)
-ascii_space = Final(Test(lambda t: t.isspace() and _isascii(t)))
+ascii_space = Final(StrTest("isspace", ascii=True))
 ascii_spaces = ascii_space * slice(1, None)
-ascii_upper_alnum = Final(Test(lambda t: t.isalnum() and t.isupper() and _isascii(t)))
+ascii_upper_alnum = Final(StrTest("isalnum", "isupper", ascii=True))
 ascii_upper_alnums = ascii_upper_alnum * slice(1, None)
-ascii_upper_alpha = Final(Test(lambda t: t.isalpha() and t.isupper() and _isascii(t)))
+ascii_upper_alpha = Final(StrTest("isalpha", "isupper", ascii=True))
 ascii_upper_alphas = ascii_upper_alpha * slice(1, None)
-decimal = Final(Test(lambda t: t.isdecimal()))
+decimal = Final(StrTest("isdecimal"))
 decimals = decimal * slice(1, None)
-digit = Final(Test(lambda t: t.isdigit()))
+digit = Final(StrTest("isdigit"))
 digits = digit * slice(1, None)
-lower_alnum = Final(Test(lambda t: t.isalnum() and t.islower()))
+lower_alnum = Final(StrTest("isalnum", "islower"))
 lower_alnums = lower_alnum * slice(1, None)
-lower_alpha = Final(Test(lambda t: t.isalpha() and t.islower()))
+lower_alpha = Final(StrTest("isalpha", "islower"))
 lower_alphas = lower_alpha * slice(1, None)
-numeric = Final(Test(lambda t: t.isnumeric()))
+numeric = Final(StrTest("isnumeric"))
 numerics = numeric * slice(1, None)
-printable = Final(Test(lambda t: t.isprintable()))
+printable = Final(StrTest("isprintable"))
 printables = printable * slice(1, None)
-space = Final(Test(lambda t: t.isspace()))
+space = Final(StrTest("isspace"))
 spaces = space * slice(1, None)
 spaces_maybe = space * slice(0, None)
-upper_alnum = Final(Test(lambda t: t.isalnum() and t.isupper()))
+upper_alnum = Final(StrTest("isalnum", "isupper"))
 upper_alnums = upper_alnum * slice(1, None)
-upper_alpha = Final(Test(lambda t: t.isalpha() and t.isupper()))
+upper_alpha = Final(StrTest("isalpha", "isupper"))
 upper_alphas = upper_alpha * slice(1, None)
 
 
@@ -177,7 +154,17 @@ url = (
 _tag_attr_name = ascii_alnums + AnyNumber(seq("-") + ascii_alnums)
 _tag_attr_val_quote_1 = seq("'") + AnyNumber(Final(Not(In("'>"))))["value"] + seq("'")
 _tag_attr_val_quote_2 = seq('"') + AnyNumber(Final(Not(In('">'))))["value"] + seq('"')
-_tag_attr_val_savage = AnyNumber(Final(Test(lambda t: not t.isspace() and t != "/")))
+
+
+def _is_tag_value_char(t: str) -> bool:
+    """
+    Characters allowed in an unquoted attribute value
+    """
+
+    return not t.isspace() and t != "/"
+
+
+_tag_attr_val_savage = AnyNumber(Final(Test(_is_tag_value_char)))
 _tag_attr_quote = (
     _tag_attr_name["name"]
     + Maybe(
@@ -206,3 +193,31 @@ html_tag = (
     + spaces_maybe
     + (seq("/>") | seq(">"))
 )
+
+
+class _Compiled:
+    """
+    Compiled versions of the expressions of this module, built on first use
+    and then kept around. They can be pickled, so they can be sent to other
+    processes without being compiled again.
+
+    >>> from nsre.lib import compiled
+    >>> assert compiled.email.match("remy.sanchez@with-madrid.com")
+    """
+
+    def __getattr__(self, name: str) -> RegExp:
+        if name.startswith("_") or name not in __all__ or name == "compiled":
+            raise AttributeError(name)
+
+        found = self.__dict__[name] = RegExp.from_ast(globals()[name])
+
+        return found
+
+    def __dir__(self) -> List[str]:
+        return [name for name in __all__ if name != "compiled"]
+
+    def __reduce__(self) -> Any:
+        return "compiled"
+
+
+compiled = _Compiled()
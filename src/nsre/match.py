@@ -0,0 +1,157 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Generic, List, Mapping, Sequence, Text
+
+from .ast import Capture
+from .matchers import Out
+
+
+class _Match(Generic[Out]):
+    """
+    Internal sub-type that helps building the Match and MatchList objects
+    expected outside of `RegExp#match()`.
+    """
+
+    def __init__(self, start_pos: int):
+        self.start_pos = start_pos
+        self.children: Dict[Text, List[_Match]] = {}
+        self.trail: List[Out] = []
+        self._stack: List[Capture] = []
+
+    def _deep_get(self, keys: Sequence[Capture]) -> "_Match":
+        """
+        Gets a child following a path of keys. At each level, gets the last
+        child in the list as it is the one that we're going to want to deal
+        with.
+
+        Parameters
+        ----------
+        keys
+            Successive name of keys to follow
+        """
+
+        ptr = self
+
+        for key in keys:
+            ptr = ptr.children[key.name][-1]
+
+        return ptr
+
+    def start(self, capture: Capture, pos: int) -> None:
+        """
+        Call this to indicate that you're starting a capture group
+
+        Notes
+        -----
+        This will append the name of the capture group to the capture stack
+        and will also make sure that there is a corresponding child Match for
+        this sequence of keys.
+
+        Parameters
+        ----------
+        capture
+            Name of the capturing group
+        pos
+            Starting index in the input sequence
+        """
+
+        stick = self._deep_get(self._stack)
+
+        if capture not in stick.children:
+            stick.children[capture.name] = [_Match(pos)]
+        else:
+            stick.children[capture.name].append(_Match(pos))
+
+        self._stack.append(capture)
+
+    def stop(self, capture: Capture) -> None:
+        """
+        Indicates that matching should stop (as opposed to start).
+
+        Parameters
+        ----------
+        capture
+            Name of the matching group to stop
+        """
+
+        if capture != self._stack[-1]:
+            raise ValueError("Trying to stop a match which is not started")
+
+        self._stack = self._stack[0:-1]
+
+    def append(self, item: Out) -> None:
+        """
+        Appends the item at all level of trails for the current stack.
+
+        Parameters
+        ----------
+        item
+            Matched item to be added to trails
+        """
+
+        self.trail.append(item)
+        ptr = self
+
+        for key in self._stack:
+            ptr = ptr.children[key.name][-1]
+            ptr.trail.append(item)
+
+    def as_match(self, join_trails: bool = False) -> "Match":
+        """
+        Converts this into a real read-only match object.
+
+        Parameters
+        ----------
+        join_trails
+            If set to true then the items matched in the trail are expected to
+            be individual characters and they will be joined in a string
+            instead of being returned in an array
+        """
+
+        return Match(
+            start_pos=self.start_pos,
+            trail="".join(self.trail) if join_trails else tuple(self.trail),
+            children=MappingProxyType(
+                {
+                    k: MatchList(i.as_match(join_trails) for i in v)
+                    for k, v in self.children.items()
+                }
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class Match(Generic[Out]):
+    """
+    Represents a match for a capture group in the regular expression.
+    """
+
+    # Index of the first matching token
+    start_pos: int
+
+    # Sub-groups that matched. As several groups could be matching, a list
+    # is returned so you can access each one of them.
+    children: Mapping[Text, List["Match"]]
+
+    # Trail of matched items. It's the output of the matcher, not the input
+    # tokens.
+    trail: Sequence[Out]
+
+    def __getitem__(self, item):
+        return self.children[item][0]
+
+
+class MatchList(tuple, Generic[Out]):
+    """
+    List of matches. It's just a convenience around a tuple in order to
+    facilitate getting a specific group in the first item of the list.
+    """
+
+    def __getitem__(self, item) -> Match[Out]:
+        if isinstance(item, str):
+            return self[0][item]
+        else:
+            return super().__getitem__(item)
+
+
+__all__ = ["Match", "MatchList"]
@@ -1,11 +1,22 @@
+import re
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
+    Collection,
+    Dict,
+    FrozenSet,
     Generic,
+    Hashable,
+    Iterable,
     Iterator,
     Mapping,
+    Optional,
     Sequence,
     Text,
     Tuple,
@@ -22,14 +33,241 @@ Tok = TypeVar("Tok")
 # Output type
 Out = TypeVar("Out")
 
+# Returned by selectors when the token doesn't have the selected value
+MISSING = object()
+
+# Not computed yet
+_UNKNOWN = object()
+
+# Largest reference of In that gets converted into a frozenset
+IN_INDEX_LIMIT = 10_000
+
+
+class Selector:
+    """
+    Extracts a value from a token. Matchers which accept a token if and only
+    if this value belongs to a known set can be indexed (see
+    :py:meth:`Matcher.index_keys`): instead of trying all of them, the engine
+    extracts the value once and looks it up in a dictionary.
+
+    Selectors are compared by value, so that all the matchers that use the
+    same selector end up in the same index.
+    """
+
+    def select(self, token: Any) -> Any:
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __hash__(self):
+        return hash((type(self), *self.__dict__.values()))
+
+
+class TokenSelector(Selector):
+    """
+    Selects the token itself
+    """
+
+    def select(self, token: Any) -> Any:
+        return token
+
+
+class KeySelector(Selector):
+    """
+    Selects the value of a key of a mapping
+    """
+
+    def __init__(self, key: Any):
+        self.key = key
+
+    def select(self, token: Any) -> Any:
+        if isinstance(token, Mapping) and self.key in token:
+            return token[self.key]
+
+        return MISSING
+
+
+class AttributeSelector(Selector):
+    """
+    Selects the value of an attribute
+    """
+
+    def __init__(self, attribute: Text):
+        self.attribute = attribute
+
+    def select(self, token: Any) -> Any:
+        return getattr(token, self.attribute, MISSING)
+
+
+class FunctionSelector(Selector):
+    """
+    Selects the value returned by a function
+    """
+
+    def __init__(self, func: Callable[[Any], Any]):
+        self.func = func
+
+    def select(self, token: Any) -> Any:
+        return self.func(token)
+
+
+def _hashable(*values: Any) -> bool:
+    """
+    Checks that all the values are hashable
+    """
+
+    try:
+        for value in values:
+            hash(value)
+    except TypeError:
+        return False
+
+    return True
+
+
+if hasattr(str, "isascii"):
+
+    def _isascii(s: str) -> bool:
+        """
+        Use regular isascii test in Python 3.7+
+        """
+
+        return s.isascii()
+
+
+else:
+
+    def _isascii(s: str) -> bool:
+        """
+        Support for isascii test in Python 3.6
+        """
+
+        if not s:
+            return False
+
+        for c in s:
+            if ord(c) > ord("\u007f"):
+                return False
+
+        return True
+
+
+def _char_class(chars: Iterable[str]) -> Text:
+    """
+    Generates a :py:mod:`re` character class matching those characters
+    """
+
+    chars = sorted(set(chars))
+
+    if not chars:
+        return "(?!)"
+
+    return f"[{''.join(re.escape(c) for c in chars)}]"
+
+
+def _as_mask(values: Any, result: Any) -> Optional[Any]:
+    """
+    Checks that a vectorized test gave one boolean per token (see
+    :py:meth:`Matcher.mask`), returns None otherwise.
+    """
+
+    import numpy as np
+
+    result = np.asarray(result)
+
+    if result.dtype != np.bool_ or result.shape != values.shape:
+        return None
+
+    return result
+
+
+def _char_codes(values: Any) -> Optional[Any]:
+    """
+    Code points of a NumPy array of single-character strings (empty strings
+    get -1). Returns None for other arrays.
+    """
+
+    import numpy as np
+
+    if values.dtype.kind != "U" or values.dtype.itemsize != 4:
+        return None
+
+    codes = np.ascontiguousarray(values).view(np.uint32).astype(np.int64)
+    codes[codes == 0] = -1
+
+    return codes
+
 
 class Matcher(Generic[Tok, Out], metaclass=ABCMeta):
+    # Set this to True if the only thing the matcher ever outputs is the token
+    # it received. Engines can then skip storing the outputs and get them back
+    # from the input sequence instead.
+    transparent = False
+
     @abstractmethod
     def match(self, token: Tok) -> Iterator[Out]:
         raise NotImplementedError
 
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        """
+        If this matcher accepts a token (and outputs it as-is) if and only if
+        the value extracted by a selector is part of a set of values, returns
+        the selector and the values. This allows the engine to index the
+        matcher instead of calling it.
+
+        Returns None by default, meaning that the matcher can't be indexed.
+        """
+
+        return None
+
+    def as_regex(self) -> Optional[Text]:
+        """
+        If this matcher accepts a single-character string token (and outputs
+        it as-is) if and only if it matches a pattern of the :py:mod:`re`
+        module, returns this pattern. This allows to translate the expression
+        into a :py:mod:`re` pattern (see :py:mod:`nsre.translate`).
+
+        Returns None by default, meaning that the matcher can't be translated.
+        """
+
+        return None
+
+    def mask(self, values: Any) -> Optional[Any]:
+        """
+        If this matcher can be evaluated over a whole NumPy array of tokens
+        at once, returns a boolean array telling which tokens are accepted.
+        This allows to match arrays without calling the matcher once per
+        token (see :py:mod:`nsre.vectorized`).
+
+        Returns None by default, meaning that the matcher can't be
+        vectorized (at least not for this array).
+
+        Parameters
+        ----------
+        values
+            One-dimensional NumPy array of tokens
+        """
+
+        return None
+
+    def signature(self) -> Optional[Hashable]:
+        """
+        Returns a value that identifies the behavior of the matcher: two
+        matchers with equal signatures must accept the same tokens and give
+        the same outputs. This allows to merge equivalent states of the
+        automaton (see :py:mod:`nsre.minimize`).
+
+        Returns None by default, meaning that the matcher is only equivalent
+        to itself.
+        """
+
+        return None
+
 
 class Eq(Matcher):
+    transparent = True
+
     def __init__(self, ref: Tok):
         self.ref = ref
 
@@ -37,21 +275,125 @@ class Eq(Matcher):
         if self.ref == token:
             yield token
 
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        if _hashable(self.ref):
+            return TokenSelector(), (self.ref,)
+
+    def as_regex(self) -> Optional[Text]:
+        if isinstance(self.ref, str) and len(self.ref) == 1:
+            return re.escape(self.ref)
+
+    def mask(self, values: Any) -> Optional[Any]:
+        if values.dtype.kind != "O" and _hashable(self.ref):
+            return _as_mask(values, values == self.ref)
+
     def __repr__(self):
         return f"Eq({self.ref!r})"
 
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.ref):
+            return Eq, type(self.ref), self.ref
+
 
 class In(Matcher):
+    """
+    Matches tokens that are part of the reference. If the reference is a
+    string, the test is a substring test.
+
+    Notes
+    -----
+    The reference is kept as it is, so lazy containers like :code:`range`
+    keep their own :code:`in` test. Small finite collections of hashable
+    values are also turned into a frozenset, but only when it's needed to
+    index the matcher (see :py:meth:`Matcher.index_keys`).
+    """
+
+    transparent = True
+
     def __init__(self, ref: Sequence[Tok]):
         self.ref = ref
+        self._values = _UNKNOWN
+
+    def values(self) -> Optional[FrozenSet[Hashable]]:
+        """
+        Returns the reference as a frozenset, or :code:`None` if it's a
+        string, not a collection, larger than :py:data:`IN_INDEX_LIMIT` or
+        made of unhashable values. The result is computed only once.
+        """
+
+        if self._values is _UNKNOWN:
+            self._values = None
+
+            if (
+                not isinstance(self.ref, (str, bytes))
+                and isinstance(self.ref, Collection)
+                and len(self.ref) <= IN_INDEX_LIMIT
+            ):
+                try:
+                    self._values = frozenset(self.ref)
+                except TypeError:
+                    pass
+
+        return self._values
 
     def match(self, token: Tok) -> Iterator[Out]:
-        if token in self.ref:
+        try:
+            found = token in self.ref
+        except TypeError:
+            # Sets and dictionaries can't look up an unhashable token, but it
+            # could still be equal to one of their values
+            if _hashable(token):
+                raise
+
+            found = any(token == value for value in self.ref)
+
+        if found:
             yield token
 
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        values = self.values()
+
+        if values is not None:
+            return TokenSelector(), values
+
+    def as_regex(self) -> Optional[Text]:
+        values = self.values()
+
+        if isinstance(self.ref, str):
+            return _char_class(self.ref)
+        elif values is not None and all(isinstance(x, str) for x in values):
+            return _char_class(x for x in values if len(x) == 1)
+
+    def mask(self, values: Any) -> Optional[Any]:
+        import numpy as np
+
+        ref = self.values()
+
+        if values.dtype.kind == "O":
+            return None
+        elif isinstance(self.ref, str):
+            if values.dtype.kind == "U":
+                return np.char.find(self.ref, values) >= 0
+        elif ref is not None:
+            if values.dtype.kind == "U" and not all(isinstance(x, str) for x in ref):
+                return None
+
+            try:
+                return _as_mask(values, np.isin(values, list(ref)))
+            except (TypeError, ValueError):
+                return None
+
     def __repr__(self):
         return f"In({self.ref!r})"
 
+    def signature(self) -> Optional[Hashable]:
+        values = self.values()
+
+        if values is not None:
+            return In, frozenset, values
+        elif _hashable(self.ref):
+            return In, type(self.ref), self.ref
+
 
 class OutOf(Matcher):
     def __init__(self, ref: Tok):
@@ -64,8 +406,14 @@ class OutOf(Matcher):
         if self.ref in token:
             yield self.ref
 
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.ref):
+            return OutOf, type(self.ref), self.ref
+
 
 class AttributeHasValue(Matcher):
+    transparent = True
+
     def __init__(self, attribute: Text, value: Any):
         self.attribute = attribute
         self.value = value
@@ -77,11 +425,21 @@ class AttributeHasValue(Matcher):
         ):
             yield token
 
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        if _hashable(self.value):
+            return AttributeSelector(self.attribute), (self.value,)
+
     def __repr__(self):
         return f"AttributeHasValue({self.attribute}={self.value!r}"
 
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.value):
+            return AttributeHasValue, self.attribute, type(self.value), self.value
+
 
 class KeyHasValue(Matcher):
+    transparent = True
+
     def __init__(self, key: Any, value: Any):
         self.key = key
         self.value = value
@@ -94,19 +452,72 @@ class KeyHasValue(Matcher):
         ):
             yield token
 
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        if _hashable(self.key, self.value):
+            return KeySelector(self.key), (self.value,)
+
     def __repr__(self):
         return f"KeyHasValue({self.key!r}={self.value!r})"
 
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.key, self.value):
+            return KeyHasValue, self.key, type(self.value), self.value
+
+
+class FunctionHasValue(Matcher):
+    """
+    Matches tokens for which a function (like :code:`str.lower` or a getter)
+    returns the given value
+
+    >>> assert list(FunctionHasValue(str.lower, "paris").match("Paris"))
+    """
+
+    transparent = True
+
+    def __init__(self, func: Callable[[Tok], Any], value: Any):
+        self.func = func
+        self.value = value
+
+    def match(self, token: Tok) -> Iterator[Out]:
+        if self.func(token) == self.value:
+            yield token
+
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        if _hashable(self.func, self.value):
+            return FunctionSelector(self.func), (self.value,)
+
+    def __repr__(self):
+        return f"FunctionHasValue({self.func!r}={self.value!r})"
+
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.func, self.value):
+            return FunctionHasValue, self.func, type(self.value), self.value
+
 
 class Anything(Matcher):
+    transparent = True
+
     def __repr__(self):
         return f"Anything()"
 
     def match(self, token: Tok) -> Iterator[Out]:
         yield token
 
+    def as_regex(self) -> Optional[Text]:
+        return "(?s:.)"
+
+    def mask(self, values: Any) -> Optional[Any]:
+        import numpy as np
+
+        return np.ones(values.shape, dtype=np.bool_)
+
+    def signature(self) -> Optional[Hashable]:
+        return (Anything,)
+
 
 class ChrRanges(Matcher[str, str]):
+    transparent = True
+
     def __init__(self, *ranges: Tuple[str, str]):
         self.ranges = ranges
 
@@ -118,14 +529,61 @@ class ChrRanges(Matcher[str, str]):
             if ord(start) <= ord(token) <= ord(stop):
                 yield token
 
+    def as_regex(self) -> Optional[Text]:
+        ranges = [
+            f"{re.escape(start)}-{re.escape(stop)}"
+            for start, stop in self.ranges
+            if ord(start) <= ord(stop)
+        ]
+
+        if ranges:
+            return f"[{''.join(ranges)}]"
+
+        return "(?!)"
+
+    def mask(self, values: Any) -> Optional[Any]:
+        import numpy as np
+
+        codes = _char_codes(values)
+
+        if codes is None:
+            return None
+
+        out = np.zeros(values.shape, dtype=np.bool_)
+
+        for start, stop in self.ranges:
+            out |= (codes >= ord(start)) & (codes <= ord(stop))
+
+        return out
+
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.ranges):
+            return ChrRanges, self.ranges
+
 
 class Test(Matcher[Tok, Out]):
     """
     Runs an arbitrary test and matches the token as-is if successful
+
+    Parameters
+    ----------
+    test
+        Function which receives a token and returns True if it matches
+    vectorized
+        Optional version of the test which receives a NumPy array of tokens
+        and returns an array of booleans (like :code:`lambda a: a > 3`). It
+        must give the same answers as :code:`test`.
     """
 
-    def __init__(self, test: Callable[[Tok], bool]):
+    transparent = True
+
+    def __init__(
+        self,
+        test: Callable[[Tok], bool],
+        vectorized: Optional[Callable[[Any], Any]] = None,
+    ):
         self.test = test
+        self.vectorized = vectorized
 
     def __repr__(self):
         return f"Test({self.test!r}"
@@ -134,6 +592,106 @@ class Test(Matcher[Tok, Out]):
         if self.test(token):
             yield token
 
+    def mask(self, values: Any) -> Optional[Any]:
+        if self.vectorized is not None:
+            return _as_mask(values, self.vectorized(values))
+
+    def signature(self) -> Optional[Hashable]:
+        if _hashable(self.test):
+            return Test, self.test
+
+
+class StrTest(Matcher[str, str]):
+    """
+    Matches the strings for which all the given :code:`str` methods (like
+    :code:`isalnum` or :code:`islower`) return True. Unlike :py:class:`Test`
+    with a lambda, it can be pickled, and some tests can be translated into
+    :py:mod:`re` patterns.
+
+    >>> assert list(StrTest("isalpha", "isupper").match("A")) == ["A"]
+    >>> assert list(StrTest("isdigit", ascii=True).match("٣")) == []
+
+    Parameters
+    ----------
+    methods
+        Names of the methods to call
+    ascii
+        Also requires the string to be ASCII
+    """
+
+    transparent = True
+
+    # Methods for which the re module has an equivalent class
+    REGEX = {
+        "isalnum": r"[^\W_]",
+        "isdecimal": r"\d",
+        "isspace": r"\s",
+    }
+
+    def __init__(self, *methods: Text, ascii: bool = False):
+        for method in methods:
+            if not method.startswith("is") or not hasattr(str, method):
+                raise ValueError(f"Unknown str test: {method!r}")
+
+        self.methods = methods
+        self.ascii = ascii
+
+    def __repr__(self):
+        args = [repr(m) for m in self.methods]
+
+        if self.ascii:
+            args.append("ascii=True")
+
+        return f"StrTest({', '.join(args)})"
+
+    def test(self, token: str) -> bool:
+        """
+        Runs the test on a token (which doesn't match if it's not a string)
+        """
+
+        if not isinstance(token, str):
+            return False
+
+        if self.ascii and not _isascii(token):
+            return False
+
+        return all(getattr(token, m)() for m in self.methods)
+
+    def match(self, token: str) -> Iterator[str]:
+        if self.test(token):
+            yield token
+
+    def as_regex(self) -> Optional[Text]:
+        if self.ascii:
+            return _char_class(c for c in map(chr, range(128)) if self.test(c))
+        elif len(self.methods) == 1:
+            return self.REGEX.get(self.methods[0])
+
+    def mask(self, values: Any) -> Optional[Any]:
+        import numpy as np
+
+        if values.dtype.kind != "U":
+            return None
+
+        tests = [getattr(np.char, m, None) for m in self.methods]
+
+        if not all(tests):
+            return None
+
+        out = np.ones(values.shape, dtype=np.bool_)
+
+        for test in tests:
+            out &= test(values)
+
+        if self.ascii:
+            chars = np.ascontiguousarray(values).view(np.uint32)
+            out &= (chars.reshape(len(values), -1) < 128).all(axis=1)
+
+        return out
+
+    def signature(self) -> Optional[Hashable]:
+        return StrTest, self.methods, self.ascii
+
 
 class Not(Matcher[Tok, Out]):
     """
@@ -141,6 +699,8 @@ class Not(Matcher[Tok, Out]):
     as-is.
     """
 
+    transparent = True
+
     def __init__(self, matcher: Union[Matcher, "Final"]):
         from .ast import Final
 
@@ -160,18 +720,230 @@ class Not(Matcher[Tok, Out]):
         if not found:
             yield token
 
+    def as_regex(self) -> Optional[Text]:
+        inner = self.matcher.as_regex()
+
+        if inner is not None:
+            return f"(?:(?!{inner})(?s:.))"
+
+    def mask(self, values: Any) -> Optional[Any]:
+        inner = self.matcher.mask(values)
+
+        if inner is not None:
+            return ~inner
+
+    def signature(self) -> Optional[Hashable]:
+        inner = self.matcher.signature()
+
+        if inner is not None:
+            return Not, inner
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    """
+    Statistics of a :py:class:`Cached` matcher
+    """
+
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class Cached(Matcher[Tok, Out]):
+    """
+    Remembers the outputs of another matcher for the last tokens it has
+    seen, which is useful when the matcher is expensive (like a model lookup)
+    and the same tokens keep coming back from one call to the other. The
+    cache is shared by all the expressions using this matcher and it can be
+    used from several threads at once.
+
+    >>> is_known = Cached(Test(lambda t: t in {"hello", "world"}), maxsize=1000)
+    >>> assert list(is_known.match("hello")) == ["hello"]
+    >>> assert list(is_known.match("hello")) == ["hello"]
+    >>> assert is_known.cache_info().hits == 1
+
+    Notes
+    -----
+    The least recently used tokens are evicted first. Tokens are identified
+    by the result of the :code:`key` function, or by themselves if there is
+    no key function. Tokens that can't be identified (the key isn't hashable)
+    aren't cached and always go to the matcher.
+
+    The wrapped matcher is called outside of the lock, so two threads can
+    evaluate the same token at the same time, but slow matchers don't block
+    each other.
+
+    If the wrapped matcher can be indexed (see :py:meth:`Matcher.index_keys`),
+    like :py:class:`Eq` or :py:class:`In`, the engines look the tokens up in
+    the index directly and the cache is skipped: a dictionary lookup is
+    already as cheap as the cache would be.
+
+    Parameters
+    ----------
+    matcher
+        Matcher to cache
+    maxsize
+        Maximum number of tokens to remember (no limit if None)
+    ttl
+        Number of seconds after which a result expires (never if None)
+    key
+        Function which generates the cache key of a token
+    """
+
+    def __init__(
+        self,
+        matcher: Union[Matcher, "Final"],
+        maxsize: Optional[int] = 1024,
+        ttl: Optional[float] = None,
+        key: Optional[Callable[[Tok], Hashable]] = None,
+    ):
+        from .ast import Final
+
+        if isinstance(matcher, Final):
+            self.matcher: Matcher[Tok, Out] = matcher.statement
+        elif isinstance(matcher, Matcher):
+            self.matcher: Matcher[Tok, Out] = matcher
+        else:
+            raise ValueError("Cannot cache this")
+
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError("The maximum size must be positive")
+
+        self.transparent = self.matcher.transparent
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key
+        self._init_cache()
+
+    def _init_cache(self) -> None:
+        """
+        Creates an empty cache
+        """
+
+        self._lock = Lock()
+        self._cache: Dict[Hashable, Tuple[Tuple[Out, ...], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+
+        for name in ["_lock", "_cache", "hits", "misses"]:
+            del state[name]
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_cache()
+
+    def __repr__(self):
+        return f"Cached({self.matcher!r}, maxsize={self.maxsize!r}, ttl={self.ttl!r})"
+
+    def _lookup(self, token: Tok) -> Tuple[Out, ...]:
+        """
+        Outputs of the matcher for this token, from the cache if possible
+        """
+
+        try:
+            key = token if self.key is None else self.key(token)
+            # Equal values of different types (like 1 and True) must not share
+            # their outputs
+            key = (type(key), key)
+            hash(key)
+        except TypeError:
+            with self._lock:
+                self.misses += 1
+
+            return tuple(self.matcher.match(token))
+
+        now = monotonic()
+
+        with self._lock:
+            found = self._cache.get(key)
+
+            if found is not None and (self.ttl is None or found[1] > now):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return found[0]
+
+        outputs = tuple(self.matcher.match(token))
+        expires = now + self.ttl if self.ttl is not None else 0.0
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (outputs, expires)
+            self._cache.move_to_end(key)
+
+            while self.maxsize is not None and len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+        return outputs
+
+    def match(self, token: Tok) -> Iterator[Out]:
+        yield from self._lookup(token)
+
+    def index_keys(self) -> Optional[Tuple[Selector, Iterable[Hashable]]]:
+        return self.matcher.index_keys()
+
+    def as_regex(self) -> Optional[Text]:
+        return self.matcher.as_regex()
+
+    def mask(self, values: Any) -> Optional[Any]:
+        return self.matcher.mask(values)
+
+    def signature(self) -> Optional[Hashable]:
+        inner = self.matcher.signature()
+
+        if inner is not None:
+            return Cached, inner
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Current statistics of the cache
+        """
+
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=self.maxsize,
+                currsize=len(self._cache),
+            )
+
+    def cache_clear(self) -> None:
+        """
+        Empties the cache and resets the statistics
+        """
+
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
 
 __all__ = [
     "Tok",
     "Out",
     "Matcher",
+    "Selector",
+    "TokenSelector",
+    "KeySelector",
+    "AttributeSelector",
+    "FunctionSelector",
     "Eq",
     "In",
     "OutOf",
     "AttributeHasValue",
     "KeyHasValue",
+    "FunctionHasValue",
     "Anything",
     "ChrRanges",
     "Test",
+    "StrTest",
     "Not",
+    "Cached",
+    "CacheInfo",
 ]
@@ -0,0 +1,292 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+from .automaton import INITIAL, NO_TERMINAL, Automaton
+from .matchers import Out, Tok
+
+# Neighbours of a state: list of (state, data index) pairs
+Neighbours = Callable[[int], Iterable[Tuple[int, int]]]
+
+# Signature of the initial state, which can't be merged with anything
+_INITIAL = object()
+
+
+@dataclass(frozen=True)
+class Reduction:
+    """
+    Size of the automaton before and after :py:func:`minimize`
+    """
+
+    states_before: int
+    states_after: int
+    edges_before: int
+    edges_after: int
+
+    def __str__(self):
+        return (
+            f"states: {self.states_before} -> {self.states_after}, "
+            f"edges: {self.edges_before} -> {self.edges_after}"
+        )
+
+
+def count_edges(automaton: Automaton) -> int:
+    """
+    Number of edges of the automaton (edges to the terminal node included)
+
+    Parameters
+    ----------
+    automaton
+        Automaton to inspect
+    """
+
+    return sum(len(s) for s in automaton.successors) + sum(
+        1 for t in automaton.terminal if t != NO_TERMINAL
+    )
+
+
+def _state_keys(automaton: Automaton) -> List[Hashable]:
+    """
+    Initial partition of the states: states can only be merged if their
+    matchers are equivalent (see :py:meth:`nsre.matchers.Matcher.signature`)
+    and if they have the same edge to the terminal node.
+    """
+
+    keys = []
+
+    for state, matcher in enumerate(automaton.matchers):
+        if state == INITIAL:
+            signature = _INITIAL
+        else:
+            signature = matcher.signature()
+
+            if signature is None:
+                signature = id(matcher)
+
+        keys.append((signature, automaton.terminal[state]))
+
+    return keys
+
+
+def _refine(keys: Sequence[Hashable], neighbours: Neighbours) -> List[int]:
+    """
+    Partition refinement: starting from the initial partition given by the
+    keys, splits the classes until all the states of a class have the same
+    neighbours (in terms of classes and edge data). Returns the class of
+    each state.
+
+    Parameters
+    ----------
+    keys
+        Initial key of each state
+    neighbours
+        Gives the neighbours of a state
+    """
+
+    ids: Dict[Hashable, int] = {}
+    classes = [ids.setdefault(k, len(ids)) for k in keys]
+    count = len(ids)
+
+    while True:
+        ids = {}
+        classes = [
+            ids.setdefault(
+                (classes[s], frozenset((classes[n], d) for n, d in neighbours(s))),
+                len(ids),
+            )
+            for s in range(len(keys))
+        ]
+
+        if len(ids) == count:
+            return classes
+
+        count = len(ids)
+
+
+def _quotient(automaton: Automaton, classes: Sequence[int]) -> Automaton:
+    """
+    Merges the states that belong to the same class. The initial state must
+    be alone in its class. States are re-numbered in breadth-first order and
+    the states that can't be reached from the initial state are dropped.
+
+    Parameters
+    ----------
+    automaton
+        Automaton to reduce
+    classes
+        Class of each state
+    """
+
+    members: Dict[int, List[int]] = {}
+
+    for state, c in enumerate(classes):
+        members.setdefault(c, []).append(state)
+
+    index = {classes[INITIAL]: INITIAL}
+    order = [classes[INITIAL]]
+    successors = []
+    edges = []
+    terminal = []
+    i = 0
+
+    while i < len(order):
+        c = order[i]
+        seen = set()
+        succ = []
+        edge = []
+
+        for state in members[c]:
+            for s, d in zip(automaton.successors[state], automaton.edges[state]):
+                target = classes[s]
+
+                if (target, d) in seen:
+                    continue
+
+                seen.add((target, d))
+
+                if target not in index:
+                    index[target] = len(order)
+                    order.append(target)
+
+                succ.append(index[target])
+                edge.append(d)
+
+        successors.append(tuple(succ))
+        edges.append(tuple(edge))
+        terminal.append(automaton.terminal[members[c][0]])
+        i += 1
+
+    return Automaton(
+        matchers=tuple(automaton.matchers[members[c][0]] for c in order),
+        successors=tuple(successors),
+        edges=tuple(edges),
+        terminal=tuple(terminal),
+        data=automaton.data,
+    )
+
+
+def _trim(automaton: Automaton) -> Automaton:
+    """
+    Removes the states which can't lead to the terminal node (the initial
+    state is always kept).
+
+    Parameters
+    ----------
+    automaton
+        Automaton to trim
+    """
+
+    predecessors: List[List[int]] = [[] for _ in automaton.matchers]
+
+    for state, successors in enumerate(automaton.successors):
+        for s in successors:
+            predecessors[s].append(state)
+
+    alive = {s for s, t in enumerate(automaton.terminal) if t != NO_TERMINAL}
+    todo = [*alive]
+
+    while todo:
+        for p in predecessors[todo.pop()]:
+            if p not in alive:
+                alive.add(p)
+                todo.append(p)
+
+    if len(alive | {INITIAL}) == len(automaton):
+        return automaton
+
+    successors = []
+    edges = []
+
+    for state in range(len(automaton)):
+        pairs = [
+            (s, d)
+            for s, d in zip(automaton.successors[state], automaton.edges[state])
+            if s in alive
+        ]
+        successors.append(tuple(s for s, _ in pairs))
+        edges.append(tuple(d for _, d in pairs))
+
+    pruned = Automaton(
+        matchers=automaton.matchers,
+        successors=tuple(successors),
+        edges=tuple(edges),
+        terminal=automaton.terminal,
+        data=automaton.data,
+    )
+
+    return _quotient(pruned, range(len(automaton)))
+
+
+def minimize(automaton: Automaton[Tok, Out]) -> Tuple[Automaton[Tok, Out], Reduction]:
+    """
+    Reduces the size of an automaton without changing what it matches nor
+    the captures it reports:
+
+    - States which can't be reached or which can't lead to the terminal node
+      are removed
+    - States with equivalent matchers and with the same outgoing edges (same
+      targets, same edge data, including the edge to the terminal node) are
+      merged, since whatever comes after them is the same
+    - States with equivalent matchers and with the same incoming edges are
+      merged, since they are always entered together
+
+    Both merges are repeated until nothing changes anymore. Returns the new
+    automaton and its size before and after.
+
+    >>> from nsre import *
+    >>> from nsre.automaton import Automaton
+    >>> from nsre.minimize import minimize
+    >>> from nsre.regexp import ast_to_graph
+    >>> a = Automaton.from_graph(ast_to_graph(seq("ab") | seq("cb")))
+    >>> small, reduction = minimize(a)
+    >>> print(reduction)
+    states: 5 -> 4, edges: 6 -> 5
+
+    Notes
+    -----
+    Edges only carry the capture markers and the counter operations, which
+    are kept as-is: the merged automaton can take exactly the same paths (in
+    terms of matchers and edge data) as the original one, which means that
+    the matches are the same.
+
+    Parameters
+    ----------
+    automaton
+        Automaton to minimize
+    """
+
+    states_before = len(automaton)
+    edges_before = count_edges(automaton)
+
+    current = _trim(_quotient(automaton, range(len(automaton))))
+
+    while True:
+        size = (len(current), count_edges(current))
+        keys = _state_keys(current)
+
+        forward = _refine(keys, lambda s: zip(current.successors[s], current.edges[s]))
+        current = _quotient(current, forward)
+
+        predecessors: List[List[Tuple[int, int]]] = [[] for _ in current.matchers]
+
+        for state in range(len(current)):
+            for s, d in zip(current.successors[state], current.edges[state]):
+                predecessors[s].append((state, d))
+
+        backward = _refine(_state_keys(current), lambda s: predecessors[s])
+        current = _quotient(current, backward)
+
+        if (len(current), count_edges(current)) == size:
+            break
+
+    return (
+        current,
+        Reduction(
+            states_before=states_before,
+            states_after=len(current),
+            edges_before=edges_before,
+            edges_after=count_edges(current),
+        ),
+    )
+
+
+__all__ = ["Reduction", "minimize", "count_edges"]
@@ -0,0 +1,419 @@
+from collections import defaultdict
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .ast import Capture
+from .automaton import INITIAL, NO_TERMINAL, Automaton, Counters, Dispatch
+from .match import _Match
+from .matchers import Out, Tok
+
+# Capture slots of a thread: start and stop position of each capture group,
+# flattened into a single tuple (-1 meaning "not set"), followed by the values
+# of the loop counters.
+Slots = Tuple[int, ...]
+
+# A thread is the state in which it is, its slots and its start position
+Thread = Tuple[int, Slots, int]
+
+# Pre-compiled version of an edge data: indices of the captures to stop, to
+# reset and to start.
+Ops = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+
+class PikeVM(Generic[Tok, Out]):
+    """
+    Alternative engine in the style of the Pike VM (see
+    `this article <https://swtch.com/~rsc/regexp/regexp2.html>`_). Instead of
+    keeping the full trail of each explorer, each thread only holds a small
+    vector of capture slots, so the memory of a thread is proportional to the
+    number of capture groups rather than to the length of the input.
+
+    Notes
+    -----
+    The capture markers found on the edges of the automaton are compiled into
+    slot-write instructions: stopping a group writes its stop position while
+    starting a group writes its start position. Starting a group also resets
+    the slots of all the groups nested inside of it, because only the last
+    occurrence of a group is reported and it must belong to the last
+    occurrence of its parent. The values of the loop counters (see
+    :py:class:`nsre.automaton.Counters`) are stored after the capture slots.
+
+    Since the trail is not stored, the outputs of the matchers are taken back
+    from the input sequence. This means that the engine can only be used when
+    all matchers are :code:`transparent` (see
+    :py:attr:`nsre.matchers.Matcher.transparent`), and that the input must
+    be a :code:`Sequence`.
+    """
+
+    def __init__(
+        self, automaton: Automaton[Tok, Out], dispatch: Optional[Dispatch] = None
+    ):
+        self.automaton = automaton
+        self.dispatch = dispatch or Dispatch(automaton)
+        self.counters = Counters(automaton)
+
+        parents = self._capture_parents(automaton)
+        self.captures: Tuple[Capture, ...] = tuple(parents)
+        index = {c: i for i, c in enumerate(self.captures)}
+
+        self.depth: Tuple[int, ...] = tuple(
+            self._depth(parents, c) for c in self.captures
+        )
+
+        children: Dict[Capture, List[Capture]] = defaultdict(list)
+
+        for capture, parent in parents.items():
+            if parent is not None:
+                children[parent].append(capture)
+
+        descendants = []
+
+        for capture in self.captures:
+            found = []
+            todo = [*children[capture]]
+
+            while todo:
+                c = todo.pop()
+                found.append(index[c])
+                todo.extend(children[c])
+
+            descendants.append(tuple(found))
+
+        self.ops: Tuple[Optional[Ops], ...] = tuple(
+            (
+                (
+                    tuple(index[c] for c in data.stop_captures),
+                    tuple(
+                        x for c in data.start_captures for x in descendants[index[c]]
+                    ),
+                    tuple(index[c] for c in data.start_captures),
+                )
+                if data
+                else None
+            )
+            for data in automaton.data
+        )
+
+        self.width = 2 * len(self.captures)
+        self.empty: Slots = (-1,) * self.width + self.counters.empty
+
+    @staticmethod
+    def supports(automaton: Automaton) -> bool:
+        """
+        Indicates if the engine can run this automaton (aka if all matchers
+        are transparent).
+
+        Parameters
+        ----------
+        automaton
+            Automaton to check
+        """
+
+        return all(m.transparent for m in automaton.matchers[1:])
+
+    @staticmethod
+    def _capture_parents(
+        automaton: Automaton[Tok, Out],
+    ) -> Dict[Capture, Optional[Capture]]:
+        """
+        Walks the automaton while maintaining the stack of open capture groups
+        in order to find out which group is nested inside of which. Captures
+        are returned in the order in which they are discovered.
+
+        Parameters
+        ----------
+        automaton
+            Automaton to inspect
+        """
+
+        stacks: Dict[int, Tuple[Capture, ...]] = {INITIAL: tuple()}
+        parents: Dict[Capture, Optional[Capture]] = {}
+
+        if not any(data.start_captures for data in automaton.data):
+            return parents
+        queue = [INITIAL]
+        i = 0
+
+        while i < len(queue):
+            state = queue[i]
+            i += 1
+
+            for s, d in zip(automaton.successors[state], automaton.edges[state]):
+                data = automaton.data[d]
+                stack = [*stacks[state]]
+
+                for c in data.stop_captures:
+                    if c in stack:
+                        stack.remove(c)
+
+                for c in data.start_captures:
+                    parents.setdefault(c, stack[-1] if stack else None)
+                    stack.append(c)
+
+                if s not in stacks:
+                    stacks[s] = tuple(stack)
+                    queue.append(s)
+
+        return parents
+
+    @staticmethod
+    def _depth(parents: Dict[Capture, Optional[Capture]], capture: Capture) -> int:
+        """
+        Nesting depth of a capture group
+        """
+
+        depth = 0
+
+        while parents[capture] is not None:
+            capture = parents[capture]
+            depth += 1
+
+        return depth
+
+    def _apply(self, slots: Slots, data: int, pos: int) -> Optional[Slots]:
+        """
+        Executes the slot-write instructions and the counter operations of an
+        edge. Returns :code:`None` if the counters forbid to cross the edge.
+
+        Parameters
+        ----------
+        slots
+            Current slots of the thread
+        data
+            Data index of the edge
+        pos
+            Position of the token being consumed
+        """
+
+        width = self.width
+        counters = self.counters.apply(slots[width:], data)
+
+        if counters is None:
+            return None
+
+        return (*self._write(slots[:width], data, pos), *counters)
+
+    def _write(self, captures: Slots, data: int, pos: int) -> Slots:
+        """
+        Executes the slot-write instructions of an edge on the capture slots
+        alone (without the loop counters)
+
+        Parameters
+        ----------
+        captures
+            Current capture slots of the thread
+        data
+            Data index of the edge
+        pos
+            Position of the token being consumed
+        """
+
+        stops, resets, starts = self.ops[data]
+        out = [*captures]
+
+        for c in stops:
+            out[2 * c + 1] = pos
+
+        for c in resets:
+            out[2 * c] = -1
+            out[2 * c + 1] = -1
+
+        for c in starts:
+            out[2 * c] = pos
+            out[2 * c + 1] = -1
+
+        return tuple(out)
+
+    def initial(self, pos: int) -> Thread:
+        """
+        Creates a thread which starts matching at the given position
+
+        Parameters
+        ----------
+        pos
+            Position of the next token in the input
+        """
+
+        return INITIAL, self.empty, pos
+
+    def step(
+        self,
+        threads: List[Thread],
+        token: Tok,
+        pos: int,
+        cache: Optional[Dict[Any, Any]] = None,
+    ) -> List[Thread]:
+        """
+        Advances all threads with the given token. Threads which end up in
+        the same state with the same slots are merged. Each matcher is only
+        evaluated once, even if it's reached by several threads.
+
+        Parameters
+        ----------
+        threads
+            Current threads
+        token
+            Consumed token
+        pos
+            Position of the token in the input
+        cache
+            Dispatch cache to use (see
+            :py:class:`nsre.automaton.TokenTable`), a new one by default
+        """
+
+        targets = self.dispatch.targets
+        ops = self.ops
+
+        seen: Set[Thread] = set()
+        new_threads = []
+
+        if cache is None:
+            cache = {}
+
+        for state, slots, start in threads:
+            for s, d, _ in targets(state, token, cache):
+                if ops[d] is None:
+                    thread = (s, slots, start)
+                else:
+                    new_slots = self._apply(slots, d, pos)
+
+                    if new_slots is None:
+                        continue
+
+                    thread = (s, new_slots, start)
+
+                if thread not in seen:
+                    seen.add(thread)
+                    new_threads.append(thread)
+
+        return new_threads
+
+    def replay(self, data: Iterable[int], start: int) -> Slots:
+        """
+        Capture slots of a thread which started at the given position and
+        went through these edges, without the loop counters. It's how the
+        explorers get the same de-duplication key as the threads of this
+        engine (see :py:meth:`nsre.regexp.ExplorerEngine.terminal`).
+
+        Parameters
+        ----------
+        data
+            Data index of each edge that was taken, in order
+        start
+            Position at which the thread started
+        """
+
+        slots = self.empty[: self.width]
+
+        for pos, d in enumerate(data, start):
+            if self.ops[d] is not None:
+                slots = self._write(slots, d, pos)
+
+        return slots
+
+    def terminal(self, threads: List[Thread]) -> Iterator[Thread]:
+        """
+        Emits the distinct threads which can terminate. Threads which
+        reached the same capture slots from the same start give the same
+        match, so only the first one is kept.
+
+        Parameters
+        ----------
+        threads
+            Current threads
+        """
+
+        terminal = self.automaton.terminal
+        width = self.width
+        seen: Set[Tuple[Slots, int]] = set()
+
+        for state, slots, start in threads:
+            data = terminal[state]
+
+            if data == NO_TERMINAL:
+                continue
+
+            if self.counters.apply(slots[width:], data) is None:
+                continue
+
+            if (slots[:width], start) not in seen:
+                seen.add((slots[:width], start))
+                yield state, slots, start
+
+    @staticmethod
+    def state(thread: Thread) -> int:
+        """
+        State of the automaton in which the thread is
+        """
+
+        return thread[0]
+
+    def config(self, thread: Thread) -> Tuple[int, Slots]:
+        """
+        Everything that determines what the thread can still match: its
+        state and its loop counters
+        """
+
+        return thread[0], thread[1][self.width :]
+
+    @staticmethod
+    def start(thread: Thread) -> int:
+        """
+        Position at which the thread started
+        """
+
+        return thread[2]
+
+    def make_match(self, thread: Thread, seq: Sequence[Tok], end: int) -> _Match[Out]:
+        """
+        Re-builds the match corresponding to the slots of a thread, by
+        replaying the starts and stops of capture groups along the input.
+
+        Parameters
+        ----------
+        thread
+            Thread that matched
+        seq
+            Sequence that was matched
+        end
+            Position at which the match ends
+        """
+
+        _, slots, first = thread
+        starts: Dict[int, List[int]] = defaultdict(list)
+        stops: Dict[int, List[int]] = defaultdict(list)
+
+        for c in range(len(self.captures)):
+            start, stop = slots[2 * c], slots[2 * c + 1]
+
+            if start >= 0:
+                starts[start].append(c)
+
+                if stop >= 0:
+                    stops[stop].append(c)
+
+        match = _Match(first)
+
+        for pos in range(first, end):
+            for c in sorted(stops.get(pos, []), key=lambda x: -self.depth[x]):
+                match.stop(self.captures[c])
+
+            for c in sorted(starts.get(pos, []), key=lambda x: self.depth[x]):
+                match.start(self.captures[c], pos)
+
+            match.append(seq[pos])
+
+        return match
+
+
+__all__ = ["PikeVM"]
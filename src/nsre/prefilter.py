@@ -0,0 +1,626 @@
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .ast import (
+    Alternation,
+    Capture,
+    Concatenation,
+    Final,
+    Gazetteer,
+    Maybe,
+    Node,
+    Repeat,
+)
+from .automaton import TokenTable
+from .matchers import Eq, Matcher, Selector, _hashable
+
+# Literal tokens
+Tokens = Tuple[Hashable, ...]
+
+
+@dataclass(frozen=True)
+class Literal:
+    """
+    Sequence of tokens that every match of an expression contains, found by
+    :py:func:`required_literal`
+
+    Attributes
+    ----------
+    tokens
+        Tokens of the literal (each of them is matched by an
+        :py:class:`nsre.matchers.Eq`)
+    min_offset
+        Minimum distance between the start of a match and the literal
+    max_offset
+        Maximum distance between the start of a match and the literal (None
+        if there is no limit)
+    """
+
+    tokens: Tokens
+    min_offset: int = 0
+    max_offset: Optional[int] = 0
+
+
+@dataclass(frozen=True)
+class _Info:
+    """
+    What is known about all the matches of a node
+
+    Attributes
+    ----------
+    min_len
+        Minimum length of a match
+    max_len
+        Maximum length of a match (None if there is no limit)
+    exact
+        If the node only ever matches one sequence of literal tokens, those
+        tokens
+    prefix
+        Literal tokens that all matches start with
+    suffix
+        Literal tokens that all matches end with
+    factors
+        Literals that all matches contain, with their offset from the start
+        of the node
+    """
+
+    min_len: int
+    max_len: Optional[int]
+    exact: Optional[Tokens] = None
+    prefix: Tokens = tuple()
+    suffix: Tokens = tuple()
+    factors: Tuple[Literal, ...] = field(default_factory=tuple)
+
+
+# Nothing known, except that the match can be of any length
+_UNKNOWN = _Info(min_len=0, max_len=None)
+
+
+def _add(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    """
+    Adds two maximum lengths, None meaning infinity
+    """
+
+    if a is None or b is None:
+        return None
+
+    return a + b
+
+
+def _shift(literal: Literal, min_shift: int, max_shift: Optional[int]) -> Literal:
+    """
+    Moves a literal further from the start
+    """
+
+    return Literal(
+        tokens=literal.tokens,
+        min_offset=literal.min_offset + min_shift,
+        max_offset=_add(literal.max_offset, max_shift),
+    )
+
+
+def _literal(tokens: Tokens) -> Tuple[Literal, ...]:
+    """
+    Literal at the start of a node, if there are tokens
+    """
+
+    if tokens:
+        return (Literal(tokens=tokens),)
+
+    return tuple()
+
+
+def _common_prefix(a: Tokens, b: Tokens) -> Tokens:
+    """
+    Longest common prefix of two sequences of tokens
+    """
+
+    out = []
+
+    for x, y in zip(a, b):
+        if type(x) is not type(y) or x != y:
+            break
+
+        out.append(x)
+
+    return tuple(out)
+
+
+def _final(node: Final) -> _Info:
+    matcher = node.statement
+
+    if type(matcher) is Eq and _hashable(matcher.ref):
+        tokens = (matcher.ref,)
+        return _Info(1, 1, tokens, tokens, tokens, _literal(tokens))
+
+    return _Info(1, 1)
+
+
+def _concatenation(node: Concatenation) -> _Info:
+    left = _analyze(node.left)
+    right = _analyze(node.right)
+
+    factors = [
+        *left.factors,
+        *(_shift(f, left.min_len, left.max_len) for f in right.factors),
+    ]
+
+    junction = left.suffix + right.prefix
+
+    if junction:
+        start = len(left.suffix)
+        factors.append(
+            Literal(
+                tokens=junction,
+                min_offset=left.min_len - start,
+                max_offset=_add(left.max_len, -start),
+            )
+        )
+
+    exact = None
+
+    if left.exact is not None and right.exact is not None:
+        exact = left.exact + right.exact
+
+    return _Info(
+        min_len=left.min_len + right.min_len,
+        max_len=_add(left.max_len, right.max_len),
+        exact=exact,
+        prefix=left.exact + right.prefix if left.exact is not None else left.prefix,
+        suffix=left.suffix + right.exact if right.exact is not None else right.suffix,
+        factors=tuple(factors),
+    )
+
+
+def _alternation(node: Alternation) -> _Info:
+    left = _analyze(node.left)
+    right = _analyze(node.right)
+
+    if left.exact is not None and left.exact == right.exact:
+        return left
+
+    factors = []
+
+    for a in left.factors:
+        for b in right.factors:
+            if a.tokens == b.tokens:
+                factors.append(
+                    Literal(
+                        tokens=a.tokens,
+                        min_offset=min(a.min_offset, b.min_offset),
+                        max_offset=(
+                            None
+                            if a.max_offset is None or b.max_offset is None
+                            else max(a.max_offset, b.max_offset)
+                        ),
+                    )
+                )
+
+    prefix = _common_prefix(left.prefix, right.prefix)
+    suffix = tuple(reversed(_common_prefix(left.suffix[::-1], right.suffix[::-1])))
+
+    return _Info(
+        min_len=min(left.min_len, right.min_len),
+        max_len=(
+            None
+            if left.max_len is None or right.max_len is None
+            else max(left.max_len, right.max_len)
+        ),
+        prefix=prefix,
+        suffix=suffix,
+        factors=(*factors, *_literal(prefix)),
+    )
+
+
+def _repeat(node: Repeat) -> _Info:
+    inner = _analyze(node.statement)
+    max_len = None
+
+    if node.max is not None and inner.max_len is not None:
+        max_len = inner.max_len * node.max
+
+    if node.min < 1:
+        return _Info(min_len=0, max_len=max_len)
+
+    exact = None
+
+    if inner.exact is not None and node.min == node.max:
+        exact = inner.exact * node.min
+
+    return _Info(
+        min_len=inner.min_len * node.min,
+        max_len=max_len,
+        exact=exact,
+        prefix=inner.prefix,
+        suffix=inner.suffix,
+        factors=inner.factors,
+    )
+
+
+def _analyze(node: Node) -> _Info:
+    """
+    Computes what is known about all the matches of a node
+    """
+
+    if isinstance(node, Final):
+        return _final(node)
+    elif isinstance(node, Concatenation):
+        return _concatenation(node)
+    elif isinstance(node, Alternation):
+        return _alternation(node)
+    elif isinstance(node, Capture):
+        return _analyze(node.statement)
+    elif isinstance(node, Repeat):
+        return _repeat(node)
+    elif isinstance(node, Maybe):
+        return _Info(min_len=0, max_len=_analyze(node.statement).max_len)
+    elif isinstance(node, Gazetteer):
+        return _Info(min_len=node.phrases.min_len or 0, max_len=node.phrases.max_len)
+
+    return _UNKNOWN
+
+
+def _score(literal: Literal) -> Tuple[int, int, int]:
+    """
+    Ranks the literals: the longest and the most precisely located first
+    """
+
+    spread = (
+        literal.max_offset - literal.min_offset
+        if literal.max_offset is not None
+        else 1 << 62
+    )
+
+    return len(literal.tokens), -spread, -literal.min_offset
+
+
+def required_literal(root: Node) -> Optional[Literal]:
+    """
+    Looks for a sequence of literal tokens (tokens matched by
+    :py:class:`nsre.matchers.Eq`) that all the matches of the expression
+    contain. Returns the longest one found, or None if there is none.
+
+    >>> from nsre import *
+    >>> lit = required_literal(seq("http") + Maybe(seq("s")) + seq("://"))
+    >>> assert lit == Literal(tokens=tuple("http"), min_offset=0, max_offset=0)
+    >>> lit = required_literal(anything() + seq("@") + anything())
+    >>> assert lit == Literal(tokens=("@",), min_offset=0, max_offset=None)
+
+    Notes
+    -----
+    The analysis is conservative: it only follows concatenations, captures
+    and repetitions of at least one occurrence. For an alternation, only the
+    literals found on both sides are kept.
+
+    Parameters
+    ----------
+    root
+        Root of the AST
+    """
+
+    try:
+        factors = _analyze(root).factors
+    except RecursionError:
+        # Very deep ASTs (like huge alternations) are simply not analyzed
+        return None
+
+    if not factors:
+        return None
+
+    return max(factors, key=_score)
+
+
+class Barrier:
+    """
+    Tells if a token is accepted by none of the matchers of an expression, in
+    which case no match can contain it. Indexable matchers (see
+    :py:meth:`nsre.matchers.Matcher.index_keys`) are looked up in a set,
+    the others are called.
+
+    When the tokens are interned (see :py:class:`nsre.automaton.TokenTable`),
+    the outputs of the called matchers are stored in the dispatch cache of
+    the token, so they're computed once per distinct value and the engine
+    doesn't compute them again when it reaches the token.
+
+    Parameters
+    ----------
+    matchers
+        Matchers of the expression
+    """
+
+    def __init__(self, matchers: Iterable[Optional[Matcher]]):
+        unique = {id(m): m for m in matchers if m is not None}
+        self.tables: Dict[Selector, Set[Hashable]] = {}
+        self.entries: Dict[Selector, List[Matcher]] = {}
+        self.scan: List[Matcher] = []
+
+        for matcher in unique.values():
+            keys = matcher.index_keys()
+
+            if keys is None:
+                self.scan.append(matcher)
+            else:
+                selector, values = keys
+                self.tables.setdefault(selector, set()).update(values)
+                self.entries.setdefault(selector, []).append(matcher)
+
+    def __call__(self, token: Any, cache: Optional[Dict[Any, Any]] = None) -> bool:
+        for selector, values in self.tables.items():
+            try:
+                if selector.select(token) in values:
+                    return False
+            except TypeError:
+                if _accepts(self.entries[selector], token, cache):
+                    return False
+
+        return not _accepts(self.scan, token, cache)
+
+
+def _accepts(
+    matchers: Iterable[Matcher], token: Any, cache: Optional[Dict[Any, Any]] = None
+) -> bool:
+    """
+    Indicates if one of the matchers accepts the token. If a dispatch cache
+    is given, the outputs of the matchers are looked up and stored in it.
+    """
+
+    if cache is None:
+        return any(True for m in matchers for _ in m.match(token))
+
+    for matcher in matchers:
+        outputs = cache.get(id(matcher))
+
+        if outputs is None:
+            outputs = cache[id(matcher)] = tuple(matcher.match(token))
+
+        if outputs:
+            return True
+
+    return False
+
+
+class Candidates:
+    """
+    Finds the positions of an input where a match could start, given the
+    literal that every match contains (see :py:func:`required_literal`). The
+    literal is searched with :code:`str.find` or :code:`bytes.find` when
+    possible, or with the :code:`index` method of the sequence.
+
+    Positions must be queried in increasing order.
+
+    Notes
+    -----
+    When the distance between the start of a match and the literal is
+    bounded (like :code:`"http"` at the start of a URL), only the positions
+    right before an occurrence of the literal can start a match.
+
+    When it's not (like the :code:`"@"` of an email address, which comes
+    after a user name of any length), the tokens between the start and the
+    literal must at least be accepted by one of the matchers of the
+    expression. Looking backwards from an occurrence of the literal, a match
+    can't start before the first token that isn't (see :py:class:`Barrier`),
+    which is typically the space before a word.
+
+    Parameters
+    ----------
+    seq
+        Input in which matches are searched
+    find
+        Returns the first occurrence of the literal at or after a position,
+        or None
+    literal
+        Literal that every match contains
+    barrier
+        Tells if no match can contain a token
+    table
+        Interned tokens of the input, if enabled
+    """
+
+    def __init__(
+        self,
+        seq: Sequence,
+        find: Callable[[int], Optional[int]],
+        literal: Literal,
+        barrier: Optional[Barrier] = None,
+        table: Optional[TokenTable] = None,
+    ):
+        self.seq = seq
+        self.find = find
+        self.min_offset = literal.min_offset
+        self.max_offset = literal.max_offset
+        self.barrier = barrier
+        self.table = table
+        self.occurrence: Optional[int] = None
+        self.exhausted = False
+
+        # Lowest position from which the last occurrence can be reached
+        # without crossing a barrier, and how far back it was checked
+        self.clear: Tuple[int, int, int] = (-1, 0, 0)
+
+    @classmethod
+    def create(
+        cls,
+        seq: Any,
+        literal: Literal,
+        barrier: Optional[Barrier] = None,
+        table: Optional[TokenTable] = None,
+    ) -> Optional["Candidates"]:
+        """
+        Creates the candidates finder for this input, if the literal can be
+        searched in this kind of input. Returns None otherwise.
+
+        Parameters
+        ----------
+        seq
+            Input in which matches are searched
+        literal
+            Literal that every match contains
+        barrier
+            Tells if no match can contain a token
+        table
+            Interned tokens of the input, if enabled
+        """
+
+        tokens = literal.tokens
+
+        if isinstance(seq, str):
+            if not all(isinstance(t, str) and len(t) == 1 for t in tokens):
+                return None
+
+            find = _find_in(seq, "".join(tokens))
+        elif isinstance(seq, (bytes, bytearray)):
+            if not all(type(t) is int and 0 <= t < 256 for t in tokens):
+                return None
+
+            find = _find_in(seq, bytes(tokens))
+        elif isinstance(seq, Sequence):
+            find = _find_tokens(seq, tokens)
+        else:
+            return None
+
+        return cls(seq, find, literal, barrier, table)
+
+    def _first(self, pos: int) -> Optional[int]:
+        """
+        First occurrence of the literal at or after this position. Since the
+        positions are increasing, the last occurrence found is still the
+        first one as long as it's not behind.
+        """
+
+        if self.exhausted:
+            return None
+
+        if self.occurrence is None or self.occurrence < pos:
+            self.occurrence = self.find(pos)
+            self.exhausted = self.occurrence is None
+
+        return self.occurrence
+
+    def _barrier(self, token: Any) -> bool:
+        """
+        Checks the barrier, with the cache of the token if it's interned
+        """
+
+        if self.table is None:
+            return self.barrier(token)
+
+        return self.barrier(token, self.table.cache(token))
+
+    def _reachable_from(self, occurrence: int, low: int) -> int:
+        """
+        Lowest position, not below :code:`low`, from which the occurrence can
+        be reached without crossing a barrier
+        """
+
+        found, checked, clear = self.clear
+
+        if found != occurrence:
+            found, checked, clear = occurrence, occurrence, occurrence
+
+        if low < checked:
+            i = checked - 1
+
+            while i >= low and not self._barrier(self.seq[i]):
+                i -= 1
+
+            checked = clear = i + 1
+
+        self.clear = (found, checked, clear)
+
+        return max(low, clear)
+
+    def next_start(self, pos: int) -> Optional[int]:
+        """
+        First position at or after this one where a match could start, or
+        None if there is none
+
+        Parameters
+        ----------
+        pos
+            Position from which to look
+        """
+
+        while True:
+            found = self._first(pos + self.min_offset)
+
+            if found is None:
+                return None
+
+            start = pos
+
+            if self.max_offset is not None:
+                start = max(start, found - self.max_offset)
+
+            if self.barrier is not None:
+                start = self._reachable_from(found, start)
+
+            if start + self.min_offset <= found:
+                return start
+
+            pos = start
+
+    def allows(self, pos: int) -> bool:
+        """
+        Indicates if a match could start at this position
+
+        Parameters
+        ----------
+        pos
+            Position to check
+        """
+
+        return self.next_start(pos) == pos
+
+
+def _find_in(seq: Any, needle: Any) -> Callable[[int], Optional[int]]:
+    """
+    Search function for strings and bytes
+    """
+
+    def find(pos: int) -> Optional[int]:
+        found = seq.find(needle, pos)
+        return found if found >= 0 else None
+
+    return find
+
+
+def _find_tokens(seq: Sequence, tokens: Tokens) -> Callable[[int], Optional[int]]:
+    """
+    Search function for other sequences, which looks for the first token with
+    the :code:`index` method of the sequence and then checks the others
+    """
+
+    first = tokens[0]
+    rest = tokens[1:]
+
+    def find(pos: int) -> Optional[int]:
+        end = len(seq) - len(rest)
+
+        while pos < end:
+            try:
+                pos = seq.index(first, pos, end)
+            except ValueError:
+                return None
+
+            if all(t == seq[pos + 1 + i] for i, t in enumerate(rest)):
+                return pos
+
+            pos += 1
+
+        return None
+
+    return find
+
+
+__all__ = ["Literal", "required_literal", "Barrier", "Candidates"]
@@ -1,9 +1,22 @@
 from dataclasses import dataclass
-from itertools import product
-from types import MappingProxyType
-from typing import Dict, Generic, Iterator, List, Mapping, Sequence, Text, Tuple
-
-import networkx as nx
+from itertools import islice, product
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Text,
+    Tuple,
+    Union,
+)
 
 # noinspection PyProtectedMember
 from .ast import (
@@ -12,15 +25,33 @@ from .ast import (
     Capture,
     Concatenation,
     Final,
+    Gazetteer,
     Maybe,
     Node,
+    Repeat,
     _Initial,
+    _Loop,
+    _Phrases,
     _Terminal,
+    factor_literals,
 )
+from .automaton import INITIAL, NO_TERMINAL, Automaton, Counters, Dispatch, TokenTable
+from .bitparallel import BitParallel
+from .dfa import DEFAULT_BUDGET, LazyDFA
+from .graph import Graph
+from .match import Match, MatchList, _Match
 from .matchers import Out, Tok
+from .minimize import Reduction
+from .minimize import minimize as minimize_automaton
+from .pike import PikeVM
+from .prefilter import Barrier, Candidates, Literal, required_literal
+from .translate import StdlibEngine
+from .vectorized import Vectorized, is_array
 
+MINIMIZE_TRIE_LIMIT = 10_000
 
-def ast_to_graph(root: Node) -> nx.DiGraph:
+
+def ast_to_graph(root: Node) -> Graph:
     """
     You will create your regular expression with a specific syntax which is
     transformed into an AST, however the regular expression engine expects
@@ -76,13 +107,22 @@ def ast_to_graph(root: Node) -> nx.DiGraph:
     order, of capture groups to start or stop. The capture should start right
     after the start and before the stop marker.
 
+    Similarly, counted loops generated by :py:class:`nsre.ast.Repeat` are
+    indicated with a "counters" list on the edges, which contains the
+    operations to apply on the loop counters in order ("enter", "loop" or
+    "exit" along with the :code:`_Loop` node which identifies the counter).
+
+    The result is a :py:class:`nsre.graph.Graph`, which can be converted with
+    :py:meth:`nsre.graph.Graph.to_networkx` for visualization.
+
     See Also
     --------
     _explore_concatenation, _explore_alternation, _explore_maybe,
-    _explore_any_number, _explore_capture
+    _explore_any_number, _explore_capture, _explore_repeat, _explore_loop,
+    _explore_gazetteer
     """
 
-    g = nx.DiGraph()
+    g = Graph()
     initial = _Initial()
     terminal = _Terminal()
 
@@ -108,6 +148,12 @@ def ast_to_graph(root: Node) -> nx.DiGraph:
                 _explore_any_number(explore, g, node)
             elif isinstance(node, Capture):
                 _explore_capture(explore, g, node)
+            elif isinstance(node, Repeat):
+                _explore_repeat(explore, g, node)
+            elif isinstance(node, _Loop):
+                _explore_loop(explore, g, node)
+            elif isinstance(node, Gazetteer):
+                _explore_gazetteer(g, node)
 
     return g
 
@@ -134,6 +180,93 @@ def _explore_capture(explore, g, node):
     g.remove_node(node)
 
 
+def _explore_repeat(explore, g, node):
+    """
+    Replaces the repetition by its expansion (see
+    :py:meth:`nsre.ast.Repeat.expand`). If the repetition loops on itself,
+    so does its expansion.
+    """
+
+    expanded = node.expand()
+    explore.add(expanded)
+    g.add_node(expanded)
+
+    for p in g.predecessors(node):
+        data = g.get_edge_data(p, node, default={})
+        g.add_edge(expanded if p == node else p, expanded, **data)
+
+    for s in g.successors(node):
+        if s != node:
+            data = g.get_edge_data(node, s, default={})
+            g.add_edge(expanded, s, **data)
+
+    g.remove_node(node)
+
+
+def _explore_loop(explore, g, node):
+    """
+    Counted loop over the child node:
+
+    - Incoming edges "enter" the loop, which sets the counter to 1
+    - The node loops on itself, which increments the counter as long as the
+      maximum is not reached
+    - Outgoing edges "exit" the loop, which is only possible once the counter
+      reached the minimum
+
+    The counters themselves are handled by the matching engines (see
+    :py:class:`nsre.automaton.Counters`).
+    """
+
+    explore.add(node.statement)
+    g.add_node(node.statement)
+
+    if node.max is None or node.max > 1:
+        g.add_edge(node.statement, node.statement, counters=[("loop", node)])
+
+    for p in g.predecessors(node):
+        data = g.get_edge_data(p, node, default={})
+        data["counters"] = [*data.get("counters", []), ("enter", node)]
+        g.add_edge(p, node.statement, **data)
+
+    for s in g.successors(node):
+        data = g.get_edge_data(node, s, default={})
+        data["counters"] = [("exit", node), *data.get("counters", [])]
+        g.add_edge(node.statement, s, **data)
+
+    g.remove_node(node)
+
+
+def _explore_gazetteer(g, node):
+    """
+    Replaces the gazetteer by a single :py:class:`nsre.ast.Final` node which
+    stands for all its phrases and keeps the incoming and outgoing edges. The
+    trie itself is only expanded into states once the automaton is built
+    (see :py:meth:`nsre.automaton.Automaton.expand`), which avoids creating
+    a graph node per node of the trie.
+
+    If the gazetteer contains the empty phrase, all incoming edges are also
+    connected to all outgoing edges. If it contains no other phrase, there
+    is nothing left to match so the node is simply removed.
+    """
+
+    if node.phrases.max_len:
+        phrases = Final(_Phrases(node))
+        g.add_node(phrases)
+
+        for p in [*g.predecessors(node)]:
+            data = g.get_edge_data(p, node, default={})
+            g.add_edge(phrases if p == node else p, phrases, **data)
+
+        for s in [*g.successors(node)]:
+            if s != node:
+                g.add_edge(phrases, s, **g.get_edge_data(node, s, default={}))
+
+    if 0 in node.phrases.ids:
+        _cross_connect(g, node)
+
+    g.remove_node(node)
+
+
 # noinspection DuplicatedCode
 def _explore_any_number(explore, g, node):
     """
@@ -196,7 +329,9 @@ def _cross_connect(g, node):
     There is a complicated logic with the capture flags in order to make sure
     that capture groups that are opened and closed at the same time don't
     actually stay (because they confuse the matching algorithm and they are
-    useless).
+    useless). Only the groups opened by the incoming edge and closed by the
+    outgoing edge are concerned: a group closed and then re-opened by the
+    outgoing edge (which happens when looping) must stay.
     """
 
     for p, s in product(g.predecessors(node), g.successors(node)):
@@ -211,19 +346,28 @@ def _cross_connect(g, node):
         if "stop_captures" in data1 and "stop_captures" in data2:
             merged["stop_captures"] = data1["stop_captures"] + data2["stop_captures"]
 
+        if "counters" in data1 and "counters" in data2:
+            merged["counters"] = data1["counters"] + data2["counters"]
+
         cancel = 0
-        start_captures = merged.get("start_captures", [])
-        stop_captures = merged.get("stop_captures", [])
+        opened = data1.get("start_captures", [])
+        closed = data2.get("stop_captures", [])
 
-        for start, stop in zip(start_captures, stop_captures):
+        for start, stop in zip(reversed(opened), closed):
             if start == stop:
                 cancel += 1
             else:
                 break
 
         if cancel:
-            merged["start_captures"] = start_captures[cancel:]
-            merged["stop_captures"] = stop_captures[:-cancel]
+            merged["start_captures"] = [
+                *opened[: len(opened) - cancel],
+                *data2.get("start_captures", []),
+            ]
+            merged["stop_captures"] = [
+                *data1.get("stop_captures", []),
+                *closed[cancel:],
+            ]
 
         g.add_edge(p, s, **merged)
 
@@ -281,236 +425,490 @@ def _explore_concatenation(explore, g, node):
     g.remove_node(node)
 
 
-@dataclass
-class _TrailItem(Generic[Out]):
+@dataclass(frozen=True, eq=False)
+class _Trail(Generic[Out]):
     """
-    Internal intermediate object that will represent a step in the matching
-    process along with the edge metadata.
+    Internal intermediate object that represents the trail of an explorer: all
+    the steps of the matching process along with the edge metadata.
 
     Let's just mention that the matched item is not the input token but the
-    output of the matcher for this token.
+    output of the matcher for this token. The edge metadata is the index of
+    the interned data in the automaton.
+
+    Notes
+    -----
+    This is a persistent linked list: each cell only holds the last step and
+    points to the trail of the parent explorer. When an explorer advances, it
+    only creates one cell on top of the parent's trail, so all explorers share
+    their common prefix and each step is O(1) instead of copying the whole
+    trail. The root of all trails is :code:`_EMPTY_TRAIL`.
     """
 
-    item: Out
-    data: Dict[Text, Sequence[Text]]
+    item: Optional[Out]
+    data: int
+    parent: Optional["_Trail[Out]"]
+    length: int
+
+    def push(self, item: Out, data: int) -> "_Trail[Out]":
+        """
+        Creates a new trail with one extra step
+
+        Parameters
+        ----------
+        item
+            Output of the matcher
+        data
+            Index of the edge data
+        """
+
+        return _Trail(item=item, data=data, parent=self, length=self.length + 1)
 
     @property
-    def _comparable(self):
+    def key(self) -> Tuple[int, Any, int]:
         """
-        Returns a signature tuple that can be used for comparison
+        Hashable key which identifies this trail, provided that its parent is
+        the canonical instance of its own trail (which is what
+        :py:meth:`ExplorerEngine._de_duplicate` ensures).
+
+        Unhashable items (like dictionaries matched by
+        :py:class:`nsre.matchers.KeyHasValue`) are identified by their ID. It
+        is safe to do so because the item is kept alive by the trail itself.
         """
 
-        return self.item, tuple(sorted(self.data.items()))
+        try:
+            hash(self.item)
+            item = (True, self.item)
+        except TypeError:
+            item = (False, id(self.item))
+
+        return id(self.parent), item, self.data
 
-    def __lt__(self, other):
+    def _cells(self) -> Iterator["_Trail[Out]"]:
         """
-        Sortability for de-duplication purposes
+        Iterates over the cells of the trail, from the newest to the oldest
         """
 
-        if not isinstance(other, _TrailItem):
-            raise TypeError
+        ptr = self
 
-        return self._comparable < other._comparable
+        while ptr.length:
+            yield ptr
+            ptr = ptr.parent
 
+    def __iter__(self) -> Iterator["_Trail[Out]"]:
+        """
+        Iterates over the steps of the trail in chronological order
+        """
 
-@dataclass(frozen=True)
-class Explorer(Generic[Tok, Out]):
-    """
-    An explorer is a pointer to a specific position in the graph, with a past
-    trail of previously visited nodes.
-    """
+        return reversed([*self._cells()])
 
-    re: "RegExp[Tok, Out]"
-    node: Node[Tok, Out]
-    trail: Tuple[_TrailItem[Out], ...]
+    def __len__(self):
+        return self.length
 
-    @property
-    def signature(self) -> Tuple[Node, Tuple[_TrailItem, ...]]:
+    def __eq__(self, other):
         """
-        Sortable signature for this explorer, used for de-duplication
+        Compares two trails without recursion. The comparison stops as soon
+        as the shared prefix is reached.
         """
 
-        return self.node, self.trail
+        if not isinstance(other, _Trail):
+            return NotImplemented
+
+        if self.length != other.length:
+            return False
+
+        a, b = self, other
 
-    def advance(self, token: Tok) -> Iterator["Explorer[Tok, Out]"]:
+        while a is not b and a.length:
+            if a.data != b.data or a.item != b.item:
+                return False
+
+            a, b = a.parent, b.parent
+
+        return True
+
+
+_EMPTY_TRAIL = _Trail(item=None, data=0, parent=None, length=0)
+
+
+@dataclass(frozen=True)
+class Explorer(Generic[Tok, Out]):
+    """
+    An explorer is a pointer to a specific state of the automaton, with a past
+    trail of previously visited nodes, the position of the input at which
+    it started and the values of the loop counters (see
+    :py:class:`nsre.automaton.Counters`).
+    """
+
+    re: "RegExp[Tok, Out]"
+    state: int
+    trail: _Trail[Out]
+    start: int = 0
+    counters: Tuple[int, ...] = tuple()
+
+    def advance(
+        self, token: Tok, cache: Optional[Dict[Any, Any]] = None
+    ) -> Iterator["Explorer[Tok, Out]"]:
         """
         Given the provided token, emits all the explorers that managed to
-        advance to another node.
+        advance to another state.
 
         Parameters
         ----------
         token
             Consumed token
+        cache
+            Cache of the dispatch index for this token (see
+            :py:meth:`nsre.automaton.Dispatch.targets`). When several
+            explorers share the same matcher (which happens a lot with
+            :py:class:`RegExpSet`), it is only evaluated once per token. The
+            cache is filled as matchers get evaluated.
         """
 
-        for s in self.re.graph.successors(self.node):
-            if not isinstance(s, Final):
-                continue
+        if cache is None:
+            cache = {}
 
-            for m in s.statement.match(token):
-                data = self.re.graph.get_edge_data(self.node, s, default={})
+        for s, data, outputs in self.re.dispatch.targets(self.state, token, cache):
+            counters = self.re.counters.apply(self.counters, data)
 
+            if counters is None:
+                continue
+
+            for m in outputs:
                 yield Explorer(
                     re=self.re,
-                    node=s,
-                    trail=self.trail + (_TrailItem(item=m, data=data),),
+                    state=s,
+                    trail=self.trail.push(m, data),
+                    start=self.start,
+                    counters=counters,
                 )
 
     def can_terminate(self) -> bool:
         """
-        Indicates if this explorer is connected to a _Terminal node, meaning
+        Indicates if this explorer is connected to the terminal node, meaning
         that if you were to stop the matching here it would mean that the
         expression matched.
         """
-        return self.re.graph.has_successor(self.node, _Terminal())
+
+        data = self.re.automaton.terminal[self.state]
+
+        return (
+            data != NO_TERMINAL
+            and self.re.counters.apply(self.counters, data) is not None
+        )
 
 
-class _Match(Generic[Out]):
+class ExplorerEngine(Generic[Tok, Out]):
     """
-    Internal sub-type that helps building the Match and MatchList objects
-    expected outside of `RegExp#match()`.
+    Generic matching engine, which works with any matcher and any iterable
+    because explorers keep the full trail of outputs.
+
+    Notes
+    -----
+    All engines expose the same interface, which is used by
+    :py:class:`RegExp` to drive them. Each engine works with "threads" (here,
+    explorers) that it knows how to create, advance, de-duplicate and
+    eventually transform into matches.
     """
 
-    def __init__(self, start_pos: int):
-        self.start_pos = start_pos
-        self.children: Dict[Text, List[_Match]] = {}
-        self.trail: List[Out] = []
-        self._stack: List[Capture] = []
+    def __init__(self, re: "RegExp[Tok, Out]"):
+        self.re = re
 
-    def _deep_get(self, keys: Sequence[Capture]) -> "_Match":
+    def initial(self, pos: int) -> Explorer[Tok, Out]:
         """
-        Gets a child following a path of keys. At each level, gets the last
-        child in the list as it is the one that we're going to want to deal
-        with.
+        Creates an explorer which starts matching at the given position
 
         Parameters
         ----------
-        keys
-            Successive name of keys to follow
+        pos
+            Position of the next token in the input
         """
 
-        ptr = self
+        return Explorer(self.re, INITIAL, _EMPTY_TRAIL, pos, self.re.counters.empty)
+
+    def step(
+        self,
+        threads: List[Explorer[Tok, Out]],
+        token: Tok,
+        pos: int,
+        cache: Optional[Dict[Any, Any]] = None,
+    ) -> List[Explorer[Tok, Out]]:
+        """
+        Advances all explorers with the given token
+
+        Parameters
+        ----------
+        threads
+            Current explorers
+        token
+            Consumed token
+        pos
+            Position of the token in the input
+        cache
+            Dispatch cache to use (see
+            :py:class:`nsre.automaton.TokenTable`), a new one by default
+        """
 
-        for key in keys:
-            ptr = ptr.children[key.name][-1]
+        if cache is None:
+            cache = {}
 
-        return ptr
+        return list(
+            self._de_duplicate(ne for oe in threads for ne in oe.advance(token, cache))
+        )
 
-    def start(self, capture: Capture, pos: int) -> None:
+    def terminal(
+        self, threads: List[Explorer[Tok, Out]]
+    ) -> Iterator[Explorer[Tok, Out]]:
         """
-        Call this to indicate that you're starting a capture group
+        Emits the distinct explorers which can terminate
 
         Notes
         -----
-        This will append the name of the capture group to the capture stack
-        and will also make sure that there is a corresponding child Match for
-        this sequence of keys.
+        When the Pike VM can run the automaton, explorers are told apart the
+        same way as its threads: by their start and the capture slots that
+        their trail leads to (see :py:meth:`nsre.pike.PikeVM.replay`). Two
+        trails that only differ in a capture group which was overwritten
+        later give the same match, so they're reported once, whatever the
+        type of the input. Otherwise, explorers are distinct when their
+        trails are.
 
         Parameters
         ----------
-        capture
-            Name of the capturing group
-        pos
-            Starting index in the input sequence
+        threads
+            Current explorers
         """
 
-        stick = self._deep_get(self._stack)
+        explorers = self._de_duplicate(
+            (s for s in threads if s.can_terminate()), by_state=False
+        )
+        pike = self.re.pike
 
-        if capture not in stick.children:
-            stick.children[capture.name] = [_Match(pos)]
-        else:
-            stick.children[capture.name].append(_Match(pos))
+        if pike is None:
+            return explorers
 
-        self._stack.append(capture)
+        return self._by_slots(pike, explorers)
 
-    def stop(self, capture: Capture) -> None:
+    @staticmethod
+    def _by_slots(
+        pike: PikeVM[Tok, Out], explorers: Iterator[Explorer[Tok, Out]]
+    ) -> Iterator[Explorer[Tok, Out]]:
         """
-        Indicates that matching should stop (as opposed to start).
+        Keeps the first explorer for each start and capture slots
 
         Parameters
         ----------
-        capture
-            Name of the matching group to stop
+        pike
+            Pike VM which knows how to compute the slots
+        explorers
+            Explorers to de-duplicate
         """
 
-        if capture != self._stack[-1]:
-            raise ValueError("Trying to stop a match which is not started")
+        seen: Set[Tuple[int, Tuple[int, ...]]] = set()
 
-        self._stack = self._stack[0:-1]
+        for explorer in explorers:
+            data = (cell.data for cell in explorer.trail)
+            key = explorer.start, pike.replay(data, explorer.start)
 
-    def append(self, item: Out) -> None:
+            if key not in seen:
+                seen.add(key)
+                yield explorer
+
+    @staticmethod
+    def state(thread: Explorer[Tok, Out]) -> int:
+        """
+        State of the automaton in which the explorer is
         """
-        Appends the item at all level of trails for the current stack.
+
+        return thread.state
+
+    @staticmethod
+    def config(thread: Explorer[Tok, Out]) -> Tuple[int, Tuple[int, ...]]:
+        """
+        Everything that determines what the explorer can still match: its
+        state and its loop counters
+        """
+
+        return thread.state, thread.counters
+
+    @staticmethod
+    def start(thread: Explorer[Tok, Out]) -> int:
+        """
+        Position at which the explorer started
+        """
+
+        return thread.start
+
+    def make_match(
+        self, explorer: Explorer[Tok, Out], seq: Optional[Sequence[Tok]], end: int
+    ) -> _Match[Out]:
+        """
+        Transforms an explorer into a Match object using its trail. This is
+        only done for explorers that terminate, which is the only moment when
+        the trail needs to be unfolded.
 
         Parameters
         ----------
-        item
-            Matched item to be added to trails
+        explorer
+            Explorer that you want to transform
+        seq
+            Matched sequence (unused, the trail contains everything)
+        end
+            Position at which the match ends (unused as well)
         """
 
-        self.trail.append(item)
-        ptr = self
+        match = _Match(explorer.start)
 
-        for key in self._stack:
-            ptr = ptr.children[key.name][-1]
-            ptr.trail.append(item)
+        for i, token in enumerate(explorer.trail, explorer.start):
+            data = self.re.automaton.data[token.data]
 
-    def as_match(self, join_trails: bool = False) -> "Match":
+            for stop in data.stop_captures:
+                match.stop(stop)
+
+            for start in data.start_captures:
+                match.start(start, i)
+
+            match.append(token.item)
+
+        return match
+
+    def _de_duplicate(
+        self, stack: Iterator[Explorer[Tok, Out]], by_state: bool = True
+    ) -> Iterator[Explorer[Tok, Out]]:
         """
-        Converts this into a real read-only match object.
+        As there is potentially several paths that lead to the same result, we
+        merge for each node all identical trails. Without this the number of
+        results becomes completely crazy (on top of being useless and
+        confusing)
+
+        Notes
+        -----
+        Rather than sorting the explorers and comparing whole trails, each
+        trail is interned: trails which have the same (interned) parent and
+        the same last step are replaced by a single canonical trail. Since
+        this happens at every step, by induction two explorers have the same
+        trail if and only if they point to the same trail object, so the
+        de-duplication key is just a pair of integers which is computed once
+        per explorer. Explorers are emitted in the order in which they were
+        received, which keeps the result deterministic.
 
         Parameters
         ----------
-        join_trails
-            If set to true then the items matched in the trail are expected to
-            be individual characters and they will be joined in a string
-            instead of being returned in an array
-        """
-
-        return Match(
-            start_pos=self.start_pos,
-            trail="".join(self.trail) if join_trails else tuple(self.trail),
-            children=MappingProxyType(
-                {
-                    k: MatchList(i.as_match(join_trails) for i in v)
-                    for k, v in self.children.items()
-                }
-            ),
-        )
+        stack
+            Explorers to de-duplicate
+        by_state
+            If true, explorers are identical when they have the same state,
+            the same loop counters and the same trail. Otherwise, only the
+            trail is considered.
+        """
 
+        cells: Dict[Tuple[int, Any, int], _Trail[Out]] = {}
+        seen: Set[Tuple[int, Tuple[int, ...], int]] = set()
 
-@dataclass(frozen=True)
-class Match(Generic[Out]):
+        for explorer in stack:
+            trail = explorer.trail
+            canon = cells.setdefault(trail.key, trail)
+
+            if canon is not trail:
+                explorer = Explorer(
+                    re=self.re,
+                    state=explorer.state,
+                    trail=canon,
+                    start=explorer.start,
+                    counters=explorer.counters,
+                )
+
+            if by_state:
+                key = (explorer.state, explorer.counters, id(canon))
+            else:
+                key = (0, (), id(canon))
+
+            if key not in seen:
+                seen.add(key)
+                yield explorer
+
+
+class StreamMatcher(Generic[Tok, Out]):
     """
-    Represents a match for a capture group in the regular expression.
+    Incremental version of :py:meth:`RegExp.match`, for tokens that arrive
+    one by one (possibly forever). Create it with :py:meth:`RegExp.matcher`.
+
+    The set of live explorers is kept between calls, which means that the
+    input itself is never buffered and that you can know as soon as a token
+    arrives that there is no hope of matching anymore.
+
+    >>> from nsre import *
+    >>> m = RegExp.from_ast(seq("foo")).matcher()
+    >>> assert m.feed("f")
+    >>> assert not m.finish()
+    >>> assert m.feed_many(iter("oo"))
+    >>> assert m.finish(join_trails=True)[0].trail == "foo"
+    >>> assert not m.feed("!")
     """
 
-    # Index of the first matching token
-    start_pos: int
+    def __init__(self, engine):
+        self.engine = engine
+        self.threads = [engine.initial(0)]
+        self.pos = 0
 
-    # Sub-groups that matched. As several groups could be matching, a list
-    # is returned so you can access each one of them.
-    children: Mapping[Text, List["Match"]]
+    def feed(self, token: Tok) -> bool:
+        """
+        Consumes one token. Returns the same thing as
+        :py:meth:`StreamMatcher.can_still_match`.
 
-    # Trail of matched items. It's the output of the matcher, not the input
-    # tokens.
-    trail: Sequence[Out]
+        Parameters
+        ----------
+        token
+            Next token of the input
+        """
 
-    def __getitem__(self, item):
-        return self.children[item][0]
+        if self.threads:
+            self.threads = self.engine.step(self.threads, token, self.pos)
 
+        self.pos += 1
 
-class MatchList(tuple, Generic[Out]):
-    """
-    List of matches. It's just a convenience around a tuple in order to
-    facilitate getting a specific group in the first item of the list.
-    """
+        return bool(self.threads)
 
-    def __getitem__(self, item) -> Match[Out]:
-        if isinstance(item, str):
-            return self[0][item]
-        else:
-            return super().__getitem__(item)
+    def feed_many(self, tokens: Iterable[Tok]) -> bool:
+        """
+        Consumes tokens from an iterable. The iteration stops as soon as the
+        expression can't match anymore, so it's safe to pass it an endless
+        generator.
+
+        Parameters
+        ----------
+        tokens
+            Next tokens of the input
+        """
+
+        for token in tokens:
+            if not self.feed(token):
+                return False
+
+        return self.can_still_match()
+
+    def can_still_match(self) -> bool:
+        """
+        Indicates if the tokens received so far could be the beginning of a
+        match. When it's false, you can stop feeding tokens.
+        """
+
+        return bool(self.threads)
+
+    def finish(self, join_trails: bool = False) -> MatchList[Match[Out]]:
+        """
+        Returns the matches as if the input stopped here, the same way
+        :py:meth:`RegExp.match` would do. This doesn't alter the state of the
+        matcher, so you can keep feeding it afterwards.
+
+        Parameters
+        ----------
+        join_trails
+            See :py:meth:`RegExp.match`
+        """
+
+        return MatchList(
+            self.engine.make_match(t, None, self.pos).as_match(join_trails=join_trails)
+            for t in self.engine.terminal(self.threads)
+        )
 
 
 class RegExp(Generic[Tok, Out]):
@@ -529,7 +927,17 @@ class RegExp(Generic[Tok, Out]):
     >>> assert m['domain'].trail == 'with-madrid.com'
     """
 
-    def __init__(self, graph: nx.DiGraph):
+    def __init__(
+        self,
+        graph: Optional[Graph],
+        automaton: Optional[Automaton] = None,
+        dfa: bool = False,
+        stdlib: Optional[StdlibEngine] = None,
+        minimize: bool = True,
+        intern: bool = False,
+        literal: Optional[Literal] = None,
+        dfa_budget: int = DEFAULT_BUDGET,
+    ):
         """
         Don't call me directly.
 
@@ -540,13 +948,95 @@ class RegExp(Generic[Tok, Out]):
         Parameters
         ----------
         graph
-            The regular expression's graph
+            The regular expression's graph. It is kept around for inspection
+            and debugging but the matching itself happens on the automaton, so
+            it can be omitted if the automaton is provided.
+        automaton
+            Compiled version of the graph. It will be generated from the graph
+            if not provided.
+        dfa
+            Enables the lazy DFA (see :py:class:`nsre.dfa.LazyDFA`), if the
+            automaton supports it.
+        stdlib
+            Translation of the expression for the :py:mod:`re` module, if
+            there is one (see :py:class:`nsre.translate.StdlibEngine`)
+        minimize
+            When the automaton is generated from the graph, reduces its size
+            (see :py:func:`nsre.minimize.minimize`). The sizes before and
+            after are then available in :code:`reduction`. Tries of up to
+            :code:`MINIMIZE_TRIE_LIMIT` nodes are expanded first, so that
+            their common suffixes get merged. Bigger ones are only expanded
+            afterwards (see :py:meth:`nsre.automaton.Automaton.expand`) and
+            each of them counts as a single state in :code:`reduction`.
+        intern
+            Interns the tokens of each input (see
+            :py:class:`nsre.automaton.TokenTable`)
+        literal
+            Literal that all matches contain, if there is one (see
+            :py:func:`nsre.prefilter.required_literal`). It allows
+            :py:meth:`RegExp.search` and :py:meth:`RegExp.finditer` to skip
+            the parts of the input where no match can start.
+        dfa_budget
+            Maximum number of transitions kept in the cache of the lazy DFA
+            (see :py:class:`nsre.dfa.LazyDFA`)
         """
 
         self.graph = graph
+        self.intern = intern
+        self.literal = literal
+        self.reduction: Optional[Reduction] = None
+
+        if automaton is None:
+            automaton = Automaton.from_graph(graph, expand=False)
+            trie_size = sum(
+                m.gazetteer.phrases.size
+                for m in automaton.matchers
+                if isinstance(m, _Phrases)
+            )
+
+            if minimize and trie_size <= MINIMIZE_TRIE_LIMIT:
+                automaton = automaton.expand()
+
+            if minimize:
+                automaton, self.reduction = minimize_automaton(automaton)
+
+            automaton = automaton.expand()
+
+        self.automaton: Automaton[Tok, Out] = automaton
+        self.dispatch: Dispatch[Tok, Out] = Dispatch(self.automaton)
+        self.counters = Counters(self.automaton)
+        self.explorers = ExplorerEngine(self)
+        self.pike: Optional[PikeVM[Tok, Out]] = (
+            PikeVM(self.automaton, self.dispatch)
+            if PikeVM.supports(self.automaton)
+            else None
+        )
+        self.bits: Optional[BitParallel[Tok, Out]] = (
+            BitParallel(self.automaton)
+            if BitParallel.supports(self.automaton)
+            else None
+        )
+        self.dfa: Optional[LazyDFA[Tok, Out]] = (
+            LazyDFA(self.automaton, self.dispatch, dfa_budget)
+            if dfa and LazyDFA.supports(self.automaton)
+            else None
+        )
+        self.stdlib = stdlib
+        self.barrier: Optional[Barrier] = (
+            Barrier(self.automaton.matchers) if literal is not None else None
+        )
+        self.vector: Optional[Vectorized[Tok, Out]] = (
+            Vectorized(self.automaton) if Vectorized.supports(self.automaton) else None
+        )
 
     @classmethod
-    def from_ast(cls, root: Node[Tok, Out]) -> "RegExp[Tok, Out]":
+    def from_ast(
+        cls,
+        root: Node[Tok, Out],
+        dfa: bool = False,
+        intern: bool = False,
+        dfa_budget: int = DEFAULT_BUDGET,
+    ) -> "RegExp[Tok, Out]":
         """
         Use this to generate your regular expression. To generate the AST,
         have a look at :py:mod:`nsre.ast` and :py:mod:`nsre.shortcuts` modules.
@@ -555,32 +1045,135 @@ class RegExp(Generic[Tok, Out]):
         ----------
         root
             Root node of your expression.
+        dfa
+            Enables the lazy DFA, which filters out the sequences that don't
+            match before running the matching engine. It's worth it when the
+            same tokens keep coming back (like when matching log lines) and
+            when most sequences don't match. Your matchers must always give
+            the same answer for the same token.
+        intern
+            Evaluates each matcher only once per distinct token value of the
+            input, instead of once per position (see
+            :py:class:`nsre.automaton.TokenTable`). It's worth it when the
+            matchers are costly (like :py:class:`nsre.matchers.Test` with a
+            slow predicate) and when the same values keep coming back in an
+            input (like words in a text). Like for the DFA, your matchers
+            must always give the same answer for the same token.
+        dfa_budget
+            Maximum number of transitions kept in the cache of the lazy DFA.
+            A bigger cache is flushed less often, at the cost of memory.
         """
 
-        return cls(graph=ast_to_graph(root.copy()))
+        return cls(
+            graph=ast_to_graph(factor_literals(root).copy()),
+            dfa=dfa,
+            stdlib=StdlibEngine.from_ast(root),
+            intern=intern,
+            literal=required_literal(root),
+            dfa_budget=dfa_budget,
+        )
 
-    def _make_match(self, explorer: Explorer[Tok, Out]) -> _Match[Out]:
+    def dump(self, fp: BinaryIO) -> None:
         """
-        Transforms an explorer into a Match object using its trail
+        Writes the compiled expression into a binary file, so that it can be
+        loaded back with :py:meth:`RegExp.load` without being compiled again
+        (see :py:mod:`nsre.serialize` for the format).
+
+        >>> from io import BytesIO
+        >>> from nsre import *
+        >>> buf = BytesIO()
+        >>> RegExp.from_ast(seq("ab")["x"]).dump(buf)
+        >>> assert RegExp.load(BytesIO(buf.getvalue())).match("ab")["x"]
+
+        Raises a ValueError if one of the matchers can't be serialized.
 
         Parameters
         ----------
-        explorer
-            Explorer that you want to transform
+        fp
+            File opened in binary mode
         """
 
-        match = _Match(0)
+        from .serialize import dumps
 
-        for i, token in enumerate(explorer.trail):
-            for stop in token.data.get("stop_captures", []):
-                match.stop(stop)
+        fp.write(
+            dumps(
+                self.automaton,
+                translation=self.stdlib.translation if self.stdlib else None,
+                dfa=self.dfa is not None,
+                literal=self.literal,
+                intern=self.intern,
+            )
+        )
 
-            for start in token.data.get("start_captures", []):
-                match.start(start, i)
+    @classmethod
+    def load(
+        cls,
+        fp: BinaryIO,
+        intern: Optional[bool] = None,
+        dfa_budget: int = DEFAULT_BUDGET,
+    ) -> "RegExp[Tok, Out]":
+        """
+        Loads an expression written by :py:meth:`RegExp.dump`. The graph is
+        not saved, so the :code:`graph` attribute of the loaded expression is
+        :code:`None`.
 
-            match.append(token.item)
+        Parameters
+        ----------
+        fp
+            File opened in binary mode
+        intern
+            See :py:meth:`RegExp.from_ast`. By default, the tokens are interned
+            if they were in the expression that was dumped.
+        dfa_budget
+            See :py:meth:`RegExp.from_ast`
+        """
 
-        return match
+        from .serialize import loads
+
+        automaton, translation, dfa, literal, interned = loads(fp.read())
+
+        return cls(
+            graph=None,
+            automaton=automaton,
+            dfa=dfa,
+            stdlib=StdlibEngine(translation) if translation else None,
+            intern=interned if intern is None else intern,
+            literal=literal,
+            dfa_budget=dfa_budget,
+        )
+
+    @property
+    def backend(self) -> Text:
+        """
+        Name of the engine that :py:meth:`RegExp.match` uses for strings. It
+        can be one of:
+
+        - :code:`"bits"` -- Bit-parallel engine (see
+          :py:class:`nsre.bitparallel.BitParallel`)
+        - :code:`"re"` -- The whole matching is delegated to the :py:mod:`re`
+          module (see :py:class:`nsre.translate.StdlibEngine`)
+        - :code:`"pike"` -- Pike VM (see :py:class:`nsre.pike.PikeVM`)
+        - :code:`"explorers"` -- Generic engine
+
+        When the sequences that don't match are rejected beforehand by the
+        lazy DFA or by the :py:mod:`re` module, the name of the engine is
+        prefixed by :code:`"dfa+"` or :code:`"re+"` (or both).
+        """
+
+        if self.bits is not None:
+            return "bits"
+
+        filters = ["dfa"] if self.dfa is not None else []
+
+        if self.stdlib is not None and self.stdlib.complete:
+            engine = "re"
+        else:
+            engine = "pike" if self.pike is not None else "explorers"
+
+            if self.stdlib is not None:
+                filters.append("re")
+
+        return "+".join([*filters, engine])
 
     def match(
         self, seq: Sequence[Tok], join_trails: bool = False
@@ -613,44 +1206,621 @@ class RegExp(Generic[Tok, Out]):
             them being character lists.
         """
 
-        stack: List[Explorer[Tok, Out]] = [Explorer(self, _Initial(), tuple())]
+        return MatchList(self.iter_matches(seq, join_trails=join_trails))
+
+    def iter_matches(
+        self, seq: Sequence[Tok], limit: Optional[int] = None, join_trails: bool = False
+    ) -> Iterator[Match[Out]]:
+        """
+        Lazy version of :py:meth:`RegExp.match`: the matches are yielded one
+        at a time and each of them is only built when it's consumed. This is
+        useful when there are many possible matches (with matchers that have
+        several outputs, like :py:class:`nsre.matchers.OutOf`) and only the
+        first ones are needed.
+
+        >>> from nsre import *
+        >>> re = RegExp.from_ast(AnyNumber(Final(OutOf("a")) | Final(OutOf("b"))))
+        >>> assert len(list(re.iter_matches(["ab", "ab", "ab"], limit=2))) == 2
+
+        Notes
+        -----
+        The whole sequence still has to be consumed before the first match
+        can be yielded, since a match must cover the whole sequence.
+
+        Parameters
+        ----------
+        seq
+            Sequence that you would like to test
+        limit
+            Maximum number of matches to yield (all of them if None)
+        join_trails
+            See :py:meth:`RegExp.match`
+        """
+
+        if limit is not None and limit <= 0:
+            return
+
+        if self.vector is not None and is_array(seq):
+            found = self.vector.accepts(seq)
+
+            if found is False:
+                return
+            elif found and self.vector.complete:
+                yield self.vector.make_match(seq).as_match(join_trails=join_trails)
+                return
+
+        if self.bits is not None and isinstance(seq, Sequence):
+            if self.bits.accepts(seq):
+                yield self.bits.make_match(seq).as_match(join_trails=join_trails)
+
+            return
+
+        if self.dfa is not None and isinstance(seq, Sequence):
+            if not self.dfa.accepts(seq):
+                return
+
+        if self.stdlib is not None and isinstance(seq, str):
+            found = self.stdlib.fullmatch(seq)
+
+            if found is None:
+                return
+
+            if self.stdlib.complete:
+                match = self.stdlib.make_match(seq, found)
+                yield match.as_match(join_trails=join_trails)
+                return
+
+        for match in islice(self._run(seq), limit):
+            yield match.as_match(join_trails=join_trails)
+
+    def count_matches(self, seq: Sequence[Tok]) -> int:
+        """
+        Counts the matches that :py:meth:`RegExp.match` would return,
+        without building them.
+
+        >>> from nsre import *
+        >>> re = RegExp.from_ast(AnyNumber(Final(OutOf("a")) | Final(OutOf("b"))))
+        >>> assert re.count_matches(["ab", "ab", "ab"]) == 8
+
+        Parameters
+        ----------
+        seq
+            Sequence that you would like to test
+        """
+
+        if self.vector is not None and is_array(seq):
+            found = self.vector.accepts(seq)
+
+            if found is not None and (not found or self.vector.complete):
+                return int(found)
+
+        if self.bits is not None and isinstance(seq, Sequence):
+            return int(self.bits.accepts(seq))
+
+        if self.dfa is not None and isinstance(seq, Sequence):
+            if not self.dfa.accepts(seq):
+                return 0
+
+        if self.stdlib is not None and isinstance(seq, str):
+            if self.stdlib.fullmatch(seq) is None:
+                return 0
+
+            if self.stdlib.complete:
+                return 1
+
+        engine = self._engine(seq)
+        threads, _ = self._advance(seq, engine, self._tokens())
+
+        return sum(1 for _ in engine.terminal(threads))
+
+    def test(self, seq: Iterable[Tok]) -> bool:
+        """
+        Indicates if the sequence matches the expression, without building
+        any match. This is much cheaper than :py:meth:`RegExp.match` when
+        only a yes/no answer is needed.
+
+        >>> from nsre import *
+        >>> re = RegExp.from_ast(seq("ab")["x"] + AnyNumber(Final(Eq("c"))))
+        >>> assert re.test("abccc")
+        >>> assert not re.test("abd")
+
+        Notes
+        -----
+        When possible, the answer comes from the vectorized engine (for NumPy
+        arrays), from the bit-parallel engine, from the lazy DFA or from the
+        :py:mod:`re` module. Otherwise, only the set of active states is
+        followed (along with the loop counters), without any trail or capture
+        data. In all cases, the iteration stops as soon as no state is active
+        anymore.
+
+        Parameters
+        ----------
+        seq
+            Sequence to test
+        """
+
+        if self.vector is not None and is_array(seq):
+            found = self.vector.accepts(seq)
+
+            if found is not None:
+                return found
+
+        if self.bits is not None and isinstance(seq, Sequence):
+            return self.bits.accepts(seq)
+        elif self.dfa is not None:
+            return self.dfa.accepts(seq)
+        elif self.stdlib is not None and isinstance(seq, str):
+            return self.stdlib.fullmatch(seq) is not None
+
+        if not self.counters:
+            return self._test_states(seq)
+
+        targets = self.dispatch.targets
+        counters = self.counters
+        terminal = self.automaton.terminal
+        tokens = self._tokens()
+        active = {(INITIAL, counters.empty)}
+
+        for token in seq:
+            cache = tokens.cache(token) if tokens is not None else {}
+            reached = set()
+
+            for state, values in active:
+                for s, d, _ in targets(state, token, cache):
+                    new_values = counters.apply(values, d)
+
+                    if new_values is not None:
+                        reached.add((s, new_values))
+
+            if not reached:
+                return False
+
+            active = reached
+
+        return any(
+            terminal[state] != NO_TERMINAL
+            and counters.apply(values, terminal[state]) is not None
+            for state, values in active
+        )
+
+    def _test_states(self, seq: Iterable[Tok]) -> bool:
+        """
+        Implementation of :py:meth:`RegExp.test` for automatons without loop
+        counters, where the set of active states is all there is to follow.
+        The next states are found through the dispatch tables (see
+        :py:meth:`nsre.automaton.Dispatch.targets`), so each matcher is still
+        evaluated at most once per token.
+
+        Parameters
+        ----------
+        seq
+            Sequence to test
+        """
+
+        targets = self.dispatch.targets
+        terminal = self.automaton.terminal
+        tokens = self._tokens()
+        active = {INITIAL}
 
         for token in seq:
-            stack = list(
-                self._de_duplicate(ne for oe in stack for ne in oe.advance(token))
-            )
+            cache = tokens.cache(token) if tokens is not None else {}
+            reached = set()
+
+            for state in active:
+                reached.update(s for s, _, _ in targets(state, token, cache))
+
+            if not reached:
+                return False
+
+            active = reached
+
+        return any(terminal[state] != NO_TERMINAL for state in active)
+
+    def matcher(self) -> StreamMatcher[Tok, Out]:
+        """
+        Creates a :py:class:`StreamMatcher`, which will match tokens as you
+        feed them instead of requiring the whole sequence at once.
+        """
+
+        return StreamMatcher(self.explorers)
+
+    def search(
+        self, seq: Sequence[Tok], join_trails: bool = False
+    ) -> MatchList[Match[Out]]:
+        """
+        Looks for the first (leftmost) place in the sequence where the
+        expression matches. Contrarily to :py:meth:`RegExp.match`, the
+        expression doesn't have to match the whole sequence.
+
+        Notes
+        -----
+        If several matches start at the leftmost position, the longest one is
+        selected. The returned list contains all the matches for this specific
+        position and length, and their :code:`start_pos` indicates where they
+        were found. If nothing is found, the returned list is empty.
+
+        Parameters
+        ----------
+        seq
+            Sequence in which to search
+        join_trails
+            See :py:meth:`RegExp.match`
+        """
+
+        for found in self.finditer(seq, join_trails=join_trails):
+            return found
+
+        return MatchList()
+
+    def finditer(
+        self, seq: Sequence[Tok], join_trails: bool = False, overlapping: bool = False
+    ) -> Iterator[MatchList[Match[Out]]]:
+        """
+        Finds all the places in the sequence where the expression matches, in
+        a single pass over the sequence. For each place, a list of matches is
+        yielded (like :py:meth:`RegExp.search` would return).
+
+        Notes
+        -----
+        By default, matches don't overlap: the leftmost-longest match is
+        reported and then the search resumes at the end of this match. With
+        :code:`overlapping` set to true, the longest match starting at each
+        position is reported, regardless of previous matches.
+
+        Like with the :py:mod:`re` module, empty matches are reported as well
+        if your expression can match an empty sequence.
+
+        When all the matches contain a known sequence of literal tokens (like
+        :code:`"@"` for an email address), the input is first searched for
+        this literal (with :code:`str.find` for strings) and the engine only
+        runs around the places where it's found.
+
+        Parameters
+        ----------
+        seq
+            Sequence in which to search
+        join_trails
+            See :py:meth:`RegExp.match`
+        overlapping
+            Report overlapping matches
+        """
+
+        for matches in self._scan(seq, overlapping):
+            yield MatchList(m.as_match(join_trails=join_trails) for m in matches)
 
-            if not stack:
+    def _engine(self, seq: Iterable[Tok]):
+        """
+        Picks the engine to use for this input. The Pike VM is preferred
+        whenever it can be used.
+
+        Parameters
+        ----------
+        seq
+            Input that is about to be matched
+        """
+
+        if self.pike is not None and isinstance(seq, Sequence):
+            return self.pike
+
+        return self.explorers
+
+    def _run(self, seq: Iterable[Tok], engine=None) -> Iterator[_Match[Out]]:
+        """
+        Runs an engine against the whole sequence and yields the matches.
+
+        Parameters
+        ----------
+        seq
+            Tokens to match
+        engine
+            Engine to use (by default, the one from :py:meth:`RegExp._engine`)
+        """
+
+        engine = engine or self._engine(seq)
+        threads, end = self._advance(seq, engine, self._tokens())
+
+        for thread in engine.terminal(threads):
+            yield engine.make_match(thread, seq, end)
+
+    def _tokens(self) -> Optional[TokenTable[Tok]]:
+        """
+        Creates the table of interned tokens for a new input, if enabled
+        """
+
+        if self.intern:
+            return TokenTable()
+
+        return None
+
+    @staticmethod
+    def _advance(
+        seq: Iterable[Tok], engine, tokens: Optional[TokenTable[Tok]] = None
+    ) -> Tuple[list, int]:
+        """
+        Feeds the whole sequence to an engine. Returns the remaining threads
+        (stopping early if there is none left) and the number of tokens
+        that were consumed.
+
+        Parameters
+        ----------
+        seq
+            Tokens to match
+        engine
+            Engine to use
+        tokens
+            Table of interned tokens, if any
+        """
+
+        threads = [engine.initial(0)]
+        end = 0
+
+        for pos, token in enumerate(seq):
+            cache = tokens.cache(token) if tokens is not None else None
+            threads = engine.step(threads, token, pos, cache)
+            end = pos + 1
+
+            if not threads:
                 break
 
-        terminal = list(
-            self._de_duplicate((s for s in stack if s.can_terminate()), key="trail")
+        return threads, end
+
+    def _scan(self, seq: Sequence[Tok], overlapping: bool) -> Iterator[List[_Match]]:
+        """
+        Implementation of :py:meth:`RegExp.finditer`. A new thread is seeded
+        at each position while the existing ones go on, so the sequence is
+        only walked once.
+
+        Notes
+        -----
+        For each start position, the longest end found so far is remembered
+        along with the threads that reached it. The leftmost start can be
+        reported as soon as no thread started at or before it is still alive,
+        because no other match could then start more on the left or extend
+        further.
+
+        When matches can't overlap, a thread which is in the same state (and
+        has the same loop counters) as a thread started earlier will never
+        win: whatever it matches, the earlier thread matches it as well and
+        any such match would overlap. Those threads are dropped, which bounds
+        the number of live threads. This is only done for the leftmost start
+        still in play: an earlier thread that could be discarded by a match
+        starting on its left can't stand for the later ones.
+
+        If the expression has a required literal, threads are only seeded at
+        the positions from which the literal can be reached (see
+        :py:class:`nsre.prefilter.Candidates`) and, when no thread is alive,
+        the scan jumps directly to the next such position.
+
+        Parameters
+        ----------
+        seq
+            Sequence in which to search
+        overlapping
+            Report overlapping matches
+        """
+
+        engine = self._engine(seq)
+        tokens = self._tokens()
+        candidates = (
+            Candidates.create(seq, self.literal, self.barrier, tokens)
+            if self.literal is not None
+            else None
         )
+        threads = []
+        found: Dict[int, Tuple[int, List]] = {}
+        floor = 0
 
-        return MatchList(
-            self._make_match(s).as_match(join_trails=join_trails) for s in terminal
+        def record(candidates, end):
+            for t in engine.terminal(candidates):
+                start = engine.start(t)
+                best = found.get(start)
+
+                if best is None or best[0] < end:
+                    found[start] = (end, [t])
+                elif best[0] == end:
+                    best[1].append(t)
+
+        def decide(final):
+            nonlocal threads, found, floor
+
+            while found:
+                live = {engine.start(t) for t in threads}
+                start = min(found)
+
+                if not final and live and min(live) <= start:
+                    return
+
+                stop, winners = found.pop(start)
+                yield [engine.make_match(t, seq, stop) for t in winners]
+
+                if not overlapping:
+                    floor = stop if stop > start else start + 1
+                    threads = [t for t in threads if engine.start(t) >= floor]
+                    found = {k: v for k, v in found.items() if k >= floor}
+
+        def positions():
+            if candidates is None:
+                yield from enumerate(seq)
+                return
+
+            i = 0
+
+            while i < len(seq):
+                if not threads:
+                    i = candidates.next_start(max(i, floor))
+
+                    if i is None:
+                        return
+
+                yield i, seq[i]
+                i += 1
+
+        pos = -1
+
+        for pos, token in positions():
+            if pos >= floor and (candidates is None or candidates.allows(pos)):
+                seed = engine.initial(pos)
+                record([seed], pos)
+                threads.append(seed)
+
+            cache = tokens.cache(token) if tokens is not None else None
+            threads = engine.step(threads, token, pos, cache)
+
+            if not overlapping:
+                first: Dict[Any, int] = {}
+
+                for t in threads:
+                    config, start = engine.config(t), engine.start(t)
+                    first[config] = min(first.get(config, start), start)
+
+                leftmost = min(first.values(), default=pos)
+
+                if len(first) < len(threads) and all(
+                    end <= leftmost for k, (end, _) in found.items() if k < leftmost
+                ):
+                    threads = [
+                        t
+                        for t in threads
+                        if engine.start(t) == first[engine.config(t)]
+                        or first[engine.config(t)] != leftmost
+                    ]
+
+            record(threads, pos + 1)
+            yield from decide(False)
+
+        if pos + 1 >= floor:
+            record([engine.initial(pos + 1)], pos + 1)
+
+        threads = []
+        yield from decide(True)
+
+
+class RegExpSet(Generic[Tok, Out]):
+    """
+    Matches several regular expressions at once. All the expressions are
+    merged into a single automaton, which means that the input is only walked
+    once and that matchers which are used by several expressions (like the
+    ones from :py:mod:`nsre.lib`) are only evaluated once per token.
+
+    >>> from nsre import *
+    >>> rs = RegExpSet.from_asts({"hello": seq("hello"), "any": anything()})
+    >>> assert set(rs.match("hello")) == {"hello", "any"}
+    >>> assert set(rs.match("bye")) == {"any"}
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Hashable],
+        automaton: Automaton[Tok, Out],
+        owners: Sequence[int],
+        empty: Sequence[int],
+        intern: bool = False,
+    ):
+        """
+        Don't call me directly, use :py:meth:`RegExpSet.from_asts`.
+
+        Parameters
+        ----------
+        keys
+            Identifier of each expression
+        automaton
+            Union of the automatons of all expressions
+        owners
+            For each state of the automaton, index of the expression it
+            belongs to
+        empty
+            Indices of the expressions that match an empty sequence
+        intern
+            See :py:meth:`RegExp.from_ast`
+        """
+
+        self.keys = keys
+        self.owners = owners
+        self.empty = empty
+        self.re: RegExp[Tok, Out] = RegExp(
+            graph=None, automaton=automaton, intern=intern
         )
 
-    def _de_duplicate(
-        self, stack: Iterator[Explorer[Tok, Out]], key: Text = "signature"
-    ) -> Iterator[Explorer[Tok, Out]]:
+    @classmethod
+    def from_asts(
+        cls,
+        roots: Union[Mapping[Hashable, Node[Tok, Out]], Iterable[Node[Tok, Out]]],
+        intern: bool = False,
+    ) -> "RegExpSet[Tok, Out]":
         """
-        As there is potentially several paths that lead to the same result, we
-        merge for each node all identical trails. Without this the number of
-        results becomes completely crazy (on top of being useless and
-        confusing)
+        Compiles the expressions into a set.
+
+        Parameters
+        ----------
+        roots
+            Either a mapping of expressions, in which case their keys will
+            identify them in the results, either an iterable of expressions
+            which will then be identified by their index.
+        intern
+            See :py:meth:`RegExp.from_ast`
         """
 
-        stack = list(sorted(stack, key=lambda e: getattr(e, key)))
+        if isinstance(roots, Mapping):
+            keys, nodes = list(roots.keys()), list(roots.values())
+        else:
+            nodes = list(roots)
+            keys = list(range(len(nodes)))
 
-        if not stack:
-            return
+        parts = [
+            Automaton.from_graph(ast_to_graph(factor_literals(n).copy())) for n in nodes
+        ]
+        automaton, owners = Automaton.union(parts)
+        empty = [i for i, p in enumerate(parts) if p.terminal[INITIAL] != NO_TERMINAL]
+
+        return cls(
+            keys=keys, automaton=automaton, owners=owners, empty=empty, intern=intern
+        )
+
+    def match(
+        self, seq: Sequence[Tok], join_trails: bool = False
+    ) -> Dict[Hashable, MatchList[Match[Out]]]:
+        """
+        Matches all expressions against the sequence in a single pass.
+
+        Returns a dictionary whose keys are the identifiers of the expressions
+        that matched and values are their matches, just like
+        :py:meth:`RegExp.match` would return them. Expressions which didn't
+        match are absent.
+
+        Parameters
+        ----------
+        seq
+            Sequence that you would like to test
+        join_trails
+            See :py:meth:`RegExp.match`
+        """
+
+        engine = self.re._engine(seq)
+        threads, end = self.re._advance(seq, engine, self.re._tokens())
+
+        if not threads:
+            return {}
+
+        groups: Dict[int, List] = {}
+
+        for thread in threads:
+            state = engine.state(thread)
+
+            for owner in self.empty if state == INITIAL else [self.owners[state]]:
+                groups.setdefault(owner, []).append(thread)
+
+        out = {}
+
+        for owner in sorted(groups):
+            matches = MatchList(
+                engine.make_match(t, seq, end).as_match(join_trails=join_trails)
+                for t in engine.terminal(groups[owner])
+            )
 
-        yield stack[0]
+            if matches:
+                out[self.keys[owner]] = matches
 
-        for i in range(1, len(stack)):
-            if getattr(stack[i], key) != getattr(stack[i - 1], key):
-                yield stack[i]
+        return out
 
 
-__all__ = ["RegExp", "Match", "MatchList", "ast_to_graph"]
+__all__ = ["RegExp", "RegExpSet", "Match", "MatchList", "StreamMatcher", "ast_to_graph"]
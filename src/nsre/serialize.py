@@ -0,0 +1,536 @@
+"""
+Compact binary format for compiled expressions, used by
+:py:meth:`nsre.regexp.RegExp.dump` and :py:meth:`nsre.regexp.RegExp.load`.
+
+Notes
+-----
+The format is made of:
+
+- A header: the magic bytes :code:`NSRE`, the format version (unsigned
+  16-bit) and the size of the metadata (unsigned 32-bit)
+- The metadata, encoded in JSON: the descriptors of the matchers (matchers
+  shared by several states are only stored once), the names of the capture
+  groups, the bounds of the loop counters, the interned edge data, the
+  :py:mod:`re` translation, the required literal and the options
+- The tables of the automaton, as little-endian 32-bit integer arrays: the
+  terminal table, the offset of the successors of each state and then the
+  successors and the data of all edges, flattened
+
+Loading boils down to decoding the metadata and copying the arrays, no graph
+is built. Any buffer can be loaded, including a :py:class:`mmap.mmap` of the
+file. Mapping the file only avoids reading it up front: the arrays are still
+copied into the tuples of the automaton, so the buffer can be closed as soon
+as :py:func:`loads` returns.
+
+Matchers are stored as descriptors: a registered name and a list of
+arguments (see :py:func:`register_matcher`). A :py:class:`nsre.matchers.Test`
+is stored as the import path of its test function, which will be imported
+when loading (and so is the function of a
+:py:class:`nsre.matchers.FunctionHasValue`). As with :py:mod:`pickle`, only
+load files that you trust.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional, Sequence, Text, Tuple, Type
+
+# noinspection PyProtectedMember
+from .ast import Capture, _Loop
+from .automaton import Automaton, EdgeData
+from .matchers import (
+    Anything,
+    AttributeHasValue,
+    Cached,
+    ChrRanges,
+    Eq,
+    FunctionHasValue,
+    In,
+    KeyHasValue,
+    Matcher,
+    Not,
+    OutOf,
+    StrTest,
+    Test,
+)
+from .prefilter import Literal
+from .translate import Translation
+
+MAGIC = b"NSRE"
+
+# Increase this each time the format changes
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct("<4sHI")
+
+
+@dataclass(frozen=True)
+class Descriptor:
+    """
+    Describes how to serialize a type of matcher
+
+    Attributes
+    ----------
+    name
+        Name under which the matcher is stored
+    kind
+        Class of the matcher
+    encode
+        Returns the list of arguments which describe a matcher
+    decode
+        Creates the matcher back from the arguments
+    """
+
+    name: Text
+    kind: Type[Matcher]
+    encode: Callable[[Matcher], Sequence[Any]]
+    decode: Callable[..., Matcher]
+
+
+_by_name: Dict[Text, Descriptor] = {}
+_by_kind: Dict[Type[Matcher], Descriptor] = {}
+
+
+def register_matcher(
+    name: Text,
+    kind: Type[Matcher],
+    encode: Callable[[Matcher], Sequence[Any]],
+    decode: Optional[Callable[..., Matcher]] = None,
+) -> None:
+    """
+    Registers a type of matcher so that expressions using it can be dumped.
+
+    >>> class Even(Matcher):
+    ...     transparent = True
+    ...
+    ...     def match(self, token):
+    ...         if token % 2 == 0:
+    ...             yield token
+    >>> register_matcher("even", Even, lambda m: [])
+
+    Parameters
+    ----------
+    name
+        Unique name of the matcher in the files
+    kind
+        Class of the matcher (sub-classes must be registered on their own)
+    encode
+        Function which returns the arguments of a matcher. Arguments can be
+        None, booleans, numbers, strings, bytes, tuples, lists, frozensets
+        and matchers.
+    decode
+        Function which receives the arguments and creates the matcher. By
+        default, the class is called with the arguments.
+    """
+
+    descriptor = Descriptor(name=name, kind=kind, encode=encode, decode=decode or kind)
+    _by_name[name] = descriptor
+    _by_kind[kind] = descriptor
+
+
+def _function_path(test: Matcher, func: Callable) -> Text:
+    """
+    Import path of a function used by a matcher
+    """
+
+    # Methods of built-in types (like str.lower) only know their class
+    owner = getattr(func, "__objclass__", None)
+    module = getattr(func, "__module__", None) or getattr(owner, "__module__", None)
+    name = getattr(func, "__qualname__", "")
+
+    if not module or not name or "<" in name:
+        raise ValueError(f"Cannot dump {test!r}: the test must be importable")
+
+    return f"{module}:{name}"
+
+
+def _test_args(test: Test) -> List[Text]:
+    """
+    Arguments of a Test matcher: the import path of its test and of its
+    vectorized test, if any
+    """
+
+    args = [_function_path(test, test.test)]
+
+    if test.vectorized is not None:
+        args.append(_function_path(test, test.vectorized))
+
+    return args
+
+
+def _cached_args(cached: Cached) -> List[Any]:
+    """
+    Arguments of a Cached matcher (the cache itself is not stored)
+    """
+
+    if cached.key is not None:
+        raise ValueError(f"Cannot dump {cached!r}: it has a key function")
+
+    return [cached.matcher, cached.maxsize, cached.ttl]
+
+
+def _import_function(path: Text) -> Callable:
+    """
+    Imports a function from its import path
+    """
+
+    module, name = path.split(":")
+    found = import_module(module)
+
+    for part in name.split("."):
+        found = getattr(found, part)
+
+    return found
+
+
+def _function_args(matcher: FunctionHasValue) -> List[Any]:
+    """
+    Arguments of a FunctionHasValue matcher: the import path of its function
+    and the value
+    """
+
+    return [_function_path(matcher, matcher.func), matcher.value]
+
+
+def _import_function_matcher(path: Text, value: Any) -> FunctionHasValue:
+    """
+    Imports the function of a FunctionHasValue matcher back
+    """
+
+    return FunctionHasValue(_import_function(path), value)
+
+
+def _import_test(path: Text, vectorized: Optional[Text] = None) -> Test:
+    """
+    Imports the functions of a Test matcher back
+    """
+
+    return Test(
+        _import_function(path),
+        vectorized=_import_function(vectorized) if vectorized else None,
+    )
+
+
+register_matcher("eq", Eq, lambda m: [m.ref])
+register_matcher("in", In, lambda m: [m.ref])
+register_matcher("out_of", OutOf, lambda m: [m.ref])
+register_matcher("attribute", AttributeHasValue, lambda m: [m.attribute, m.value])
+register_matcher("key", KeyHasValue, lambda m: [m.key, m.value])
+register_matcher("function", FunctionHasValue, _function_args, _import_function_matcher)
+register_matcher("anything", Anything, lambda m: [])
+register_matcher("chr_ranges", ChrRanges, lambda m: list(m.ranges))
+register_matcher(
+    "str_test",
+    StrTest,
+    lambda m: [m.ascii, *m.methods],
+    lambda ascii, *methods: StrTest(*methods, ascii=ascii),
+)
+register_matcher("not", Not, lambda m: [m.matcher])
+register_matcher("test", Test, _test_args, _import_test)
+register_matcher("cached", Cached, _cached_args)
+
+
+def _encode_value(value: Any) -> Any:
+    """
+    Converts an argument of a matcher into JSON. Tuples, sets, frozensets,
+    ranges, bytes and matchers are wrapped into a single-key object
+    indicating their type. Sets are sorted when their items can be compared,
+    so that the output doesn't depend on the hash seed.
+    """
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, list):
+        return [_encode_value(v) for v in value]
+    elif isinstance(value, tuple):
+        return {"tuple": [_encode_value(v) for v in value]}
+    elif isinstance(value, (set, frozenset)):
+        try:
+            items = sorted(value)
+        except TypeError:
+            items = list(value)
+
+        kind = "frozenset" if isinstance(value, frozenset) else "set"
+
+        return {kind: [_encode_value(v) for v in items]}
+    elif isinstance(value, range):
+        return {"range": [value.start, value.stop, value.step]}
+    elif isinstance(value, bytes):
+        return {"bytes": value.hex()}
+    elif isinstance(value, Matcher):
+        return {"matcher": _encode_matcher(value)}
+
+    raise ValueError(f"Cannot dump value {value!r}")
+
+
+def _decode_value(value: Any) -> Any:
+    """
+    Reverse of :py:func:`_encode_value`
+    """
+
+    if isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    elif isinstance(value, dict):
+        ((kind, content),) = value.items()
+
+        if kind == "tuple":
+            return tuple(_decode_value(v) for v in content)
+        elif kind == "set":
+            return {_decode_value(v) for v in content}
+        elif kind == "frozenset":
+            return frozenset(_decode_value(v) for v in content)
+        elif kind == "range":
+            return range(*content)
+        elif kind == "bytes":
+            return bytes.fromhex(content)
+        elif kind == "matcher":
+            return _decode_matcher(content)
+
+        raise ValueError(f"Unknown value type: {kind!r}")
+
+    return value
+
+
+def _encode_matcher(matcher: Matcher) -> List[Any]:
+    """
+    Generates the descriptor of a matcher: its registered name followed by its
+    arguments
+    """
+
+    descriptor = _by_kind.get(type(matcher))
+
+    if descriptor is None:
+        raise ValueError(f"Cannot dump {matcher!r}: its type is not registered")
+
+    return [descriptor.name, *(_encode_value(a) for a in descriptor.encode(matcher))]
+
+
+def _decode_matcher(data: List[Any]) -> Matcher:
+    """
+    Creates a matcher from its descriptor
+    """
+
+    name, *args = data
+    descriptor = _by_name.get(name)
+
+    if descriptor is None:
+        raise ValueError(f"Unknown matcher: {name!r}")
+
+    return descriptor.decode(*(_decode_value(a) for a in args))
+
+
+def _pack(values: Sequence[int]) -> bytes:
+    """
+    Packs integers into a little-endian 32-bit array
+    """
+
+    out = array("i", values)
+
+    if sys.byteorder != "little":
+        out.byteswap()
+
+    return out.tobytes()
+
+
+def _unpack(buffer: memoryview, pos: int, count: int) -> Tuple[array, int]:
+    """
+    Reads an array packed by :py:func:`_pack`. Returns the array and the
+    position right after it.
+    """
+
+    end = pos + 4 * count
+    out = array("i")
+    out.frombytes(buffer[pos:end])
+
+    if sys.byteorder != "little":
+        out.byteswap()
+
+    return out, end
+
+
+def dumps(
+    automaton: Automaton,
+    translation: Optional[Translation] = None,
+    dfa: bool = False,
+    literal: Optional[Literal] = None,
+    intern: bool = False,
+) -> bytes:
+    """
+    Serializes a compiled expression
+
+    Parameters
+    ----------
+    automaton
+        Automaton of the expression
+    translation
+        Translation of the expression for the :py:mod:`re` module, if any
+    dfa
+        Whether the lazy DFA is enabled
+    literal
+        Literal that all matches contain, if any (see
+        :py:func:`nsre.prefilter.required_literal`)
+    intern
+        Whether the tokens of each input are interned
+    """
+
+    captures: Dict[Capture, int] = {}
+    loops: Dict[_Loop, int] = {}
+    data = []
+
+    for d in automaton.data:
+        starts = [captures.setdefault(c, len(captures)) for c in d.start_captures]
+        stops = [captures.setdefault(c, len(captures)) for c in d.stop_captures]
+        counters = [[op, loops.setdefault(loop, len(loops))] for op, loop in d.counters]
+        data.append([starts, stops, counters])
+
+    matchers: Dict[int, int] = {}
+    unique = []
+
+    for matcher in automaton.matchers[1:]:
+        if id(matcher) not in matchers:
+            matchers[id(matcher)] = len(unique)
+            unique.append(_encode_matcher(matcher))
+
+    meta = {
+        "matchers": unique,
+        "states": [matchers[id(m)] for m in automaton.matchers[1:]],
+        "captures": [c.name for c in captures],
+        "loops": [[loop.min, loop.max] for loop in loops],
+        "data": data,
+        "stdlib": (
+            {
+                "pattern": translation.pattern,
+                "groups": [
+                    [group, name, translation.parents[group]]
+                    for group, name in translation.groups.items()
+                ],
+                "captures": list(translation.captures),
+                "complete": translation.complete,
+            }
+            if translation is not None
+            else None
+        ),
+        "dfa": dfa,
+        "literal": (
+            [
+                _encode_value(list(literal.tokens)),
+                literal.min_offset,
+                literal.max_offset,
+            ]
+            if literal is not None
+            else None
+        ),
+        "intern": intern,
+    }
+    raw_meta = json.dumps(meta, separators=(",", ":")).encode()
+
+    offsets = [0]
+
+    for successors in automaton.successors:
+        offsets.append(offsets[-1] + len(successors))
+
+    return b"".join(
+        [
+            _HEADER.pack(MAGIC, FORMAT_VERSION, len(raw_meta)),
+            raw_meta,
+            _pack(automaton.terminal),
+            _pack(offsets),
+            _pack([s for successors in automaton.successors for s in successors]),
+            _pack([e for edges in automaton.edges for e in edges]),
+        ]
+    )
+
+
+def loads(
+    buffer,
+) -> Tuple[Automaton, Optional[Translation], bool, Optional[Literal], bool]:
+    """
+    Reads a compiled expression generated by :py:func:`dumps`. Returns the
+    automaton, the :py:mod:`re` translation, whether the DFA is enabled, the
+    required literal and whether the tokens are interned.
+
+    Parameters
+    ----------
+    buffer
+        Any object supporting the buffer protocol (bytes, mmap, ...). Nothing
+        refers to it once loaded.
+    """
+
+    view = memoryview(buffer)
+
+    if len(view) < _HEADER.size:
+        raise ValueError("Not a compiled expression")
+
+    magic, version, size = _HEADER.unpack_from(view)
+
+    if magic != MAGIC:
+        raise ValueError("Not a compiled expression")
+
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported format version {version} (expected {FORMAT_VERSION})"
+        )
+
+    pos = _HEADER.size
+    meta = json.loads(bytes(view[pos : pos + size]))
+    pos += size
+
+    captures = [Capture(name=name, statement=None) for name in meta["captures"]]
+    loops = [_Loop(statement=None, min=lo, max=hi) for lo, hi in meta["loops"]]
+    unique = [_decode_matcher(m) for m in meta["matchers"]]
+    matchers = (None, *(unique[i] for i in meta["states"]))
+    states = len(matchers)
+
+    terminal, pos = _unpack(view, pos, states)
+    offsets, pos = _unpack(view, pos, states + 1)
+    successors, pos = _unpack(view, pos, offsets[-1])
+    edges, pos = _unpack(view, pos, offsets[-1])
+
+    automaton = Automaton(
+        matchers=matchers,
+        successors=tuple(
+            tuple(successors[offsets[i] : offsets[i + 1]]) for i in range(states)
+        ),
+        edges=tuple(tuple(edges[offsets[i] : offsets[i + 1]]) for i in range(states)),
+        terminal=tuple(terminal),
+        data=tuple(
+            EdgeData(
+                start_captures=tuple(captures[c] for c in starts),
+                stop_captures=tuple(captures[c] for c in stops),
+                counters=tuple((op, loops[i]) for op, i in counters),
+            )
+            for starts, stops, counters in meta["data"]
+        ),
+    )
+
+    translation = None
+
+    if meta["stdlib"] is not None:
+        stdlib = meta["stdlib"]
+        translation = Translation(
+            pattern=stdlib["pattern"],
+            groups={group: name for group, name, _ in stdlib["groups"]},
+            parents={group: parent for group, _, parent in stdlib["groups"]},
+            captures=tuple(stdlib["captures"]),
+            complete=stdlib["complete"],
+        )
+
+    literal = None
+
+    if meta["literal"] is not None:
+        tokens, min_offset, max_offset = meta["literal"]
+        literal = Literal(tuple(_decode_value(tokens)), min_offset, max_offset)
+
+    return automaton, translation, meta["dfa"], literal, meta["intern"]
+
+
+__all__ = [
+    "Descriptor",
+    "FORMAT_VERSION",
+    "register_matcher",
+    "dumps",
+    "loads",
+]
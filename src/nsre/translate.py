@@ -0,0 +1,497 @@
+import re
+from dataclasses import dataclass, field, replace
+from typing import (
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Mapping,
+    Match,
+    Optional,
+    Pattern,
+    Set,
+    Text,
+    Tuple,
+)
+
+from .ast import (
+    Alternation,
+    AnyNumber,
+    Capture,
+    Concatenation,
+    Final,
+    Maybe,
+    Node,
+    Repeat,
+    nullable,
+)
+from .automaton import INITIAL, NO_TERMINAL, Automaton
+from .match import _Match
+from .matchers import ChrRanges, Matcher, Out, Tok, TokenSelector
+
+# Largest number of pairs of states explored to find out if an expression is
+# ambiguous (see :py:func:`ambiguity`)
+AMBIGUITY_LIMIT = 100_000
+
+
+@dataclass(frozen=True)
+class Translation:
+    """
+    Result of the translation of an AST into a :py:mod:`re` pattern
+
+    Attributes
+    ----------
+    pattern
+        Equivalent pattern, which must match the whole string
+    groups
+        For each named group of the pattern, the name of the capture group it
+        corresponds to. Group names have to be valid Python identifiers and
+        to be unique, so they can differ from the capture names.
+    parents
+        For each named group, the group it is nested in (None at the top)
+    captures
+        Names of all the capture groups found in the AST, in order
+    complete
+        The match found by :py:mod:`re` is the only match of the expression
+        and its named groups give the captures (see
+        :py:meth:`StdlibEngine.from_ast`)
+    """
+
+    pattern: Text
+    groups: Mapping[Text, Text] = field(default_factory=dict)
+    parents: Mapping[Text, Optional[Text]] = field(default_factory=dict)
+    captures: Tuple[Text, ...] = tuple()
+    complete: bool = False
+
+
+class _Translator:
+    """
+    Walks the AST to generate the pattern. Raises a ValueError as soon as
+    something can't be translated.
+
+    On the way, it notes if a capture group is inside of a loop (:py:mod:`re`
+    only remembers the last iteration of a group) and if a loop repeats
+    something that can be empty, which the backtracking of :py:mod:`re` can
+    go through in many ways.
+    """
+
+    def __init__(self):
+        self.groups: Dict[Text, Text] = {}
+        self.parents: Dict[Text, Optional[Text]] = {}
+        self.captures = []
+        self.stack: List[Text] = []
+        self.loops = 0
+        self.looped = False
+        self.empty_loop = False
+
+    def group_name(self, name: Text) -> Text:
+        """
+        Generates a unique group name for a capture
+
+        Parameters
+        ----------
+        name
+            Name of the capture
+        """
+
+        base = re.sub(r"\W", "_", name, flags=re.ASCII)
+
+        if not base or base[0].isdigit():
+            base = f"g_{base}"
+
+        candidate = base
+        i = 1
+
+        while candidate in self.groups:
+            i += 1
+            candidate = f"{base}_{i}"
+
+        self.groups[candidate] = name
+
+        return candidate
+
+    def loop(self, node: Node) -> Text:
+        """
+        Translates the statement of a loop
+
+        Parameters
+        ----------
+        node
+            Repeated node
+        """
+
+        self.empty_loop = self.empty_loop or nullable(node)
+        self.loops += 1
+
+        try:
+            return self.translate(node)
+        finally:
+            self.loops -= 1
+
+    def translate(self, node: Node) -> Text:
+        """
+        Translates a node
+
+        Parameters
+        ----------
+        node
+            Node to translate
+        """
+
+        if isinstance(node, Final):
+            pattern = node.statement.as_regex()
+
+            if pattern is None:
+                raise ValueError(f"Cannot translate {node.statement!r}")
+
+            return pattern
+        elif isinstance(node, Concatenation):
+            return self.translate(node.left) + self.translate(node.right)
+        elif isinstance(node, Alternation):
+            return f"(?:{self.translate(node.left)}|{self.translate(node.right)})"
+        elif isinstance(node, Maybe):
+            return f"(?:{self.translate(node.statement)})?"
+        elif isinstance(node, AnyNumber):
+            return f"(?:{self.loop(node.statement)})*"
+        elif isinstance(node, Repeat):
+            stop = "" if node.max is None else node.max
+
+            if node.max == 1:
+                inner = self.translate(node.statement)
+            else:
+                inner = self.loop(node.statement)
+
+            return f"(?:{inner}){{{node.min},{stop}}}"
+        elif isinstance(node, Capture):
+            group = self.group_name(node.name)
+            self.parents[group] = self.stack[-1] if self.stack else None
+            self.captures.append(node.name)
+            self.looped = self.looped or self.loops > 0
+            self.stack.append(group)
+
+            try:
+                return f"(?P<{group}>{self.translate(node.statement)})"
+            finally:
+                self.stack.pop()
+
+        raise ValueError(f"Cannot translate {node!r}")
+
+
+def _translate(root: Node) -> Optional[Tuple[_Translator, Translation]]:
+    """
+    Translates the AST, returns None if it can't be translated. The
+    translator is returned along with the translation, for what it noticed
+    along the way.
+    """
+
+    translator = _Translator()
+
+    try:
+        pattern = translator.translate(root)
+    except (ValueError, RecursionError):
+        return None
+
+    return (
+        translator,
+        Translation(
+            pattern=pattern,
+            groups=translator.groups,
+            parents=translator.parents,
+            captures=tuple(translator.captures),
+        ),
+    )
+
+
+def ast_to_pattern(root: Node) -> Optional[Translation]:
+    """
+    Translates an AST into an equivalent :py:mod:`re` pattern, if all its
+    matchers can be translated (see :py:meth:`nsre.matchers.Matcher.as_regex`).
+    Returns None otherwise. Capture groups are translated into named groups.
+
+    >>> from nsre import *
+    >>> t = ast_to_pattern(seq("a.") + AnyNumber(Final(In("xy")))["x"])
+    >>> assert t.pattern == r"a\\.(?P<x>(?:[xy])*)"
+
+    Parameters
+    ----------
+    root
+        Root of the AST
+    """
+
+    translated = _translate(root)
+
+    return translated[1] if translated is not None else None
+
+
+def _overlap(a: Matcher, b: Matcher) -> bool:
+    """
+    Indicates if two translatable matchers might accept the same character.
+    When in doubt, they do.
+    """
+
+    for x, y in [(a, b), (b, a)]:
+        keys = x.index_keys()
+
+        if keys is not None and isinstance(keys[0], TokenSelector):
+            return any(
+                any(True for _ in y.match(v))
+                for v in keys[1]
+                if isinstance(v, str) and len(v) == 1
+            )
+
+    if isinstance(a, ChrRanges) and isinstance(b, ChrRanges):
+        return any(
+            max(ord(s1), ord(s2)) <= min(ord(e1), ord(e2))
+            for s1, e1 in a.ranges
+            for s2, e2 in b.ranges
+        )
+
+    return True
+
+
+def _cyclic(graph: Dict[Hashable, List[Hashable]]) -> Set[Hashable]:
+    """
+    Nodes of the graph which are part of a cycle, found by an iterative
+    version of Tarjan's algorithm for strongly connected components
+    """
+
+    index: Dict[Hashable, int] = {}
+    low: Dict[Hashable, int] = {}
+    stack: List[Hashable] = []
+    on_stack: Set[Hashable] = set()
+    cyclic: Set[Hashable] = set()
+
+    for root in graph:
+        if root in index:
+            continue
+
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+
+        while work:
+            node, children = work[-1]
+
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph[child])))
+                    break
+                elif child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                if low[node] == index[node]:
+                    component = []
+
+                    while not component or component[-1] != node:
+                        component.append(stack.pop())
+                        on_stack.discard(component[-1])
+
+                    if len(component) > 1 or node in graph[node]:
+                        cyclic.update(component)
+
+    return cyclic
+
+
+def ambiguity(automaton: Automaton) -> Tuple[bool, bool]:
+    """
+    Finds out in how many ways the automaton can read an input, by exploring
+    the pairs of states that the same input can lead to. Returns two flags:
+
+    - The number of ways to read any prefix of any input is bounded, which
+      is the case unless a pair of distinct states is part of a cycle of
+      pairs. A backtracking engine (like :py:mod:`re`) then tries a bounded
+      number of paths for each position of the input, so it can't blow up.
+    - The automaton is unambiguous: no input can be matched in two ways,
+      because no pair of distinct states can terminate on the same input.
+
+    Matchers which might accept the same character are assumed to do so, and
+    so are automatons with more than :py:data:`AMBIGUITY_LIMIT` pairs of
+    states, so both answers may be False when in doubt but never True when
+    wrong.
+
+    >>> from nsre import *
+    >>> from nsre.regexp import ast_to_graph
+    >>> a, c = Final(Eq("a")), Final(Eq("c"))
+    >>> graph = ast_to_graph(AnyNumber(AnyNumber(a) + a.copy()) + c)
+    >>> assert ambiguity(Automaton.from_graph(graph)) == (False, False)
+
+    Parameters
+    ----------
+    automaton
+        Automaton of translatable matchers, not minimized (states must be the
+        positions of the expression)
+    """
+
+    matchers, successors, terminal = (
+        automaton.matchers,
+        automaton.successors,
+        automaton.terminal,
+    )
+    overlaps: Dict[Tuple[int, int], bool] = {}
+    pairs: Dict[Tuple[int, int], List[Tuple[int, int]]] = {(INITIAL, INITIAL): []}
+    queue = [(INITIAL, INITIAL)]
+
+    while queue:
+        p, q = queue.pop()
+
+        for s in successors[p]:
+            for t in successors[q]:
+                if s != t and (s, t) not in overlaps:
+                    overlaps[s, t] = _overlap(matchers[s], matchers[t])
+
+                if s == t or overlaps[s, t]:
+                    pairs[p, q].append((s, t))
+
+                    if (s, t) not in pairs:
+                        if len(pairs) >= AMBIGUITY_LIMIT:
+                            return False, False
+
+                        pairs[s, t] = []
+                        queue.append((s, t))
+
+    bounded = all(p == q for p, q in _cyclic(pairs))
+
+    parents: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+
+    for pair, children in pairs.items():
+        for child in children:
+            parents.setdefault(child, []).append(pair)
+
+    todo = [
+        (p, q)
+        for p, q in pairs
+        if terminal[p] != NO_TERMINAL and terminal[q] != NO_TERMINAL
+    ]
+    done = set(todo)
+
+    while todo:
+        for pair in parents.get(todo.pop(), []):
+            if pair not in done:
+                done.add(pair)
+                todo.append(pair)
+
+    return bounded, all(p == q for p, q in done)
+
+
+class StdlibEngine(Generic[Tok, Out]):
+    """
+    Delegates the matching of strings to the :py:mod:`re` module, which runs
+    in C and is much faster than the other engines.
+
+    Notes
+    -----
+    Since :py:mod:`re` backtracks, it's only used when it can't blow up (see
+    :py:func:`ambiguity`): an expression like :code:`(?:(?:a)*a)*c` can take
+    an exponential time to reject a string while the other engines always
+    run in linear time.
+
+    When the expression is unambiguous, its only match is the one found by
+    :py:mod:`re` and the named groups give the captures (unless a capture
+    group is inside of a loop, since :py:mod:`re` only remembers the last
+    iteration). Otherwise, nsre reports all the different ways that the
+    expression can match, so the :py:mod:`re` pattern is only used to quickly
+    reject the strings that don't match before running one of the other
+    engines.
+    """
+
+    def __init__(self, translation: Translation):
+        self.translation = translation
+        self.regex: Pattern = re.compile(translation.pattern)
+        self.complete = translation.complete
+
+    @classmethod
+    def from_ast(cls, root: Node) -> Optional["StdlibEngine[Tok, Out]"]:
+        """
+        Creates the engine if the AST can be translated and if :py:mod:`re`
+        can't blow up on it, returns None otherwise.
+
+        Parameters
+        ----------
+        root
+            Root of the AST
+        """
+
+        from .regexp import ast_to_graph
+
+        translated = _translate(root)
+
+        if translated is None:
+            return None
+
+        translator, translation = translated
+
+        if translator.empty_loop:
+            return None
+
+        bounded, unambiguous = ambiguity(
+            Automaton.from_graph(ast_to_graph(root.copy()))
+        )
+
+        if not bounded:
+            return None
+
+        return cls(replace(translation, complete=unambiguous and not translator.looped))
+
+    def fullmatch(self, seq: Text) -> Optional[Match]:
+        """
+        Matches the whole string, returns the :py:mod:`re` match (None if the
+        string doesn't match)
+
+        Parameters
+        ----------
+        seq
+            String to match
+        """
+
+        return self.regex.fullmatch(seq)
+
+    def make_match(self, seq: Text, found: Match) -> _Match[Out]:
+        """
+        Converts the :py:mod:`re` match of the whole string into the only
+        match of the expression (see :py:attr:`Translation.complete`). Like
+        with the other engines, empty captures are left out and when a capture
+        group appears several times at the same level, the last one is kept.
+
+        Parameters
+        ----------
+        seq
+            String that matched
+        found
+            Match found by :py:meth:`StdlibEngine.fullmatch`
+        """
+
+        match = _Match(0)
+        match.trail.extend(seq)
+        matches: Dict[Optional[Text], _Match[Out]] = {None: match}
+
+        for group, name in self.translation.groups.items():
+            start, end = found.span(group)
+
+            if start == end:
+                continue
+
+            child = _Match(start)
+            child.trail.extend(seq[start:end])
+            matches[self.translation.parents[group]].children[name] = [child]
+            matches[group] = child
+
+        return match
+
+
+__all__ = [
+    "Translation",
+    "ast_to_pattern",
+    "ambiguity",
+    "StdlibEngine",
+    "AMBIGUITY_LIMIT",
+]
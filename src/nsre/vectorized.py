@@ -0,0 +1,264 @@
+import sys
+from typing import Any, Dict, Generic, List, Optional
+
+from .automaton import INITIAL, NO_TERMINAL, Automaton, Counters
+from .match import _Match
+from .matchers import Matcher, Out, Tok
+
+# Largest number of distinct matchers handled by the vectorized engine (the
+# matchers that fired at a given position are stored as the bits of an
+# unsigned 64-bit integer)
+MAX_MATCHERS = 63
+
+# Up to this number of distinct matchers, the combinations of matchers that
+# fired are counted in a table instead of being sorted
+BINCOUNT_MATCHERS = 16
+
+# Number of positions converted into Python integers at once
+CHUNK = 1 << 16
+
+
+def is_array(seq: Any) -> bool:
+    """
+    Indicates if the sequence is a one-dimensional NumPy array. NumPy isn't
+    imported if it's not already (in which case the sequence can't be an
+    array anyway).
+
+    Parameters
+    ----------
+    seq
+        Sequence to check
+    """
+
+    np = sys.modules.get("numpy")
+
+    return np is not None and isinstance(seq, np.ndarray) and seq.ndim == 1
+
+
+class Vectorized(Generic[Tok, Out]):
+    """
+    Engine for NumPy arrays of tokens (like arrays of categorical codes). It
+    works column-wise instead of token by token:
+
+    - Each distinct matcher of the automaton is evaluated once over the whole
+      array (see :py:meth:`nsre.matchers.Matcher.mask`), which gives one
+      boolean mask per matcher
+    - The masks are combined into one integer per position, whose bits are
+      the matchers that fired. There are usually only a handful of distinct
+      combinations, which become the "classes" of the tokens.
+    - For each class, the set of states that can be entered is known (each
+      state is entered through its own matcher), so the automaton runs as a
+      DFA over the class of each position, built on the fly: each position
+      costs one lookup in a list.
+
+    Notes
+    -----
+    Like :py:class:`nsre.bitparallel.BitParallel`, this engine only tells if
+    the array matches, it doesn't know anything about capture groups. When
+    the expression has capture groups, it's used to reject the arrays that
+    don't match before running another engine.
+
+    If one of the matchers can't be vectorized for a given array, the engine
+    gives up (and :py:class:`nsre.regexp.RegExp` falls back to the regular
+    engines). Loop counters (see :py:class:`nsre.ast.Repeat`) can't be
+    represented in a set of states, so automatons using them are not
+    supported.
+    """
+
+    def __init__(self, automaton: Automaton[Tok, Out]):
+        self.automaton = automaton
+
+        index: Dict[int, int] = {}
+        self.matchers: List[Matcher] = []
+        self.entered: List[int] = []
+
+        for state, matcher in enumerate(automaton.matchers):
+            if matcher is None:
+                continue
+
+            i = index.get(id(matcher))
+
+            if i is None:
+                i = index[id(matcher)] = len(self.matchers)
+                self.matchers.append(matcher)
+                self.entered.append(0)
+
+            self.entered[i] |= 1 << state
+
+        self.follow: List[int] = [
+            sum(1 << s for s in set(successors)) for successors in automaton.successors
+        ]
+        self.terminal = sum(
+            1 << s for s, t in enumerate(automaton.terminal) if t != NO_TERMINAL
+        )
+        self.complete = not any(automaton.data) and all(
+            m.transparent for m in self.matchers
+        )
+
+    @staticmethod
+    def supports(automaton: Automaton) -> bool:
+        """
+        Indicates if the engine can run this automaton: there must not be
+        any loop counter nor too many distinct matchers.
+
+        Parameters
+        ----------
+        automaton
+            Automaton to check
+        """
+
+        matchers = {id(m) for m in automaton.matchers[1:]}
+
+        return len(matchers) <= MAX_MATCHERS and not Counters(automaton)
+
+    def classify(self, values: Any) -> Optional[Any]:
+        """
+        Evaluates all the matchers over the array and returns, for each
+        position, the bits of the matchers that accepted the token. Returns
+        None if one of the matchers can't be vectorized.
+
+        Parameters
+        ----------
+        values
+            One-dimensional array of tokens
+        """
+
+        import numpy as np
+
+        fired = np.zeros(values.shape, dtype=np.uint64)
+
+        for i, matcher in enumerate(self.matchers):
+            mask = matcher.mask(values)
+
+            if mask is None:
+                return None
+
+            fired |= mask.astype(np.uint64) << np.uint64(i)
+
+        return fired
+
+    def accepts(self, values: Any) -> Optional[bool]:
+        """
+        Indicates if the array matches the expression, or returns None if
+        the array can't be handled by this engine.
+
+        Parameters
+        ----------
+        values
+            One-dimensional array of tokens
+        """
+
+        import numpy as np
+
+        fired = self.classify(values)
+
+        if fired is None:
+            return None
+
+        if len(self.matchers) <= BINCOUNT_MATCHERS:
+            counts = np.bincount(fired.astype(np.intp))
+            kinds = np.flatnonzero(counts)
+            table = np.zeros(len(counts), dtype=np.intp)
+            table[kinds] = np.arange(len(kinds))
+            classes = table[fired.astype(np.intp)]
+        else:
+            kinds, classes = np.unique(fired, return_inverse=True)
+
+        accepted = []
+
+        for kind in kinds.tolist():
+            bits = 0
+
+            for i, entered in enumerate(self.entered):
+                if (kind >> i) & 1:
+                    bits |= entered
+
+            accepted.append(bits)
+
+        return self._run(classes, accepted)
+
+    def _run(self, classes: Any, accepted: List[int]) -> bool:
+        """
+        Runs the DFA over the classes of the positions. DFA states are sets
+        of states of the automaton (stored as bits) and are created as they
+        are reached.
+
+        Parameters
+        ----------
+        classes
+            Class of each position
+        accepted
+            For each class, the states whose matcher accepts the tokens of
+            this class
+        """
+
+        follow = self.follow
+        width = len(accepted)
+        sets = [0, 1 << INITIAL]
+        ids = {0: 0, 1 << INITIAL: 1}
+        reachable = [0, follow[INITIAL]]
+        table = [[0] * width, [-1] * width]
+        current = 1
+
+        for start in range(0, len(classes), CHUNK):
+            for c in classes[start : start + CHUNK].tolist():
+                nxt = table[current][c]
+
+                if nxt < 0:
+                    states = reachable[current] & accepted[c]
+                    nxt = ids.get(states)
+
+                    if nxt is None:
+                        nxt = ids[states] = len(sets)
+                        sets.append(states)
+                        reachable.append(self._follow(states))
+                        table.append([-1] * width)
+
+                    table[current][c] = nxt
+
+                current = nxt
+
+            # The empty set (DFA state 0) can't be left
+            if not current:
+                return False
+
+        return bool(sets[current] & self.terminal)
+
+    def _follow(self, states: int) -> int:
+        """
+        States that can be reached from a set of states
+
+        Parameters
+        ----------
+        states
+            Set of states, as bits
+        """
+
+        out = 0
+
+        while states:
+            low = states & -states
+            out |= self.follow[low.bit_length() - 1]
+            states ^= low
+
+        return out
+
+    @staticmethod
+    def make_match(values: Any) -> _Match[Out]:
+        """
+        Creates the match of the whole array (which is the only possible
+        match when there is no capture group)
+
+        Parameters
+        ----------
+        values
+            Array that matched
+        """
+
+        match = _Match(0)
+        match.trail.extend(values.tolist())
+
+        return match
+
+
+__all__ = ["Vectorized", "is_array", "MAX_MATCHERS"]
@@ -0,0 +1,62 @@
+from nsre.ast import *
+from nsre.matchers import Eq, In
+
+
+def flatten(m):
+    """
+    Turns a match into nested tuples, so that matches can be compared as sets
+    """
+
+    return (
+        m.start_pos,
+        tuple(m.trail),
+        tuple(sorted((k, tuple(flatten(x) for x in v)) for k, v in m.children.items())),
+    )
+
+
+def results(re, data, engine=None):
+    """
+    Flattened matches of the expression, found by :code:`re.match()` or, if
+    given, by running this specific engine
+    """
+
+    if engine is None:
+        return {flatten(m) for m in re.match(data)}
+
+    return {flatten(m.as_match()) for m in re._run(data, engine)}
+
+
+def same(matches):
+    """
+    Matches can come in a different order, they're compared as sets
+    """
+
+    return sorted(map(repr, matches))
+
+
+def random_node(rng, depth, max_lo=1):
+    """
+    Random expression over "a" and "b", at most :code:`depth` levels deep.
+    Repetitions start at :code:`max_lo` or less.
+    """
+
+    letters = [Eq("a"), Eq("b"), In("ab")]
+
+    if depth == 0 or rng.random() < 0.2:
+        return Final(rng.choice(letters))
+
+    kind = rng.randrange(7)
+    child = random_node(rng, depth - 1, max_lo)
+
+    if kind == 0:
+        return child + random_node(rng, depth - 1, max_lo)
+    elif kind == 1:
+        return child | random_node(rng, depth - 1, max_lo)
+    elif kind == 2:
+        return Maybe(child)
+    elif kind == 3:
+        return AnyNumber(child)
+    elif kind == 4:
+        return Repeat(child, rng.randrange(0, max_lo + 1), rng.choice([2, 3, None]))
+    else:
+        return child[rng.choice("xy")]
@@ -0,0 +1,53 @@
+from nsre.ast import *
+from nsre.automaton import INITIAL, NO_TERMINAL, Automaton, EdgeData
+from nsre.matchers import Eq
+from nsre.regexp import RegExp, ast_to_graph
+from nsre.shortcuts import seq
+
+
+def test_states_numbering():
+    a, b, c = Eq("a"), Eq("b"), Eq("c")
+    auto = Automaton.from_graph(ast_to_graph(Final(a) + Final(b) + Final(c)))
+
+    assert len(auto) == 4
+    assert auto.matchers == (None, a, b, c)
+    assert auto.successors == ((1,), (2,), (3,), ())
+    assert auto.terminal == (NO_TERMINAL, NO_TERMINAL, NO_TERMINAL, 0)
+
+
+def test_loops():
+    fa, fb = Final(Eq("a")), Final(Eq("b"))
+    auto = Automaton.from_graph(ast_to_graph(fa + AnyNumber(fb)))
+
+    assert auto.successors[INITIAL] == (1,)
+    assert set(auto.successors[1]) == {2}
+    assert set(auto.successors[2]) == {2}
+    assert auto.terminal[INITIAL] == NO_TERMINAL
+    assert auto.terminal[1] != NO_TERMINAL
+    assert auto.terminal[2] != NO_TERMINAL
+
+
+def test_interned_data():
+    fa, fb = Final(Eq("a")), Final(Eq("b"))
+    cap = fa["foo"]
+    auto = Automaton.from_graph(ast_to_graph(cap + fb))
+
+    assert auto.data[0] == EdgeData()
+    assert not auto.data[0]
+
+    start = auto.data[auto.edges[INITIAL][0]]
+    stop = auto.data[auto.edges[1][0]]
+
+    assert start == EdgeData(start_captures=(cap,))
+    assert stop == EdgeData(stop_captures=(cap,))
+    assert len(auto.data) == 3
+
+
+def test_regexp_uses_automaton():
+    re = RegExp.from_ast(seq("foo")["foo"] | seq("bar")["bar"])
+
+    assert isinstance(re.automaton, Automaton)
+    assert len(re.automaton) == 7
+    assert re.match("foo")
+    assert re.match("bar")
+    assert not re.match("baz")
@@ -0,0 +1,31 @@
+# noinspection PyProtectedMember
+from nsre.regexp import _EMPTY_TRAIL, RegExp
+from nsre.shortcuts import anything, seq
+
+
+def test_trail_shares_prefix():
+    base = _EMPTY_TRAIL.push("a", 0).push("b", 0)
+    left = base.push("c", 0)
+    right = base.push("c", 1)
+
+    assert left.parent is right.parent
+    assert len(left) == 3
+    assert [x.item for x in left] == ["a", "b", "c"]
+    assert left != right
+    assert left == base.push("c", 0)
+
+
+def test_trail_empty():
+    assert len(_EMPTY_TRAIL) == 0
+    assert [*_EMPTY_TRAIL] == []
+    assert _EMPTY_TRAIL == _EMPTY_TRAIL
+
+
+def test_long_input():
+    re = RegExp.from_ast(anything()["head"] + seq("!") + anything()["tail"])
+    data = "x" * 5000 + "!" + "y" * 5000
+
+    m = re.match(data, join_trails=True)
+    assert len(m) == 1
+    assert m["head"].trail == "x" * 5000
+    assert m["tail"].trail == "y" * 5000
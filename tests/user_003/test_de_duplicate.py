@@ -0,0 +1,47 @@
+from nsre.ast import *
+from nsre.matchers import Anything, KeyHasValue, OutOf
+
+# noinspection PyProtectedMember
+from nsre.regexp import _EMPTY_TRAIL, Explorer, RegExp
+from nsre.shortcuts import anything
+
+
+def test_merge_identical_trails():
+    re = RegExp.from_ast(Final(Anything()))
+    e1 = Explorer(re, 1, _EMPTY_TRAIL.push("a", 0))
+    e2 = Explorer(re, 1, _EMPTY_TRAIL.push("a", 0))
+    e3 = Explorer(re, 2, _EMPTY_TRAIL.push("a", 0))
+
+    out = [*re.explorers._de_duplicate(iter([e1, e2, e3]))]
+    assert len(out) == 2
+    assert out[0].state == 1
+    assert out[1].state == 2
+    assert out[0].trail is out[1].trail
+
+    out = [*re.explorers._de_duplicate(iter([e1, e2, e3]), by_state=False)]
+    assert len(out) == 1
+
+
+def test_unhashable_items():
+    re = RegExp.from_ast(Final(KeyHasValue("a", 1)) * slice(1, None))
+    m = re.match([{"a": 1}, {"a": 1, "b": 2}])
+    assert len(m) == 1
+    assert m[0].trail == ({"a": 1}, {"a": 1, "b": 2})
+
+
+def test_ambiguous_paths():
+    re = RegExp.from_ast(AnyNumber(Final(Anything()) | Final(Anything())))
+    assert len(re.match("abc")) == 1
+
+    re = RegExp.from_ast(anything()["a"] + anything()["b"])
+    m = re.match("xy", join_trails=True)
+    assert len(m) == 3
+    assert {tuple(x.children) for x in m} == {("a",), ("b",), ("a", "b")}
+
+
+def test_deterministic_order():
+    re = RegExp.from_ast((Final(OutOf("f")) | Final(OutOf("b")))["x"])
+    first = [x["x"].trail for x in re.match([("f", "b")])]
+
+    for _ in range(10):
+        assert [x["x"].trail for x in re.match([("f", "b")])] == first
@@ -0,0 +1,69 @@
+from nsre.ast import *
+from nsre.lib import email
+from nsre.matchers import Eq, In, OutOf
+from nsre.regexp import RegExp
+from nsre.shortcuts import seq
+
+
+def test_search():
+    re = RegExp.from_ast(email)
+    m = re.search("write to foo@bar.com or baz@qux.org", join_trails=True)
+
+    assert len(m) == 1
+    assert m[0].start_pos == 9
+    assert m[0].trail == "foo@bar.com"
+    assert m["user"].start_pos == 9
+    assert m["domain"].start_pos == 13
+    assert m["domain"].trail == "bar.com"
+
+    assert not re.search("nothing to see here")
+
+
+def test_finditer():
+    re = RegExp.from_ast(email)
+    found = [
+        (m[0].start_pos, m[0].trail)
+        for m in re.finditer("write to foo@bar.com or baz@qux.org", join_trails=True)
+    ]
+
+    assert found == [(9, "foo@bar.com"), (24, "baz@qux.org")]
+
+
+def test_leftmost_longest():
+    re = RegExp.from_ast(seq("ab") | seq("abab") | seq("b"))
+    found = [(m[0].start_pos, m[0].trail) for m in re.finditer("xababx", True)]
+    assert found == [(1, "abab")]
+
+    found = [
+        (m[0].start_pos, m[0].trail)
+        for m in re.finditer("xababx", True, overlapping=True)
+    ]
+    assert found == [(1, "abab"), (2, "b"), (3, "ab"), (4, "b")]
+
+
+def test_empty_matches():
+    re = RegExp.from_ast(AnyNumber(Final(Eq("a"))))
+    found = [(m[0].start_pos, m[0].trail) for m in re.finditer("baab", True)]
+    assert found == [(0, ""), (1, "aa"), (3, ""), (4, "")]
+
+    found = [(m[0].start_pos, m[0].trail) for m in re.finditer("", True)]
+    assert found == [(0, "")]
+
+
+def test_earlier_twin_discarded():
+    # The thread started at 4 is in the same state as the one started at 5,
+    # but it is discarded by the match starting at 0 so it can't stand for it
+    re = RegExp.from_ast(
+        AnyNumber(Final(Eq("b"))) + AnyNumber(Final(Eq("a")) + Final(In("ab")))
+    )
+    found = [(m[0].start_pos, m[0].trail) for m in re.finditer(list("baaabb"), True)]
+    assert found == [(0, "baaab"), (5, "b"), (6, "")]
+
+
+def test_generic_engine():
+    re = RegExp.from_ast((Final(OutOf("a")) * slice(1, None))["a"])
+    assert re.pike is None
+
+    data = [("a",), ("b",), ("a", "c"), ("a",)]
+    found = [(m[0].start_pos, m["a"].trail) for m in re.finditer(data, True)]
+    assert found == [(0, "a"), (2, "aa")]
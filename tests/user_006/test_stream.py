@@ -0,0 +1,59 @@
+from itertools import count
+
+from nsre.ast import *
+from nsre.lib import email
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp, StreamMatcher
+from nsre.shortcuts import seq
+
+
+def test_feed():
+    m = RegExp.from_ast(email).matcher()
+    assert isinstance(m, StreamMatcher)
+
+    for c in "foo@bar":
+        assert m.feed(c)
+        assert m.can_still_match()
+
+    assert not m.finish()
+    assert m.feed_many(".com")
+
+    found = m.finish(join_trails=True)
+    assert found["user"].trail == "foo"
+    assert found["domain"].trail == "bar.com"
+
+
+def test_early_reject():
+    m = RegExp.from_ast(seq("foo")).matcher()
+
+    assert not m.feed("b")
+    assert not m.can_still_match()
+    assert not m.feed("o")
+    assert not m.finish()
+
+
+def test_endless_generator():
+    consumed = []
+
+    def tokens():
+        for i in count():
+            consumed.append(i)
+            yield i
+
+    m = RegExp.from_ast(AnyNumber(Final(Predicate(lambda x: x < 10)))).matcher()
+
+    assert not m.feed_many(tokens())
+    assert consumed == list(range(11))
+
+
+def test_finish_does_not_consume():
+    m = RegExp.from_ast(AnyNumber(seq("ab"))).matcher()
+
+    assert m.finish()
+    m.feed("a")
+    assert not m.finish()
+    m.feed("b")
+    assert len(m.finish()) == 1
+    assert m.feed("a")
+    assert m.feed("b")
+    assert m.finish(join_trails=True)[0].trail == "abab"
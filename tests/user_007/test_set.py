@@ -0,0 +1,76 @@
+from nsre.ast import *
+from nsre.automaton import Automaton
+from nsre.lib import domain_name, email, url
+from nsre.matchers import Eq, OutOf
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp, RegExpSet, ast_to_graph
+from nsre.shortcuts import anything, seq
+
+
+def test_union():
+    a = Automaton.from_graph(ast_to_graph(seq("ab")))
+    b = Automaton.from_graph(ast_to_graph(seq("c")))
+    u, owners = Automaton.union([a, b])
+
+    assert len(u) == 4
+    assert owners == (-1, 0, 0, 1)
+    assert u.successors[0] == (1, 3)
+    assert u.successors[1] == (2,)
+
+
+def test_match_keys():
+    rs = RegExpSet.from_asts(
+        {"email": email, "domain": domain_name, "url": url, "any": anything()}
+    )
+
+    assert set(rs.match("foo.com")) == {"domain", "any"}
+    assert set(rs.match("foo@bar.com")) == {"email", "any"}
+    assert set(rs.match("http://foo.com")) == {"url", "any"}
+
+    m = rs.match("foo@bar.com", join_trails=True)
+    assert m["email"]["domain"].trail == "bar.com"
+    assert m["any"][0].trail == "foo@bar.com"
+
+
+def test_same_as_regexp():
+    nodes = [seq("ab"), seq("ab")["x"], Maybe(seq("a")) + Final(Eq("b")), anything()]
+    rs = RegExpSet.from_asts(nodes)
+
+    for data in ["", "ab", "b", "abc"]:
+        expected = {}
+
+        for i, node in enumerate(nodes):
+            m = RegExp.from_ast(node).match(data)
+
+            if m:
+                expected[i] = m
+
+        assert rs.match(data) == expected
+
+
+def test_empty():
+    rs = RegExpSet.from_asts([Maybe(seq("a")), seq("b"), anything()])
+    assert set(rs.match("")) == {0, 2}
+
+
+def test_generic_engine():
+    rs = RegExpSet.from_asts([Final(OutOf("a")), Final(OutOf("b"))])
+    assert rs.re.pike is None
+
+    m = rs.match([("a", "b")])
+    assert m[0][0].trail == ("a",)
+    assert m[1][0].trail == ("b",)
+
+
+def test_shared_matchers():
+    calls = []
+
+    def check(t):
+        calls.append(t)
+        return t.isalpha()
+
+    letter = Final(Predicate(check))
+    rs = RegExpSet.from_asts([letter * slice(1, None)] * 20)
+
+    assert len(rs.match("abc")) == 20
+    assert calls == ["a", "b", "c"]
@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from pytest import raises
+
+from nsre.ast import *
+from nsre.automaton import INITIAL, Dispatch
+from nsre.matchers import (
+    AttributeHasValue,
+    AttributeSelector,
+    Eq,
+    In,
+    KeyHasValue,
+    KeySelector,
+    Matcher,
+    TokenSelector,
+)
+from nsre.regexp import RegExp
+
+
+class Counting(Matcher):
+    transparent = True
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.calls = 0
+
+    def match(self, token):
+        self.calls += 1
+
+        if token == self.ref:
+            yield token
+
+
+@dataclass
+class Word:
+    pos: str
+
+
+def test_index_keys():
+    assert Eq("a").index_keys() == (TokenSelector(), ("a",))
+    assert Eq([]).index_keys() is None
+    assert In("abc").index_keys() is None
+    assert In(["a", "b"]).index_keys() == (TokenSelector(), frozenset("ab"))
+    assert KeyHasValue("k", 1).index_keys() == (KeySelector("k"), (1,))
+    assert AttributeHasValue("a", 1).index_keys() == (AttributeSelector("a"), (1,))
+    assert Counting("a").index_keys() is None
+
+
+def test_in_keeps_reference():
+    big = range(10 ** 9)
+    m = In(big)
+
+    assert m.ref is big
+    assert m.index_keys() is None
+    assert list(m.match(123_456_789)) == [123_456_789]
+    assert RegExp.from_ast(Final(m) + Final(Eq("x"))).match([42, "x"])
+
+    ref = ["a", "b"]
+    assert In(ref).ref is ref
+    assert repr(In(ref)) == "In(['a', 'b'])"
+
+
+def test_large_alternation():
+    words = [f"w{i}" for i in range(500)]
+    re = RegExp.from_ast(reduce(or_, (Final(Eq(w))[w] for w in words)))
+    tables, scan = re.dispatch.index(INITIAL)
+
+    assert len(tables) == 1
+    assert scan == ()
+
+    for engine in [re.explorers, re.pike]:
+        m = list(re._run(["w42"], engine))
+        assert len(m) == 1
+        assert list(m[0].as_match().children) == ["w42"]
+
+    assert not re.match(["nope"])
+
+
+def test_order_is_kept():
+    counting = Counting("a")
+    re = RegExp.from_ast(
+        Final(Eq("a"))["x"] | Final(counting)["y"] | Final(In(["a", "b"]))["z"]
+    )
+    targets = re.dispatch.targets(INITIAL, "a", {})
+
+    assert [s for s, _, _ in targets] == list(re.automaton.successors[INITIAL])
+    assert {tuple(m.children) for m in re.match("a")} == {("x",), ("y",), ("z",)}
+
+
+def test_matcher_called_once():
+    counting = Counting("a")
+    re = RegExp.from_ast(AnyNumber(Final(counting) | Final(Eq("b"))))
+    re.match("aaba")
+    assert counting.calls == 4
+
+
+def test_key_and_attribute():
+    re = RegExp.from_ast(
+        Final(KeyHasValue("pos", "DET"))
+        + (Final(KeyHasValue("pos", "ADJ")) | Final(KeyHasValue("pos", "NOUN")))
+    )
+    assert re.match([{"pos": "DET"}, {"pos": "NOUN"}])
+    assert not re.match([{"pos": "DET"}, {"lemma": "NOUN"}])
+    assert not re.match([{"pos": "DET"}, "NOUN"])
+
+    re = RegExp.from_ast(
+        Final(AttributeHasValue("pos", "DET")) + Final(AttributeHasValue("pos", "NOUN"))
+    )
+    assert re.match([Word("DET"), Word("NOUN")])
+    assert not re.match([Word("DET"), Word("DET")])
+    assert not re.match([Word("DET"), "NOUN"])
+
+
+def test_unhashable_token():
+    re = RegExp.from_ast(Final(Eq(1)) | Final(KeyHasValue("k", 1)) | Final(In([1, 2])))
+    assert not re.match([[1]])
+    assert re.match([{"k": 1}])
+    assert not re.match([{"k": [1]}])
+    assert re.match([1])
+
+
+def test_standalone():
+    re = RegExp.from_ast(Final(Eq("a")) + Final(Eq("b")))
+    dispatch = Dispatch(re.automaton)
+    ((s, d, outputs),) = dispatch.targets(INITIAL, "a", {})
+    assert outputs == ("a",)
+    assert dispatch.targets(INITIAL, "b", {}) == []
+
+
+class Loose:
+    __hash__ = None
+
+    def __eq__(self, other):
+        return other == 1
+
+
+def test_in_unhashable_token():
+    assert list(In({1, 2}).match([1])) == []
+    assert len(list(In({1, 2}).match(Loose()))) == 1
+    assert len(list(In([1, 2]).match(Loose()))) == 1
+
+    with raises(TypeError):
+        list(In("ab").match(1))
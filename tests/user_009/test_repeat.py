@@ -0,0 +1,145 @@
+from itertools import product
+
+from pytest import raises
+
+from nsre.ast import *
+from nsre.ast import UNROLL_LIMIT, _Loop
+from nsre.matchers import Eq
+from nsre.regexp import RegExp, RegExpSet
+from tests.helpers import results
+
+
+def assert_same_as_unrolled(node, lo, hi, wrap=lambda x: x, alphabet="ab", size=6):
+    repeated = RegExp.from_ast(wrap(Repeat(node, lo, hi)))
+    unrolled = RegExp.from_ast(wrap(node.unroll(lo, hi)))
+
+    for n in range(size + 1):
+        for data in product(alphabet, repeat=n):
+            data = "".join(data)
+            expected = results(unrolled, data)
+
+            assert results(repeated, data) == expected
+            assert results(repeated, data, repeated.explorers) == expected
+
+
+def test_mul_generates_repeat():
+    a = Final(Eq("a"))
+
+    assert isinstance(a * slice(1, UNROLL_LIMIT + 1), Repeat)
+    assert isinstance(a * (UNROLL_LIMIT + 1), Repeat)
+    assert isinstance(a * slice(UNROLL_LIMIT + 1, None), Repeat)
+    assert isinstance(a * slice(1, UNROLL_LIMIT), Concatenation)
+    assert isinstance(a * slice(1, None), Concatenation)
+    assert isinstance(Maybe(a) * 100, Concatenation)
+
+
+def test_invalid():
+    a = Final(Eq("a"))
+
+    with raises(ValueError):
+        Repeat(a, -1, 2)
+
+    with raises(ValueError):
+        Repeat(a, 3, 2)
+
+    with raises(ValueError):
+        Repeat(a, 0, 0)
+
+
+def test_nullable():
+    a = Final(Eq("a"))
+
+    assert not nullable(a)
+    assert nullable(Maybe(a))
+    assert nullable(AnyNumber(a)["x"])
+    assert nullable(Maybe(a) + AnyNumber(a))
+    assert not nullable(Maybe(a) + a)
+    assert nullable(a | Maybe(a))
+    assert nullable(Repeat(a, 0, 3))
+    assert not nullable(Repeat(a, 1, 3))
+
+
+def test_compact():
+    re = RegExp.from_ast(Final(Eq("a")) * slice(1, 1000))
+    assert len(re.automaton) == 3
+
+    assert re.match("a")
+    assert re.match("a" * 1000)
+    assert not re.match("")
+    assert not re.match("a" * 1001)
+
+
+def test_exact():
+    re = RegExp.from_ast((Final(Eq("a")) + Final(Eq("b"))) * 50)
+
+    assert re.match("ab" * 50)
+    assert not re.match("ab" * 49)
+    assert not re.match("ab" * 51)
+    assert not re.match("ab" * 49 + "a")
+
+
+def test_same_as_unrolled():
+    a, b = Final(Eq("a")), Final(Eq("b"))
+    bodies = [
+        a,
+        a + b,
+        a | b,
+        a + Maybe(b),
+        (a["x"] + AnyNumber(b))["y"],
+        Repeat(a, 2, 3),
+        Maybe(a),
+    ]
+    bounds = [(0, 1), (0, 2), (1, 1), (1, 3), (2, 4), (3, None), (0, None)]
+    wraps = [
+        lambda x: x,
+        lambda x: AnyNumber(x),
+        lambda x: x["c"] + Maybe(Final(Eq("b"))),
+        lambda x: Repeat(x, 2, 3),
+    ]
+
+    for body in bodies:
+        for lo, hi in bounds:
+            for wrap in wraps:
+                assert_same_as_unrolled(body, lo, hi, wrap, size=5)
+
+
+def test_captures():
+    re = RegExp.from_ast((Final(Eq("a"))["x"] | Final(Eq("b"))["y"]) * slice(1, 20))
+    m = re.match("aab", join_trails=True)
+
+    assert len(m) == 1
+    assert m["x"].start_pos == 1
+    assert m["y"].trail == "b"
+
+
+def test_finditer():
+    re = RegExp.from_ast(Final(Eq("a")) * slice(2, 20))
+    found = [
+        (m.start_pos, len(m.trail)) for ml in re.finditer("a" * 45 + "ba") for m in ml
+    ]
+
+    assert found == [(0, 20), (20, 20), (40, 5)]
+
+
+def test_stream_and_set():
+    node = Final(Eq("a")) * slice(10, 12)
+    m = RegExp.from_ast(node).matcher()
+
+    assert m.feed_many("a" * 9)
+    assert not m.finish()
+    assert m.feed("a")
+    assert m.finish()
+    assert m.feed_many("aa")
+    assert not m.feed("a")
+
+    rs = RegExpSet.from_asts({"r": node, "s": Final(Eq("a")) * 11})
+    assert set(rs.match("a" * 11)) == {"r", "s"}
+    assert set(rs.match("a" * 12)) == {"r"}
+
+
+def test_loop_is_private():
+    re = RegExp.from_ast(Final(Eq("a")) * slice(1, 20))
+    (loop,) = re.counters.loops
+
+    assert isinstance(loop, _Loop)
+    assert (loop.min, loop.max) == (0, 19)
@@ -0,0 +1,90 @@
+from itertools import product
+
+from nsre.ast import *
+from nsre.dfa import LazyDFA
+from nsre.matchers import Eq, In, KeyHasValue
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp
+from nsre.shortcuts import anything, seq
+
+
+def test_same_results():
+    a, b = Final(Eq("a")), Final(Eq("b"))
+    nodes = [
+        seq("abc"),
+        AnyNumber(a + b)["x"] + Maybe(a),
+        (a | b) * slice(2, 4),
+        anything()["x"] + seq("@") + anything()["y"],
+    ]
+
+    for node in nodes:
+        nfa = RegExp.from_ast(node)
+        dfa = RegExp.from_ast(node, dfa=True)
+        assert dfa.dfa is not None
+
+        for n in range(6):
+            for data in product("abc@", repeat=n):
+                data = "".join(data)
+                assert dfa.dfa.accepts(data) == bool(nfa.match(data))
+                assert dfa.match(data) == nfa.match(data)
+
+
+def test_optional():
+    assert RegExp.from_ast(seq("a")).dfa is None
+
+
+def test_counters_not_supported():
+    re = RegExp.from_ast(Final(Eq("a")) * slice(1, 100), dfa=True)
+    assert re.dfa is None
+    assert re.match("a" * 100)
+
+
+def test_cache():
+    re = RegExp.from_ast(AnyNumber(Final(In(["a", "b"]))) + seq("!"), dfa=True)
+
+    assert re.dfa.accepts("abab!")
+    misses = re.dfa.misses
+
+    assert re.dfa.accepts("abab!")
+    assert not re.dfa.accepts("abba")
+    assert re.dfa.misses == misses
+    assert re.dfa.hits > 0
+
+
+def test_budget():
+    re = RegExp.from_ast(AnyNumber(anything()) + seq("!"))
+    dfa = LazyDFA(re.automaton, budget=3)
+
+    assert dfa.accepts("abcdefgh!")
+    assert not dfa.accepts("abcdefgh")
+    assert dfa.flushes > 0
+    assert len(dfa.transitions) <= 3
+
+    assert RegExp.from_ast(seq("!"), dfa=True, dfa_budget=7).dfa.budget == 7
+
+
+def test_budget_unhashable():
+    re = RegExp.from_ast(Final(KeyHasValue("a", 1)) * 6)
+    dfa = LazyDFA(re.automaton, budget=3)
+
+    assert dfa.accepts([{"a": 1}] * 6)
+    assert dfa.flushes > 0
+    assert len(dfa.sets) <= 3
+
+
+def test_unhashable():
+    re = RegExp.from_ast(
+        Final(KeyHasValue("a", 1)) + Final(KeyHasValue("b", 2)), dfa=True
+    )
+
+    assert re.match([{"a": 1}, {"b": 2}])
+    assert not re.match([{"a": 1}, {"b": 3}])
+    assert not re.dfa.transitions
+
+
+def test_equal_tokens_of_other_types():
+    re = RegExp.from_ast(AnyNumber(Final(Predicate(lambda t: t is True))), dfa=True)
+
+    assert re.dfa.accepts([1, 1.0]) is False
+    assert re.dfa.accepts([True, True]) is True
+    assert re.dfa.accepts([True, 1]) is False
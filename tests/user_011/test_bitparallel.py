@@ -0,0 +1,60 @@
+from itertools import product
+
+from nsre.ast import *
+from nsre.bitparallel import MAX_STATES, BitParallel
+from nsre.lib import hex_digits
+from nsre.matchers import Eq, In, KeyHasValue, OutOf
+from nsre.regexp import RegExp
+from nsre.shortcuts import anything, seq
+
+
+def test_selected():
+    assert RegExp.from_ast(seq("abc")).bits is not None
+    assert RegExp.from_ast(hex_digits).bits is not None
+    assert RegExp.from_ast(seq("abc")["x"]).bits is None
+    assert RegExp.from_ast(Final(OutOf("a"))).bits is None
+    assert RegExp.from_ast(seq("a" * MAX_STATES)).bits is None
+    assert RegExp.from_ast(Final(Eq("a")) * slice(1, 100)).bits is None
+
+
+def test_same_results():
+    a, b, c = Final(Eq("a")), Final(In(["b", "c"])), Final(Eq("c"))
+    nodes = [
+        seq("abc"),
+        AnyNumber(a + b) + Maybe(a),
+        (a | b | c) * slice(2, 4),
+        anything() + seq("ab") + anything(),
+        Maybe(a),
+        AnyNumber(seq("abcabcabcab") | c),
+    ]
+
+    for node in nodes:
+        re = RegExp.from_ast(node)
+        assert re.bits is not None
+
+        for n in range(7):
+            for data in product("abc", repeat=n):
+                data = "".join(data)
+                expected = list(re._run(data))
+                assert re.bits.accepts(data) == bool(expected)
+                assert re.match(data) == tuple(m.as_match() for m in expected)
+
+
+def test_many_chunks():
+    re = RegExp.from_ast(seq("abcdefghijklmnopqrstuvwxyz") + AnyNumber(anything()))
+    assert len(re.bits.follow) == 4
+
+    assert re.match("abcdefghijklmnopqrstuvwxyz")
+    assert re.match("abcdefghijklmnopqrstuvwxyz!!!", join_trails=True)[0].trail == (
+        "abcdefghijklmnopqrstuvwxyz!!!"
+    )
+    assert not re.match("abcdefghijklmnopqrstuvwxy")
+
+
+def test_unhashable():
+    re = RegExp.from_ast(Final(KeyHasValue("a", 1)) + Final(Eq(2)))
+    bits = BitParallel(re.automaton)
+
+    assert bits.accepts([{"a": 1}, 2])
+    assert not bits.accepts([{"a": 1}, [2]])
+    assert not bits.accepts([[1], 2])
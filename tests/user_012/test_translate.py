@@ -0,0 +1,133 @@
+import re
+from itertools import product
+
+from nsre.ast import *
+from nsre.automaton import Automaton
+from nsre.lib import hex_digits
+from nsre.matchers import Anything, ChrRanges, Eq, In, KeyHasValue, Not
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp, ast_to_graph
+from nsre.shortcuts import seq
+from nsre.translate import StdlibEngine, ambiguity, ast_to_pattern
+
+
+def test_matchers():
+    assert Eq("a").as_regex() == "a"
+    assert Eq(".").as_regex() == r"\."
+    assert Eq("ab").as_regex() is None
+    assert Eq(1).as_regex() is None
+    assert In("a]-").as_regex() == r"[\-\]a]"
+    assert In(["a", "bc"]).as_regex() == "[a]"
+    assert In([1, 2]).as_regex() is None
+    assert In("").as_regex() == "(?!)"
+    assert ChrRanges(("a", "f"), ("0", "9")).as_regex() == "[a-f0-9]"
+    assert Anything().as_regex() == "(?s:.)"
+    assert Not(In("ab")).as_regex() == "(?:(?![ab])(?s:.))"
+    assert Not(Predicate(str.isdigit)).as_regex() is None
+    assert KeyHasValue("a", "b").as_regex() is None
+
+
+def test_untranslatable():
+    assert ast_to_pattern(seq("a") + Final(Predicate(str.isdigit))) is None
+    assert StdlibEngine.from_ast(Final(KeyHasValue("a", 1))) is None
+
+    re_ = RegExp.from_ast(seq("a") + Final(Predicate(str.isdigit)))
+    assert re_.stdlib is None
+    assert re_.backend == "bits"
+    assert re_.match("a1")
+
+
+def test_group_names():
+    t = ast_to_pattern(
+        seq("a")["my name"] + seq("b")["my name"] + seq("c")["1"] + seq("d")["my_name"]
+    )
+
+    assert t.pattern == "(?P<my_name>a)(?P<my_name_2>b)(?P<g_1>c)(?P<my_name_3>d)"
+    assert t.groups == {
+        "my_name": "my name",
+        "my_name_2": "my name",
+        "g_1": "1",
+        "my_name_3": "my_name",
+    }
+    assert t.captures == ("my name", "my name", "1", "my_name")
+    assert re.fullmatch(t.pattern, "abcd").group("my_name_2") == "b"
+
+    t = ast_to_pattern((seq("a")["x"] + seq("b")["y"])["z"] + seq("c")["w"])
+    assert t.parents == {"z": None, "x": "z", "y": "z", "w": None}
+
+
+def test_backend():
+    assert RegExp.from_ast(hex_digits).backend == "bits"
+    assert RegExp.from_ast(seq("a")["x"]).backend == "re"
+    assert RegExp.from_ast(AnyNumber(seq("ab")["x"])).backend == "re+pike"
+    assert RegExp.from_ast(seq("a")["x"], dfa=True).backend == "dfa+re"
+    assert RegExp.from_ast(Final(KeyHasValue("a", 1))["x"]).backend == "pike"
+    assert RegExp.from_ast(Final(KeyHasValue("a", 1))["x"], dfa=True).backend == (
+        "dfa+pike"
+    )
+
+
+def test_no_blow_up():
+    a = Final(Eq("a"))
+    nested = AnyNumber(AnyNumber(a) + a.copy()) + Final(Eq("c"))
+
+    assert ast_to_pattern(nested).pattern == "(?:(?:a)*a)*c"
+    assert StdlibEngine.from_ast(nested) is None
+    assert StdlibEngine.from_ast(AnyNumber(Maybe(a))) is None
+    assert StdlibEngine.from_ast(AnyNumber(a | a.copy())) is None
+
+    re_ = RegExp.from_ast(nested)
+    assert re_.backend == "bits"
+    assert not re_.test("a" * 28 + "x")
+
+    assert ambiguity(Automaton.from_graph(ast_to_graph(seq("ab") | seq("ac")))) == (
+        True,
+        True,
+    )
+    assert ambiguity(Automaton.from_graph(ast_to_graph(a | a.copy()))) == (True, False,)
+
+
+def test_complete():
+    a, b = Final(Eq("a")), Final(In("bc"))
+    nodes = [
+        (a["x"] + Maybe(b["y"]))["z"] + AnyNumber(a),
+        seq("a")["x"] + seq("b")["x"],
+        Maybe(a)["x"] + b,
+        (a | b)["x"] * slice(2, 5),
+    ]
+
+    for node, complete in zip(nodes, [True, True, True, False]):
+        translated = RegExp.from_ast(node)
+        reference = RegExp(graph=translated.graph)
+
+        assert translated.stdlib.complete is complete
+
+        for n in range(6):
+            for data in product("abc", repeat=n):
+                data = "".join(data)
+                assert translated.match(data) == reference.match(data)
+
+
+def test_same_results():
+    a, b = Final(Eq("a")), Final(In("bc"))
+    nodes = [
+        seq("a.c"),
+        AnyNumber(a + b) + Maybe(Final(Anything())),
+        (a | b) * slice(2, 12),
+        AnyNumber(Final(Not(In("a"))))["x"] + a,
+        (AnyNumber(a)["x"] + AnyNumber(b)["y"])["z"],
+        Final(ChrRanges(("a", "b"))) * slice(1, None),
+    ]
+
+    for node in nodes:
+        translated = RegExp.from_ast(node)
+        reference = RegExp(graph=translated.graph)
+
+        assert translated.stdlib is not None
+        assert reference.stdlib is None
+
+        for n in range(7):
+            for data in product("abc.", repeat=n):
+                data = "".join(data)
+                assert translated.match(data) == reference.match(data)
+                assert translated.match(list(data)) == reference.match(data)
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import nsre
+from nsre import regexp
+from nsre.automaton import Automaton
+from nsre.graph import Graph
+from nsre.lib import email, html_tag, url
+
+
+def test_graph_semantics():
+    g = Graph()
+    g.add_nodes_from(["a", "b"])
+    g.add_edge("a", "b", x=1)
+    g.add_edge("a", "b", y=2)
+    g.add_edge("b", "b")
+    g.add_edge("b", "c")
+
+    assert list(g.nodes) == ["a", "b", "c"]
+    assert list(g.edges) == [("a", "b"), ("b", "b"), ("b", "c")]
+    assert g.edges["a", "b"] == {"x": 1, "y": 2}
+    assert g.get_edge_data("a", "b") is g.edges["a", "b"]
+    assert g.get_edge_data("a", "c", default={}) == {}
+    assert list(g.predecessors("b")) == ["a", "b"]
+    assert g.has_edge("b", "b")
+
+    g.remove_node("b")
+
+    assert list(g.nodes) == ["a", "c"]
+    assert list(g.edges) == []
+    assert list(g.successors("a")) == []
+    assert list(g.predecessors("c")) == []
+
+
+def test_no_networkx_at_import():
+    code = (
+        "import sys\n"
+        "from nsre import *\n"
+        "from nsre.lib import email\n"
+        "assert RegExp.from_ast(email).match('a@b.com')\n"
+        "assert 'networkx' not in sys.modules\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(nsre.__file__)))
+
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def test_same_as_networkx(monkeypatch):
+    nx = pytest.importorskip("networkx")
+
+    for node in [url, email, html_tag]:
+        node = node.copy()
+        mine = Automaton.from_graph(regexp.ast_to_graph(node))
+
+        with monkeypatch.context() as m:
+            m.setattr(regexp, "Graph", nx.DiGraph)
+            reference = Automaton.from_graph(regexp.ast_to_graph(node))
+
+        assert mine.successors == reference.successors
+        assert mine.edges == reference.edges
+        assert mine.terminal == reference.terminal
+        assert [repr(d) for d in mine.data] == [repr(d) for d in reference.data]
+
+
+def test_to_networkx():
+    pytest.importorskip("networkx")
+
+    g = regexp.ast_to_graph(email.copy())
+    converted = g.to_networkx()
+
+    assert list(converted.nodes) == list(g.nodes)
+    assert list(converted.edges) == list(g.edges)
+
+    for u, v in g.edges:
+        assert converted.edges[u, v] == g.edges[u, v]
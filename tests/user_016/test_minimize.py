@@ -0,0 +1,105 @@
+from itertools import product
+from random import Random
+
+from nsre.ast import *
+from nsre.automaton import NO_TERMINAL, Automaton, EdgeData
+from nsre.lib import email, html_tag, url
+from nsre.matchers import Eq
+from nsre.matchers import Test as Predicate
+from nsre.minimize import count_edges, minimize
+from nsre.regexp import RegExp, ast_to_graph
+from nsre.shortcuts import seq
+from tests.helpers import flatten, random_node, results
+
+
+def both(node):
+    reference = RegExp(graph=ast_to_graph(node.copy()), minimize=False)
+    reduced = RegExp(graph=ast_to_graph(node.copy()))
+
+    return reference, reduced
+
+
+def assert_same(node, alphabet="ab", size=5):
+    reference, reduced = both(node)
+
+    assert len(reduced.automaton) <= len(reference.automaton)
+
+    for n in range(size + 1):
+        for data in product(alphabet, repeat=n):
+            expected = results(reference, data, reference.explorers)
+
+            assert results(reduced, data, reduced.explorers) == expected
+            assert results(reduced, data, reduced.pike) == expected
+
+
+def test_reduction():
+    a = Automaton.from_graph(ast_to_graph(seq("ab") | seq("cb")))
+    small, reduction = minimize(a)
+
+    assert (reduction.states_before, reduction.states_after) == (5, 4)
+    assert (reduction.edges_before, reduction.edges_after) == (6, 5)
+    assert reduction.edges_after == count_edges(small)
+    assert str(reduction) == "states: 5 -> 4, edges: 6 -> 5"
+
+
+def test_lib_is_smaller():
+    for node in [html_tag, url, email]:
+        reduction = RegExp.from_ast(node).reduction
+
+        assert reduction.states_after < reduction.states_before
+        assert reduction.edges_after < reduction.edges_before
+
+
+def test_merge_needs_same_matchers():
+    even = Predicate(lambda x: x % 2 == 0)
+    odd = Predicate(lambda x: x % 2 == 1)
+    node = (Final(even) | Final(odd)) + Final(Eq(0))
+    re = RegExp.from_ast(node)
+
+    assert len(re.automaton) == 4
+    assert re.match([1, 0])
+    assert not re.match([1, 1])
+
+
+def test_captures_are_kept():
+    node = (seq("a")["x"] + seq("b")) | (seq("a") + seq("b")["y"])
+    reference, reduced = both(node)
+
+    # The edges differ by their captures so nothing can be merged
+    assert len(reduced.automaton) == len(reference.automaton)
+    assert {flatten(m) for m in reduced.match("ab")} == {
+        flatten(m) for m in reference.match("ab")
+    }
+    assert len(reduced.match("ab")) == 2
+
+
+def test_trim():
+    automaton = Automaton(
+        matchers=(None, Eq("a"), Eq("b"), Eq("c")),
+        successors=((1, 2), (), (), (1,)),
+        edges=((0, 0), (), (), (0,)),
+        terminal=(NO_TERMINAL, 0, NO_TERMINAL, NO_TERMINAL),
+        data=(EdgeData(),),
+    )
+    small, reduction = minimize(automaton)
+
+    assert small.matchers == (None, automaton.matchers[1])
+    assert small.successors == ((1,), ())
+    assert small.terminal == (NO_TERMINAL, 0)
+    assert str(reduction) == "states: 4 -> 2, edges: 4 -> 2"
+
+
+def test_random_expressions():
+    rng = Random(42)
+
+    for _ in range(150):
+        assert_same(random_node(rng, 4))
+
+
+def test_lib_same_results():
+    reference, reduced = both(email)
+
+    for text in ["remy.sanchez@with-madrid.com", "a+b@c.de", "nope@", "@x.com"]:
+        assert results(reduced, text, reduced.pike) == results(
+            reference, text, reference.pike
+        )
@@ -0,0 +1,75 @@
+from itertools import product
+
+from nsre.ast import *
+from nsre.lib import email, hex_digits
+from nsre.matchers import Eq, OutOf
+from nsre.regexp import RegExp
+from nsre.shortcuts import seq
+
+
+def ambiguous():
+    return RegExp.from_ast(AnyNumber(Final(OutOf("a"))["x"] | Final(OutOf("b"))))
+
+
+def test_same_as_match():
+    cases = [
+        (ambiguous(), [["ab"] * n for n in range(4)] + [["a", "c"]]),
+        (RegExp.from_ast(email), ["a@b.com", "nope"]),
+        (RegExp.from_ast(email), [list("a@b.com"), list("nope")]),
+        (RegExp.from_ast(hex_digits), ["abc", "xyz", list("abc")]),
+        (
+            RegExp.from_ast(AnyNumber(seq("a")["x"] | seq("a")["y"])),
+            ["".join(p) for n in range(4) for p in product("ab", repeat=n)],
+        ),
+    ]
+
+    for re, inputs in cases:
+        for data in inputs:
+            expected = tuple(re.match(data))
+
+            assert tuple(re.iter_matches(data)) == expected
+            assert re.count_matches(data) == len(expected)
+
+            for limit in range(4):
+                assert tuple(re.iter_matches(data, limit=limit)) == expected[:limit]
+
+
+def test_join_trails():
+    re = RegExp.from_ast(seq("ab")["x"])
+
+    (m,) = re.iter_matches("ab", join_trails=True)
+    assert m["x"].trail == "ab"
+
+
+def test_lazy(monkeypatch):
+    re = ambiguous()
+    built = []
+    make_match = re.explorers.make_match
+
+    def counting(*args, **kwargs):
+        built.append(1)
+        return make_match(*args, **kwargs)
+
+    monkeypatch.setattr(re.explorers, "make_match", counting)
+
+    matches = re.iter_matches(["ab"] * 10)
+    assert built == []
+
+    next(matches)
+    assert len(built) == 1
+
+    assert len(list(re.iter_matches(["ab"] * 10, limit=3))) == 3
+    assert len(built) == 4
+
+    assert re.count_matches(["ab"] * 10) == 2 ** 10
+    assert len(built) == 4
+
+
+def test_no_match():
+    re = RegExp.from_ast(seq("ab") + Final(Eq("c"))["x"])
+
+    assert list(re.iter_matches("abd")) == []
+    assert list(re.iter_matches(list("abd"))) == []
+    assert re.count_matches("abd") == 0
+    assert re.count_matches(list("abd")) == 0
+    assert re.count_matches(iter("abc")) == 1
@@ -0,0 +1,60 @@
+from nsre.ast import *
+from nsre.matchers import Eq
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp
+
+
+class Calls:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, token):
+        self.count += 1
+        return token in "ab"
+
+
+class CountingEq(Eq):
+    calls = 0
+
+    def match(self, token):
+        CountingEq.calls += 1
+        yield from super().match(token)
+
+
+def test_each_matcher_once_per_token():
+    calls = Calls()
+    letter = Final(Predicate(calls))
+    node = AnyNumber(letter["x"] | letter["y"] | (letter + letter)["z"])
+    re = RegExp(graph=RegExp.from_ast(node).graph, minimize=False)
+    data = list("abab")
+
+    for engine in (re.explorers, re.pike):
+        calls.count = 0
+        re.dispatch.reset_stats()
+
+        assert list(re._run(data, engine))
+        assert calls.count == len(data)
+        assert re.dispatch.evaluations == len(data)
+        assert re.dispatch.saved > len(data)
+
+
+def test_unhashable_tokens():
+    a = CountingEq([1])
+    re = RegExp.from_ast(AnyNumber(Final(a)["x"] | Final(a)["y"]))
+    CountingEq.calls = 0
+    re.dispatch.reset_stats()
+
+    assert re.match([[1], [1], [1]])
+    assert CountingEq.calls == 3
+    assert re.dispatch.saved > 0
+
+
+def test_stats():
+    re = RegExp.from_ast(Final(Predicate(str.isdigit))["x"])
+    re.dispatch.reset_stats()
+
+    assert re.match(["1"])
+    assert (re.dispatch.evaluations, re.dispatch.saved) == (1, 0)
+
+    re.dispatch.reset_stats()
+    assert (re.dispatch.evaluations, re.dispatch.saved) == (0, 0)
@@ -0,0 +1,188 @@
+import pickle
+from threading import Barrier, Thread
+
+from pytest import raises
+
+from nsre.ast import *
+from nsre.matchers import Cached, CacheInfo, Eq, In
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp
+from nsre.serialize import dumps, loads
+
+
+class Calls:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, token):
+        self.count += 1
+        return token in "ab"
+
+
+def is_vowel(token):
+    return token in "aeiou"
+
+
+def test_hits_and_misses():
+    calls = Calls()
+    cached = Cached(Predicate(calls))
+
+    assert list(cached.match("a")) == ["a"]
+    assert list(cached.match("a")) == ["a"]
+    assert list(cached.match("z")) == []
+    assert list(cached.match("z")) == []
+
+    assert calls.count == 2
+    info = cached.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+
+
+def test_lru_eviction():
+    calls = Calls()
+    cached = Cached(Predicate(calls), maxsize=2)
+
+    for token in "aba":
+        list(cached.match(token))
+
+    list(cached.match("c"))
+    assert cached.cache_info().currsize == 2
+
+    # "b" was the least recently used
+    list(cached.match("a"))
+    assert calls.count == 3
+    list(cached.match("b"))
+    assert calls.count == 4
+
+
+def test_ttl(monkeypatch):
+    import nsre.matchers
+
+    now = [100.0]
+    monkeypatch.setattr(nsre.matchers, "monotonic", lambda: now[0])
+
+    calls = Calls()
+    cached = Cached(Predicate(calls), ttl=10)
+
+    list(cached.match("a"))
+    now[0] = 105.0
+    list(cached.match("a"))
+    assert calls.count == 1
+
+    now[0] = 111.0
+    list(cached.match("a"))
+    assert calls.count == 2
+
+
+def test_unhashable_tokens():
+    cached = Cached(Predicate(lambda t: t["x"] > 1))
+
+    assert list(cached.match({"x": 2})) == [{"x": 2}]
+    assert cached.cache_info().misses == 1
+    assert cached.cache_info().currsize == 0
+
+    keyed = Cached(Predicate(lambda t: t["x"] > 1), key=lambda t: t["x"])
+    list(keyed.match({"x": 2}))
+    list(keyed.match({"x": 2}))
+    assert keyed.cache_info().hits == 1
+
+
+def test_clear():
+    cached = Cached(Eq("a"))
+    list(cached.match("a"))
+    cached.cache_clear()
+    assert cached.cache_info() == CacheInfo(0, 0, 1024, 0)
+
+
+def test_invalid():
+    with raises(ValueError):
+        Cached(Eq("a"), maxsize=0)
+
+    with raises(ValueError):
+        Cached("a")
+
+
+def test_in_expression():
+    calls = Calls()
+    letter = Final(Cached(Predicate(calls)))
+    re = RegExp.from_ast(AnyNumber(letter)["x"])
+
+    assert re.match(list("abab"))
+    assert calls.count == 2
+    assert re.match(list("baba"))
+    assert calls.count == 2
+
+
+def test_keeps_index():
+    cached = Cached(In("ab"))
+    assert cached.index_keys() == In("ab").index_keys()
+    assert cached.signature() == Cached(In("ab")).signature()
+    assert cached.signature() != In("ab").signature()
+    assert cached.as_regex() == In("ab").as_regex()
+    assert Cached(Final(Eq("a"))).matcher.ref == "a"
+
+
+def test_not_merged_with_inner():
+    calls = Calls()
+    test = Predicate(calls)
+    cached = Cached(test)
+    bang = Final(Eq("!"))
+    re = RegExp.from_ast(Final(cached) + bang | Final(test) + bang.copy())
+    matchers = re.automaton.matchers
+
+    assert any(m is cached for m in matchers)
+    assert any(m is test for m in matchers)
+
+
+def test_threads():
+    calls = Calls()
+    cached = Cached(Predicate(calls), maxsize=8)
+    barrier = Barrier(8)
+    errors = []
+
+    def work():
+        barrier.wait()
+
+        for i in range(2000):
+            token = "abcdefghijkl"[i % 12]
+
+            if list(cached.match(token)) != ([token] if token in "ab" else []):
+                errors.append(token)
+
+    threads = [Thread(target=work) for _ in range(8)]
+
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    info = cached.cache_info()
+    assert not errors
+    assert info.hits + info.misses == 8 * 2000
+    assert info.currsize <= 8
+
+
+def test_pickle_and_dump():
+    cached = Cached(Predicate(is_vowel), maxsize=10, ttl=5)
+    list(cached.match("a"))
+
+    copy = pickle.loads(pickle.dumps(cached))
+    assert copy.cache_info().currsize == 0
+    assert (copy.maxsize, copy.ttl) == (10, 5)
+    assert list(copy.match("e")) == ["e"]
+
+    re = RegExp.from_ast(Final(cached) + Final(Eq("b")))
+    automaton, *_ = loads(dumps(re.automaton))
+    assert isinstance(automaton.matchers[1], Cached)
+    assert automaton.matchers[1].maxsize == 10
+
+    with raises(ValueError):
+        dumps(RegExp.from_ast(Final(Cached(Eq("a"), key=str))).automaton)
+
+
+def test_equal_values_of_other_types():
+    cached = Cached(Predicate(lambda t: True))
+
+    assert list(cached.match(1)) == [1]
+    out = list(cached.match(True))
+    assert out == [True] and out[0] is True
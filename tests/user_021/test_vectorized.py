@@ -0,0 +1,136 @@
+from io import BytesIO
+from random import Random
+
+from pytest import importorskip
+
+from nsre.ast import *
+from nsre.matchers import Anything, ChrRanges, Eq, In, Not, StrTest
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp
+from nsre.vectorized import is_array
+
+np = importorskip("numpy")
+
+NOUN, VERB, DET, ADJ = range(4)
+
+
+def is_verb(token):
+    return token == VERB
+
+
+def is_verb_vector(values):
+    return values == VERB
+
+
+def scalar(re, values):
+    """
+    Runs the expression without the vectorized engine
+    """
+
+    engine, re.vector = re.vector, None
+
+    try:
+        return re.test(list(values)), tuple(re.match(list(values)))
+    finally:
+        re.vector = engine
+
+
+def expressions():
+    anything = AnyNumber(Final(Anything()))
+    verb = Final(Predicate(is_verb, vectorized=is_verb_vector))
+
+    return [
+        anything + Final(Eq(DET)) + AnyNumber(Final(In({ADJ}))) + Final(Eq(NOUN)),
+        AnyNumber(Final(Eq(DET)) | Final(Eq(NOUN))) + Maybe(verb),
+        AnyNumber(Final(Not(Eq(VERB)))) + verb + anything,
+        (Final(Eq(DET)) + Final(Eq(NOUN)))["np"] + anything,
+    ]
+
+
+def test_same_answers():
+    rng = Random(21)
+
+    for node in expressions():
+        re = RegExp.from_ast(node)
+        assert re.vector is not None
+
+        for _ in range(200):
+            values = np.array([rng.randrange(4) for _ in range(rng.randrange(8))])
+            expected_test, expected_matches = scalar(re, values)
+
+            assert re.test(values) == expected_test
+            assert tuple(re.match(values)) == expected_matches
+            assert re.count_matches(values) == len(expected_matches)
+
+
+def test_long_array():
+    values = np.zeros(300_000, dtype=np.int64)
+    values[-2:] = [DET, NOUN]
+    re = RegExp.from_ast(
+        AnyNumber(Final(Eq(0))) + Final(Eq(DET)) + Final(In({NOUN, ADJ}))
+    )
+
+    assert re.test(values)
+    assert len(re.match(values)) == 1
+    assert re.match(values)[0].trail[-2:] == (DET, NOUN)
+
+    values[10] = VERB
+    assert not re.test(values)
+
+
+def test_captures_use_regular_engine():
+    re = RegExp.from_ast((Final(Eq(DET)) + Final(Eq(NOUN)))["np"])
+    assert not re.vector.complete
+
+    m = re.match(np.array([DET, NOUN]))
+    assert tuple(m["np"].trail) == (DET, NOUN)
+    assert not re.match(np.array([DET, VERB]))
+
+
+def test_strings():
+    re = RegExp.from_ast(
+        Final(ChrRanges(("a", "c")))
+        + Final(In("xyz"))
+        + Final(StrTest("isdigit", ascii=True))
+    )
+    assert re.vector.classify(np.array(list("ax1"))) is not None
+
+    for text in ["ax1", "bz9", "dx1", "aa1", "ax٣", "ax"]:
+        assert re.test(np.array(list(text))) == re.test(text)
+
+
+def test_fallback():
+    re = RegExp.from_ast(AnyNumber(Final(Predicate(is_verb))))
+    values = np.array([VERB, VERB])
+
+    assert re.vector.classify(values) is None
+    assert re.test(values)
+    assert len(re.match(values)) == 1
+
+    objects = np.array([VERB, "x"], dtype=object)
+    assert RegExp.from_ast(AnyNumber(Final(Eq(VERB)))).vector.classify(objects) is None
+
+
+def test_counters_not_supported():
+    re = RegExp.from_ast(Repeat(Final(Eq(VERB)), 2, 3))
+    assert re.vector is None
+    assert re.test(np.array([VERB, VERB]))
+
+
+def test_is_array():
+    assert is_array(np.array([1, 2]))
+    assert not is_array(np.array([[1, 2]]))
+    assert not is_array([1, 2])
+
+
+def test_dump_vectorized_test():
+    re = RegExp.from_ast(
+        AnyNumber(Final(Predicate(is_verb, vectorized=is_verb_vector)))
+    )
+    buf = BytesIO()
+    re.dump(buf)
+    loaded = RegExp.load(BytesIO(buf.getvalue()))
+
+    assert loaded.vector.classify(np.array([VERB])) is not None
+    assert loaded.test(np.array([VERB, VERB]))
+    assert not loaded.test(np.array([VERB, NOUN]))
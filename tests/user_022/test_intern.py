@@ -0,0 +1,115 @@
+from random import Random
+
+from nsre.ast import *
+from nsre.automaton import TokenTable
+from nsre.matchers import Eq, Not, OutOf
+from nsre.matchers import Test as Predicate
+from nsre.regexp import RegExp, RegExpSet
+from nsre.shortcuts import seq
+
+
+class Calls:
+    def __init__(self, test):
+        self.test = test
+        self.count = 0
+
+    def __call__(self, token):
+        self.count += 1
+        return self.test(token)
+
+
+def build(intern):
+    vowel = Calls(lambda t: t in "aeiou")
+    letter = Final(Predicate(vowel))
+    node = AnyNumber(letter["v"] | Final(Not(Predicate(vowel)))["c"])
+
+    return RegExp.from_ast(node, intern=intern), vowel
+
+
+def test_evaluated_once_per_value():
+    re, vowel = build(True)
+    data = list("abcabcabcabc")
+
+    # The predicate is shared by two matchers, each evaluated once for each
+    # of the 3 distinct letters
+    assert re.match(data)
+    assert vowel.count == 6
+
+    vowel.count = 0
+    assert re.test(data)
+    assert vowel.count == 6
+
+    vowel.count = 0
+    assert re.count_matches(data) == 1
+    assert vowel.count == 6
+
+
+def test_same_results():
+    rng = Random(22)
+
+    for _ in range(100):
+        data = [rng.choice("abcde") for _ in range(rng.randrange(10))]
+        plain, _ = build(False)
+        interned, _ = build(True)
+
+        assert plain.match(data) == interned.match(data)
+        assert plain.test(data) == interned.test(data)
+        assert list(plain.finditer(data)) == list(interned.finditer(data))
+
+
+def test_explorers_and_counters():
+    node = Repeat(Final(OutOf("a")) | Final(OutOf("b")), 1, 3)["x"]
+    plain = RegExp.from_ast(node)
+    interned = RegExp.from_ast(node, intern=True)
+    assert interned.pike is None
+    data = ["ab", "ab", "a"]
+
+    assert tuple(plain.match(data)) == tuple(interned.match(data))
+    assert plain.count_matches(data) == interned.count_matches(data) == 4
+    assert interned.test(data)
+    assert not interned.test(data * 2)
+
+
+def test_types_are_not_mixed():
+    re = RegExp.from_ast(AnyNumber(Final(Predicate(lambda t: True))), intern=True)
+    trail = re.match([1, True, 1])[0].trail
+
+    assert trail == (1, True, 1)
+    assert [type(x) for x in trail] == [int, bool, int]
+
+
+def test_unhashable_tokens():
+    calls = Calls(lambda t: t["x"] > 0)
+    re = RegExp.from_ast(AnyNumber(Final(Predicate(calls))), intern=True)
+
+    assert re.match([{"x": 1}, {"x": 1}])
+    assert calls.count == 2
+
+
+def test_set():
+    calls = Calls(lambda t: t == "a")
+    rs = RegExpSet.from_asts(
+        {"as": AnyNumber(Final(Predicate(calls))), "ab": seq("ab")}, intern=True
+    )
+
+    assert set(rs.match("aaaa")) == {"as"}
+    assert calls.count == 1
+
+
+def test_table():
+    table = TokenTable()
+
+    assert table.intern("a") == 0
+    assert table.intern("b") == 1
+    assert table.intern("a") == 0
+    assert table.intern(["a"]) is None
+    assert table.cache(["a"]) is not table.cache(["a"])
+    assert len(table) == 2
+
+
+def test_search():
+    calls = Calls(lambda t: t == "x")
+    re = RegExp.from_ast(Final(Predicate(calls)) + Final(Not(Eq("x"))), intern=True)
+
+    assert re.search(list("abxyab"))
+    assert calls.count == 4
@@ -0,0 +1,139 @@
+from random import Random
+
+from nsre.ast import *
+from nsre.lib import email, url
+from nsre.matchers import Eq, In
+from nsre.matchers import Test as Predicate
+from nsre.prefilter import Barrier, Candidates, Literal, required_literal
+from nsre.regexp import RegExp
+from nsre.shortcuts import anything, seq
+
+
+class Calls:
+    def __init__(self, test):
+        self.test = test
+        self.count = 0
+
+    def __call__(self, token):
+        self.count += 1
+        return self.test(token)
+
+
+def test_literals():
+    assert required_literal(seq("abc")) == Literal(tuple("abc"), 0, 0)
+    assert required_literal(Final(In("xy")) + seq("ab")) == Literal(tuple("ab"), 1, 1)
+    assert required_literal(anything() + seq("ab")) == Literal(tuple("ab"), 0, None)
+    assert required_literal(seq("ab") | seq("ac")) == Literal(("a",), 0, 0)
+    assert required_literal(Maybe(seq("ab"))) is None
+    assert required_literal(AnyNumber(seq("ab"))) is None
+    assert required_literal(Repeat(seq("ab"), 2, 3)["x"]) == Literal(tuple("ab"), 0, 0)
+    assert required_literal(Final(In("ab")) | seq("b")) is None
+
+
+def test_lib():
+    assert required_literal(url).tokens == tuple("http")
+    assert required_literal(email).tokens == ("@",)
+
+
+def test_candidates_bounded():
+    literal = Literal(tuple("ab"), 1, 2)
+    candidates = Candidates.create("xxxxabxxxxxab", literal)
+
+    assert candidates.next_start(0) == 2
+    assert candidates.allows(2)
+    assert candidates.allows(3)
+    assert not candidates.allows(4)
+    assert candidates.next_start(4) == 9
+    assert candidates.next_start(11) is None
+
+
+def test_candidates_barrier():
+    literal = Literal(("@",), 1, None)
+    barrier = Barrier([None, Final(In("abc@")).statement])
+    candidates = Candidates.create("ab ab ab@c ab", literal, barrier)
+
+    assert candidates.next_start(0) == 6
+    assert candidates.allows(7)
+    assert not candidates.allows(8)
+    assert candidates.next_start(9) is None
+
+
+def test_sequences():
+    literal = Literal((1, 2), 0, 0)
+
+    assert Candidates.create([0, 1, 0, 1, 2], literal).next_start(0) == 3
+    assert Candidates.create(bytes([0, 1, 2]), literal).next_start(0) == 1
+    assert Candidates.create(iter([1, 2]), literal) is None
+    assert Candidates.create("12", literal) is None
+
+
+def test_skips_positions():
+    calls = Calls(lambda t: t.isdigit())
+    re = RegExp.from_ast(Final(Predicate(calls)) + seq("px"))
+    text = "a" * 1000 + "12px"
+
+    found = re.search(text, join_trails=True)
+
+    assert found[0].trail == "2px"
+    assert calls.count < 5
+
+
+def test_interned_tokens():
+    # The barrier and the engine share the caches of the interned tokens, so
+    # the predicate only sees "x" and "a" once
+    calls = Calls(lambda t: t == "x")
+    data = list("xyaxyxyaay")
+    re = RegExp.from_ast(Final(Predicate(calls)) + seq("y"), intern=True)
+
+    assert [m[0].start_pos for m in re.finditer(data)] == [0, 3, 5]
+    assert calls.count == 2
+
+    calls.count = 0
+    re = RegExp.from_ast(Final(Predicate(calls)) + seq("y"))
+
+    assert [m[0].start_pos for m in re.finditer(data)] == [0, 3, 5]
+    assert calls.count == 7
+
+
+def test_same_results():
+    rng = Random(23)
+    nodes = [
+        anything() + seq("ab") + Final(In("abc")),
+        AnyNumber(Final(In("ab")))["x"] + seq("c") + Maybe(seq("a")),
+        (seq("ab") | seq("ac")) + Final(In("bc")),
+        Repeat(Final(In("ab")), 1, 3) + seq("cc"),
+    ]
+
+    for node in nodes:
+        re = RegExp.from_ast(node)
+        assert re.literal is not None
+
+        for _ in range(200):
+            data = "".join(rng.choice("abcd ") for _ in range(rng.randrange(20)))
+
+            for inp in [data, list(data)]:
+                for overlapping in [False, True]:
+                    with_literal = list(re.finditer(inp, overlapping=overlapping))
+                    literal, re.literal = re.literal, None
+                    plain = list(re.finditer(inp, overlapping=overlapping))
+                    re.literal = literal
+
+                    assert with_literal == plain
+
+
+def test_search_email():
+    re = RegExp.from_ast(email)
+    text = "write to me at remy.sanchez@with-madrid.com or elsewhere " * 3
+
+    found = list(re.finditer(text, join_trails=True))
+
+    assert len(found) == 3
+    assert found[0][0]["user"].trail == "remy.sanchez"
+    assert found[0][0].start_pos == text.index("remy")
+
+
+def test_eq_only_on_strings():
+    re = RegExp.from_ast(Final(Eq(1)) + Final(Eq(2)))
+
+    assert re.search([0, 1, 2, 1])[0].start_pos == 1
+    assert not re.search("12")
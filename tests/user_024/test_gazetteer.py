@@ -0,0 +1,135 @@
+from functools import reduce
+from io import BytesIO
+from operator import or_
+from random import Random
+
+import nsre.regexp
+from nsre.ast import *
+from nsre.ast import Trie
+from nsre.matchers import Eq, FunctionHasValue, In
+from nsre.regexp import RegExp
+from nsre.shortcuts import seq
+from tests.helpers import same
+
+
+def test_trie():
+    trie = Trie.build(["ab", "abc", "b", "ab"])
+
+    assert len(trie) == 3
+    assert trie.size == 5
+    assert trie.lookup("ab") == 0
+    assert trie.lookup("abc") == 1
+    assert trie.lookup("a") is None
+    assert trie.lookup("x") is None
+    assert (trie.min_len, trie.max_len) == (1, 3)
+
+    trie = Trie.build({("new", "york"): "NYC"})
+    assert trie.lookup(["new", "york"]) == "NYC"
+
+
+def test_capture_and_lookup():
+    cities = Gazetteer({("new", "york"): "NYC", ("paris",): "PAR"}, key=str.lower)
+    re = RegExp.from_ast(seq(["in"]) + cities["city"] + Final(Eq(".")))
+    m = re.match(["in", "New", "YORK", "."])
+
+    assert m["city"].trail == ("New", "YORK")
+    assert cities.lookup(m["city"].trail) == "NYC"
+    assert not re.match(["in", "New", "Paris", "."])
+
+
+def test_same_as_alternation():
+    rng = Random(24)
+    forms = [
+        lambda x: x["g"] + AnyNumber(Final(In("abc"))),
+        lambda x: AnyNumber(x["g"]),
+        lambda x: Maybe(Final(Eq("a"))) + x + x["h"],
+        lambda x: Repeat(x, 1, 3),
+    ]
+
+    for _ in range(100):
+        phrases = list(
+            {
+                "".join(rng.choice("abc") for _ in range(rng.randrange(1, 4)))
+                for _ in range(rng.randrange(1, 6))
+            }
+        )
+        form = rng.choice(forms)
+        gazetteer = RegExp.from_ast(form(Gazetteer(phrases)))
+        alternation = RegExp.from_ast(form(reduce(or_, [seq(p) for p in phrases])))
+
+        for _ in range(20):
+            data = "".join(rng.choice("abc") for _ in range(rng.randrange(8)))
+
+            assert same(gazetteer.match(data)) == same(alternation.match(data))
+            assert gazetteer.test(data) == alternation.test(data)
+            assert [same(m) for m in gazetteer.finditer(data)] == [
+                same(m) for m in alternation.finditer(data)
+            ]
+
+
+def test_empty_phrase():
+    re = RegExp.from_ast(seq("x") + Gazetteer(["ab", ""]) + seq("y"))
+
+    assert re.match("xaby")
+    assert re.match("xy")
+    assert not re.match("xay")
+    assert nullable(Gazetteer(["ab", ""]))
+    assert not nullable(Gazetteer(["ab"]))
+
+
+def test_size_of_trie():
+    rng = Random(42)
+    words = [f"w{i}" for i in range(100)]
+    phrases = [
+        tuple(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(2000)
+    ]
+    gazetteer = Gazetteer(phrases)
+    re = RegExp.from_ast(gazetteer)
+
+    assert len(re.automaton) <= gazetteer.phrases.size
+
+    for phrase in phrases[:50]:
+        assert re.match(list(phrase))
+        assert re.match(list(phrase))[0].trail == phrase
+
+
+def test_trie_is_expanded_after_minimization(monkeypatch):
+    monkeypatch.setattr(nsre.regexp, "MINIMIZE_TRIE_LIMIT", 1000)
+    phrases = [(f"w{i}", f"w{i % 7}") for i in range(1000)]
+    re = RegExp.from_ast(seq("x") + Gazetteer(phrases) + seq("y"))
+
+    # The gazetteer is a single state during the minimization, and the common
+    # suffixes of the trie are not shared
+    assert re.reduction.states_before == 4
+    assert len(re.automaton) == 3 + 2 * 1000
+    assert re.match(["x", "w42", "w0", "y"])
+    assert not re.match(["x", "w42", "w1", "y"])
+    assert sum(index is not None for index in re.dispatch.states) == 4
+
+
+def test_dump_with_key():
+    re = RegExp.from_ast(Gazetteer([("new", "york")], key=str.lower))
+    buf = BytesIO()
+    re.dump(buf)
+    loaded = RegExp.load(BytesIO(buf.getvalue()))
+
+    assert loaded.match(["NEW", "York"])
+    assert not loaded.match(["NEW"])
+
+
+def test_function_has_value():
+    matcher = FunctionHasValue(len, 2)
+
+    assert list(matcher.match("ab")) == ["ab"]
+    assert not list(matcher.match("abc"))
+    assert matcher.index_keys()[1] == (2,)
+
+
+def test_finditer_earlier_twin_discarded():
+    # The thread started at 1 is in the same state as the one started at 2
+    # but it is discarded by the match starting at 0
+    words = seq("cc") | seq("c") | seq("b") | seq("bcb")
+    re = RegExp.from_ast(Maybe(seq("a")) + words + words.copy())
+    re.stdlib = None
+
+    assert [m[0].start_pos for m in re.finditer("cbcc")] == [0, 2]
@@ -0,0 +1,131 @@
+from functools import reduce
+from operator import or_
+from random import Random
+
+import nsre.regexp
+from nsre.ast import *
+from nsre.matchers import Eq, In
+from nsre.regexp import RegExp, RegExpSet
+from nsre.shortcuts import seq
+from tests.helpers import same
+
+
+def words(rng, count):
+    return [
+        "".join(rng.choice("abcd") for _ in range(rng.randint(1, 5)))
+        for _ in range(count)
+    ]
+
+
+def test_factor():
+    node = factor_literals(seq("foo") | seq("foobar") | seq("fizz"))
+
+    assert isinstance(node, Gazetteer)
+    assert len(node.phrases) == 3
+    assert node.phrases.size == 10
+
+
+def test_other_branches_kept():
+    other = Final(In("xy"))
+    node = factor_literals(seq("ab") | other | seq("ac"))
+
+    assert isinstance(node, Alternation)
+    assert isinstance(node.left, Gazetteer)
+    assert node.right is other
+
+
+def test_nothing_to_factor():
+    for node in [
+        seq("ab") | Final(In("xy")),
+        seq("ab")["x"] | seq("ac"),
+        seq("abc"),
+        AnyNumber(seq("a") | Final(In("b")))["x"],
+    ]:
+        assert factor_literals(node) is node
+
+
+def test_nested():
+    node = factor_literals(
+        Maybe(seq("x") + (seq("ab") | seq("ac"))["y"])
+        + Repeat(seq("a") | seq("b"), 1, 9)
+    )
+
+    assert isinstance(node.left.statement.right.statement, Gazetteer)
+    assert isinstance(node.right.statement, Gazetteer)
+
+
+def test_same_results(monkeypatch):
+    rng = Random(25)
+    forms = [
+        lambda x: x,
+        lambda x: AnyNumber(x["w"]),
+        lambda x: seq("a") + x + Maybe(x["w"]),
+        lambda x: x["w"] + Final(In("ab")),
+    ]
+
+    for _ in range(100):
+        branches = [seq(w) for w in words(rng, rng.randint(2, 6))]
+
+        if rng.random() < 0.3:
+            branches.append(seq("b")["c"])
+
+        node = rng.choice(forms)(reduce(or_, branches))
+        factored = RegExp.from_ast(node)
+
+        with monkeypatch.context() as m:
+            m.setattr(nsre.regexp, "factor_literals", lambda n: n)
+            plain = RegExp.from_ast(node)
+
+        for _ in range(20):
+            data = "".join(rng.choice("abcd") for _ in range(rng.randrange(8)))
+
+            assert same(factored.match(data)) == same(plain.match(data))
+            assert [same(m) for m in factored.finditer(data)] == [
+                same(m) for m in plain.finditer(data)
+            ]
+
+
+def test_large_alternation():
+    rng = Random(42)
+    vocabulary = words(rng, 5000)
+    node = AnyNumber(Final(Eq(" "))) + reduce(or_, [seq(w) for w in vocabulary])
+    re = RegExp.from_ast(node)
+
+    assert re.match("  " + vocabulary[123])
+    assert not re.match("  xyz")
+
+    rs = RegExpSet.from_asts({"words": node, "x": seq("x")})
+    assert set(rs.match(" " + vocabulary[0])) == {"words"}
+
+
+def test_explorers_bounded():
+    rng = Random(1)
+    vocabulary = words(rng, 300)
+    re = RegExp.from_ast(reduce(or_, [seq(w) for w in vocabulary]))
+    engine = re.explorers
+    step = engine.step
+    live = []
+
+    def counting_step(threads, token, pos, cache=None):
+        out = step(threads, token, pos, cache)
+        live.append(len(out))
+        return out
+
+    engine.step = counting_step
+    re.pike = re.bits = re.stdlib = None
+
+    assert re.match(vocabulary[0])
+    assert max(live) == 1
+
+
+def test_suffixes_shared(monkeypatch):
+    node = seq("xab") | seq("ycb") | seq("zdb")
+    factored = RegExp.from_ast(node)
+
+    with monkeypatch.context() as m:
+        m.setattr(nsre.regexp, "factor_literals", lambda n: n)
+        plain = RegExp.from_ast(node)
+
+    assert len(factored.automaton) == len(plain.automaton) == 8
+    assert factored.reduction.states_before == 10
+    assert factored.reduction.states_after == len(factored.automaton)